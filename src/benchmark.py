@@ -0,0 +1,282 @@
+"""Hardware-free benchmark of the serial -> filter -> map -> MIDI pipeline
+
+A simulated device writes the slave's "%.2f, %.2f, %.2f" lines into a
+pyserial loop:// port (or a pty pair) at a fixed rate, and a recording
+MidiOut stands in for rtmidi. Results are printed as a table and can be
+written as JSON to track regressions, e.g.
+
+    python benchmark.py --rates 50,500,1000,5000 --duration 5 --output bench.json
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import threading
+import time
+
+import serial
+
+from cc_mapping import CCMapper, piecewise_curve
+from filters import FilterBank
+from pipeline import Pipeline, AxisMapper, CCSink
+from latency import LatencyTracker
+from midi_output import CCOutputStage, DEFAULT_MAX_CC_RATE, MODE_7BIT, OUTPUT_MODES
+from serial_io import SerialFrameReader, PROTOCOL_TEXT
+
+DEFAULT_RATES = (50, 200, 1000, 5000)
+DEFAULT_DURATION = 5.0
+
+# Simulated devices
+DEVICE_LOOP = "loop"  # pyserial loop:// - in process, no OS involvement
+DEVICE_PTY = "pty"    # pseudo terminal pair - goes through the tty layer (POSIX only)
+DEVICES = (DEVICE_LOOP, DEVICE_PTY)
+
+# Same controllers as MIDIController
+PITCH_CC, ROLL_CC, YAW_CC = 16, 17, 18
+MIDI_CHANNEL = 0
+
+# Results file layout version, bumped when fields change meaning
+RESULTS_VERSION = 1
+
+
+class RecordingMidiOut:
+    """Stand-in for rtmidi.MidiOut that keeps every message it is sent"""
+
+    def __init__(self, keep_messages=False):
+        self.keep_messages = keep_messages
+        self.messages = []
+        self.count = 0
+
+    def send_message(self, message):
+        self.count += 1
+        if self.keep_messages:
+            self.messages.append((time.perf_counter(), list(message)))
+
+    def close_port(self):
+        pass
+
+
+class SimulatedDevice:
+    """Thread writing orientation lines like slave.cpp at a fixed rate
+
+    Lines are written in small batches on a 1 ms clock so rates above what
+    time.sleep() can pace one line at a time are still reached on average.
+    """
+
+    def __init__(self, port, rate, write=None):
+        self.port = port
+        self.rate = rate
+        self.write = write or port.write
+        self.running = False
+        self.thread = None
+        self.lines_written = 0
+        self.bytes_written = 0
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._write_loop, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=1.0)
+            self.thread = None
+
+    @staticmethod
+    def sample(t):
+        """Slow sweeps on every axis, crossing ±180° on yaw"""
+        yaw = (t * 90.0) % 360.0 - 180.0
+        pitch = 60.0 * math.sin(t * 1.3)
+        roll = 120.0 * math.sin(t * 0.7)
+        return yaw, pitch, roll
+
+    def _write_loop(self):
+        interval = 1.0 / self.rate
+        start = time.perf_counter()
+        while self.running:
+            now = time.perf_counter()
+            due = int((now - start) / interval) + 1 - self.lines_written
+            if due > 0:
+                lines = []
+                for i in range(self.lines_written, self.lines_written + due):
+                    lines.append("%.2f, %.2f, %.2f\n" % self.sample(i * interval))
+                data = "".join(lines).encode()
+                self.write(data)
+                self.lines_written += due
+                self.bytes_written += len(data)
+            time.sleep(min(interval, 0.001))
+
+
+def open_device(device):
+    """Return (serial port for the reader, write function for the simulator, cleanup)"""
+    if device == DEVICE_LOOP:
+        port = serial.serial_for_url("loop://", timeout=1)
+        return port, port.write, port.close
+    if device == DEVICE_PTY:
+        master_fd, slave_fd = os.openpty()
+        port = serial.Serial(os.ttyname(slave_fd), timeout=1)
+
+        def write(data):
+            view = memoryview(data)
+            while view:
+                view = view[os.write(master_fd, view):]
+
+        def cleanup():
+            port.close()
+            os.close(slave_fd)
+            os.close(master_fd)
+        return port, write, cleanup
+    raise ValueError(f"Unknown device: {device}")
+
+
+def run_benchmark(rate, duration=DEFAULT_DURATION, device=DEVICE_LOOP, filter_specs=None,
+                  max_cc_rate=DEFAULT_MAX_CC_RATE, output_mode=MODE_7BIT):
+    """Drive the pipeline from a simulated device for duration seconds, returns the results"""
+    port, write, cleanup = open_device(device)
+    midi_out = RecordingMidiOut()
+    output = CCOutputStage(midi_out, max_rate=max_cc_rate, mode=output_mode)
+    latency = LatencyTracker()
+    reader = SerialFrameReader(port, protocol=PROTOCOL_TEXT, latency=latency)
+    simulator = SimulatedDevice(port, rate, write)
+    # Every sample goes through the stages, as fast as they keep up
+    pipeline = Pipeline(reader, AxisMapper(CCMapper(piecewise_curve(), output.max_value)),
+                        CCSink(output, MIDI_CHANNEL, PITCH_CC, ROLL_CC, YAW_CC),
+                        filters=FilterBank(filter_specs), latency=latency)
+    timing = {}
+
+    def stop_after_duration():
+        time.sleep(duration)
+        simulator.stop()
+        timing["elapsed"] = time.perf_counter() - timing["start"]
+        # Keep consuming briefly so lines still in flight are counted
+        time.sleep(0.2)
+        pipeline.stop()
+
+    try:
+        reader.start()
+        simulator.start()
+        cpu_start = time.process_time()
+        thread_cpu_start = time.thread_time()
+        timing["start"] = time.perf_counter()
+        threading.Thread(target=stop_after_duration, daemon=True).start()
+        pipeline.run()
+        cpu = time.process_time() - cpu_start
+        thread_cpu = time.thread_time() - thread_cpu_start
+    finally:
+        simulator.stop()
+        pipeline.stop()
+        reader.stop()
+        cleanup()
+
+    # The rate is taken over the time the simulator was writing
+    elapsed = timing["elapsed"]
+    processed = pipeline.outputs
+    output.flush(force=True)
+    reader_stats = reader.stats()
+    written = simulator.lines_written
+    latency_summary = latency.summary()
+    latency_summary.pop("paint", None)
+    return {
+        "rate": rate,
+        "device": device,
+        "duration_s": elapsed,
+        "lines_written": written,
+        "samples_processed": processed,
+        "samples_per_sec": processed / elapsed if elapsed else 0.0,
+        "dropped_lines": written - processed,
+        "parse_errors": reader_stats["parse_errors"],
+        "ring_overflows": reader_stats["overflows"],
+        # process_time covers every thread, simulator included; thread_time
+        # only the consumer (filter, map, send)
+        "cpu_us_per_sample": cpu / processed * 1e6 if processed else None,
+        "consumer_cpu_us_per_sample": thread_cpu / processed * 1e6 if processed else None,
+        "midi_messages": midi_out.count,
+        "midi_suppressed": output.suppressed,
+        "latency_ms": latency_summary,
+    }
+
+
+def format_results(results):
+    """Text table of a list of run_benchmark() results"""
+    lines = [f"{'rate':>6}{'samples/s':>11}{'dropped':>9}{'errors':>8}{'cpu us':>9}"
+             f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"]
+    for result in results:
+        send = result["latency_ms"]["send"]
+        cpu = result["cpu_us_per_sample"]
+        line = (f"{result['rate']:>6}{result['samples_per_sec']:>11.1f}{result['dropped_lines']:>9}"
+                f"{result['parse_errors']:>8}{cpu if cpu is not None else 0:>9.1f}")
+        if send["count"]:
+            line += f"{send['p50']:>9.3f}{send['p95']:>9.3f}{send['p99']:>9.3f}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the 6DOF MIDI pipeline without hardware')
+    parser.add_argument('--rates', default=",".join(str(r) for r in DEFAULT_RATES),
+                        help='Comma separated device rates in Hz (default: %(default)s)')
+    parser.add_argument('--duration', type=float, default=DEFAULT_DURATION,
+                        help='Seconds per rate (default: %(default)s)')
+    parser.add_argument('--device', choices=DEVICES, default=DEVICE_LOOP,
+                        help='Simulated serial device (default: %(default)s)')
+    parser.add_argument('--max-cc-rate', type=float, default=DEFAULT_MAX_CC_RATE,
+                        help='Maximum MIDI messages per second per controller (0 = unlimited)')
+    parser.add_argument('--midi-mode', choices=OUTPUT_MODES, default=MODE_7BIT,
+                        help='MIDI resolution')
+    parser.add_argument('--pitch-filter', help='Pitch filter spec (see filters.make_filter)')
+    parser.add_argument('--roll-filter', help='Roll filter spec')
+    parser.add_argument('--yaw-filter', help='Yaw filter spec')
+    parser.add_argument('--output', metavar='FILE', help='Write the results as JSON to FILE')
+    parser.add_argument('--json', action='store_true', help='Print JSON instead of a table')
+    args = parser.parse_args()
+
+    try:
+        rates = [float(r) for r in args.rates.split(",") if r.strip()]
+    except ValueError:
+        parser.error("--rates must be a comma separated list of numbers")
+    if not rates or any(r <= 0 for r in rates):
+        parser.error("--rates must be positive")
+    if args.duration <= 0:
+        parser.error("--duration must be positive")
+    if args.device == DEVICE_PTY and not hasattr(os, "openpty"):
+        parser.error("--device pty is not available on this platform")
+
+    filter_specs = {axis: spec for axis, spec in (("pitch", args.pitch_filter), ("roll", args.roll_filter),
+                                                  ("yaw", args.yaw_filter)) if spec}
+    try:
+        FilterBank(filter_specs)
+    except ValueError as e:
+        parser.error(str(e))
+
+    results = []
+    for rate in rates:
+        if not args.json:
+            print(f"Running {rate:g} Hz for {args.duration:g}s...", file=sys.stderr)
+        results.append(run_benchmark(rate, args.duration, args.device, filter_specs,
+                                     args.max_cc_rate, args.midi_mode))
+
+    report = {
+        "version": RESULTS_VERSION,
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {"duration_s": args.duration, "device": args.device, "max_cc_rate": args.max_cc_rate,
+                     "midi_mode": args.midi_mode, "filters": FilterBank(filter_specs).specs},
+        "results": results,
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(format_results(results))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        if not args.json:
+            print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
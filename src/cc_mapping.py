@@ -0,0 +1,107 @@
+import math
+
+# Angle range covered by the lookup tables (degrees)
+ANGLE_MIN = -180.0
+ANGLE_MAX = 180.0
+
+# Table resolution - 100 steps per degree keeps quantization well below
+# one step of a 14-bit controller (16384 steps over 360°)
+STEPS_PER_DEGREE = 100
+
+
+# Curves map an angle in degrees to a normalized value in [-1, 1]
+def piecewise_curve(mid_range=30, mid_range_proportion=0.8):
+    """Two-slope curve giving more resolution around the center position"""
+    def curve(angle):
+        if abs(angle) <= mid_range:
+            # Middle range: Map ±mid_range° to ±mid_range_proportion of the output range
+            return (angle / mid_range) * mid_range_proportion
+        # Outer range: Map remaining angles to the outer (1-mid_range_proportion) of the range
+        sign = 1 if angle > 0 else -1
+        remaining_angle = abs(angle) - mid_range
+        return sign * (mid_range_proportion +
+                       (remaining_angle / (ANGLE_MAX - mid_range)) * (1 - mid_range_proportion))
+    return curve
+
+
+def linear_curve():
+    """Straight line from -180° to 180°"""
+    def curve(angle):
+        return angle / ANGLE_MAX
+    return curve
+
+
+def exponential_curve(exponent=2.0):
+    """Symmetric power curve - exponent > 1 flattens the center, < 1 sharpens it"""
+    def curve(angle):
+        x = abs(angle) / ANGLE_MAX
+        return math.copysign(x ** exponent, angle)
+    return curve
+
+
+def s_curve(steepness=3.0):
+    """tanh shaped curve - steep around the center, saturating towards the ends"""
+    scale = math.tanh(steepness)
+
+    def curve(angle):
+        return math.tanh(steepness * angle / ANGLE_MAX) / scale
+    return curve
+
+
+def dead_zone_curve(width=5.0):
+    """Outputs center for ±width° and scales linearly over the remaining range"""
+    def curve(angle):
+        if abs(angle) <= width:
+            return 0.0
+        return math.copysign((abs(angle) - width) / (ANGLE_MAX - width), angle)
+    return curve
+
+
+# Curve factories by name, used for config files and the command line
+CURVES = {
+    "piecewise": piecewise_curve,
+    "linear": linear_curve,
+    "exponential": exponential_curve,
+    "s_curve": s_curve,
+    "dead_zone": dead_zone_curve,
+}
+
+
+def make_curve(name, **params):
+    """Create a curve from its name and keyword parameters"""
+    try:
+        factory = CURVES[name]
+    except KeyError:
+        raise ValueError(f"Unknown mapping curve: {name}") from None
+    return factory(**params)
+
+
+class CCMapper:
+    """Precomputed angle -> controller value table for a single curve
+
+    The curve is evaluated once per table entry when the mapper is built, so
+    mapping a sample costs one index calculation and one list lookup.
+    """
+
+    def __init__(self, curve, max_value=127, steps_per_degree=STEPS_PER_DEGREE):
+        self.max_value = max_value
+        self.steps_per_degree = steps_per_degree
+        self._offset = -ANGLE_MIN * steps_per_degree + 0.5
+        self._last_index = int((ANGLE_MAX - ANGLE_MIN) * steps_per_degree)
+
+        # Scale to the controller range and make sure the midpoint (0 degrees)
+        # lands between the two center values (63/64 for 7-bit)
+        center = max_value / 2
+        table = []
+        for i in range(self._last_index + 1):
+            mapped = curve(ANGLE_MIN + i / steps_per_degree)
+            table.append(min(max_value, max(0, int(center + mapped * center))))
+        self.table = table
+
+    def __call__(self, angle):
+        index = int(angle * self.steps_per_degree + self._offset)
+        if index < 0:
+            index = 0
+        elif index > self._last_index:
+            index = self._last_index
+        return self.table[index]
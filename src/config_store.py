@@ -0,0 +1,107 @@
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+# Settings file shared by the console and GUI modes
+DEFAULT_CONFIG_PATH = Path.home() / '.6dof_config2.json'
+
+# Changes within this window are written together (seconds)
+SAVE_DELAY = 0.5
+
+
+class ConfigStore:
+    """In-memory copy of the settings file with debounced, atomic saves
+
+    The file is read once. set() updates memory straight away and schedules
+    one write for everything changed within SAVE_DELAY; the write goes to a
+    temporary file that then replaces the old one, so a crash never leaves
+    a half-written config. Call flush() before exiting.
+    """
+
+    def __init__(self, path=DEFAULT_CONFIG_PATH, save_delay=SAVE_DELAY):
+        self.path = Path(path)
+        self.save_delay = save_delay
+        self._lock = threading.Lock()
+        self._timer = None
+        self._dirty = False
+        self._mtime = None
+        self.data = {}
+        self.load()
+
+    def load(self):
+        """(Re)read the file, keeping the current values if it is missing or invalid"""
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            mtime = os.path.getmtime(self.path)
+        except (json.JSONDecodeError, IOError, OSError):
+            return False
+        if not isinstance(data, dict):
+            return False
+        with self._lock:
+            self.data = data
+            self._mtime = mtime
+        return True
+
+    def reload_if_changed(self):
+        """Re-read the file if something else modified it, returns True if it did"""
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return False
+        if mtime == self._mtime or self._dirty:
+            return False
+        return self.load()
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def set(self, key, value):
+        self.update({key: value})
+
+    def update(self, values):
+        """Change several settings, saved together after the debounce delay"""
+        with self._lock:
+            data = dict(self.data)
+            data.update(values)
+            # Swap the whole dict, so readers never see it half updated
+            self.data = data
+            self._dirty = True
+            if self._timer is None:
+                self._timer = threading.Timer(self.save_delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Write pending changes now"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return
+            data = self.data
+            self._dirty = False
+            try:
+                self._write(data)
+            except (IOError, OSError, TypeError) as e:
+                print(f"Warning: Could not save settings to {self.path}: {e}")
+
+    def _write(self, data):
+        directory = self.path.parent
+        fd, temp_path = tempfile.mkstemp(prefix=self.path.name, suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
+        self._mtime = os.path.getmtime(self.path)
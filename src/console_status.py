@@ -0,0 +1,235 @@
+import json
+import queue
+import sys
+import threading
+import time
+
+# Status line refresh rate (Hz)
+DEFAULT_STATUS_RATE = 10.0
+
+# Without a terminal the status goes out as ordinary lines, at most this often (seconds)
+PLAIN_STATUS_INTERVAL = 2.0
+
+# Records the structured log may hold before new ones are dropped
+DEFAULT_LOG_QUEUE_SIZE = 10000
+
+# Longest bad frame kept as the example shown with the error count (characters)
+MAX_EXAMPLE_LENGTH = 40
+
+
+class _StatusAwareStream:
+    """sys.stdout stand-in that clears the status line before other output"""
+
+    def __init__(self, status, stream):
+        self._status = status
+        self._stream = stream
+
+    def write(self, text):
+        with self._status.lock:
+            self._status.clear_line()
+            return self._stream.write(text)
+
+    def flush(self):
+        self._stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+class ConsoleStatus:
+    """Console output for read_serial_data, written by a background thread
+
+    The pipeline only stores the latest values (update) and counts bad
+    frames (bad_frame); terminal writes happen on the status thread, so a
+    slow console or SSH link can't hold up MIDI output. On a terminal one
+    status line is redrawn in place at `rate` Hz, otherwise a plain line is
+    written every PLAIN_STATUS_INTERVAL.
+
+    With log_path every output sample and bad frame also goes to a JSON lines
+    file through a bounded queue; records that do not fit are dropped and
+    counted instead of blocking.
+    """
+
+    def __init__(self, source=None, rate=DEFAULT_STATUS_RATE, stream=None, log_path=None,
+                 log_queue_size=DEFAULT_LOG_QUEUE_SIZE):
+        self.source = source  # reader whose stats() are shown
+        self.stream = stream if stream is not None else sys.stdout
+        self.interactive = self.stream.isatty()
+        self.interval = 1.0 / rate if self.interactive else max(1.0 / rate, PLAIN_STATUS_INTERVAL)
+        self.lock = threading.Lock()
+        self.running = False
+        self.thread = None
+        self._line_width = 0
+        self._saved_stdout = None
+
+        # Written by the pipeline thread
+        self.latest = None  # (pitch, roll, yaw, midi_pitch, midi_roll, midi_yaw, read_time)
+        self.outputs = 0
+        self.bad_frames = 0
+        self.last_bad_frame = None
+
+        self._last_outputs = 0
+        self._last_frames = 0
+        self._last_time = None
+
+        # Structured log
+        self.log_path = log_path
+        self.log_queue = queue.Queue(log_queue_size) if log_path else None
+        self.log_file = None
+        self.log_thread = None
+        self.logged = 0
+        self.dropped = 0
+        # perf_counter() read times + offset = Unix time, for the log
+        self._clock_offset = time.time() - time.perf_counter()
+
+    def start(self):
+        if self.log_path:
+            self.log_file = open(self.log_path, 'w', encoding='utf-8')
+            # Not a daemon: exiting waits for the thread to write out the queue
+            self.log_thread = threading.Thread(target=self._log_loop)
+            self.log_thread.start()
+        if self.interactive:
+            # Keep prints from elsewhere (reconnect messages, ...) off the status line
+            self._saved_stdout = sys.stdout
+            sys.stdout = _StatusAwareStream(self, self.stream)
+        self.running = True
+        self._last_time = time.perf_counter()
+        self.thread = threading.Thread(target=self._status_loop, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop the threads, leaving the last status on screen and the log complete"""
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=1.0)
+            self.thread = None
+        if self._saved_stdout is not None:
+            sys.stdout = self._saved_stdout
+            self._saved_stdout = None
+        with self.lock:
+            if self._line_width:
+                self.stream.write("\n")
+                self._line_width = 0
+            self.stream.flush()
+        if self.log_thread:
+            # The log thread closes the file once it has written everything
+            # queued before the None, even if the join times out
+            self.log_queue.put(None)
+            self.log_thread.join(timeout=2.0)
+            self.log_thread = None
+            self.log_file = None
+
+    # Pipeline callbacks - no terminal or file I/O here
+
+    def update(self, pitch, roll, yaw, midi_pitch, midi_roll, midi_yaw, read_time):
+        """Pipeline on_output callback"""
+        values = (pitch, roll, yaw, midi_pitch, midi_roll, midi_yaw, read_time)
+        self.latest = values
+        self.outputs += 1
+        if self.log_queue is not None:
+            self._log(("sample", values))
+
+    def bad_frame(self, frame):
+        """Pipeline on_bad_frame callback"""
+        self.bad_frames += 1
+        self.last_bad_frame = frame
+        if self.log_queue is not None:
+            self._log(("bad_frame", (time.perf_counter(), frame)))
+
+    def _log(self, record):
+        try:
+            self.log_queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    # Status thread
+
+    def clear_line(self):
+        """Erase the status line (caller holds lock)"""
+        if self._line_width:
+            self.stream.write("\r" + " " * self._line_width + "\r")
+            self._line_width = 0
+
+    def _status_loop(self):
+        while self.running:
+            time.sleep(self.interval)
+            line = self.format_status()
+            with self.lock:
+                if self.interactive:
+                    width = len(line)
+                    # Pad over the rest of a longer previous line
+                    self.stream.write("\r" + line + " " * max(0, self._line_width - width))
+                    self._line_width = width
+                else:
+                    self.stream.write(line + "\n")
+                self.stream.flush()
+
+    def format_status(self):
+        now = time.perf_counter()
+        elapsed = now - self._last_time
+        outputs = self.outputs
+        output_rate = (outputs - self._last_outputs) / elapsed if elapsed > 0 else 0.0
+        self._last_outputs = outputs
+
+        parts = []
+        latest = self.latest
+        if latest is not None:
+            pitch, roll, yaw, midi_pitch, midi_roll, midi_yaw, _ = latest
+            parts.append(f"Pitch {pitch:7.2f}° Roll {roll:7.2f}° Yaw {yaw:7.2f}°")
+            parts.append(f"MIDI {midi_pitch:>5} {midi_roll:>5} {midi_yaw:>5}")
+        else:
+            parts.append("Waiting for data")
+
+        if self.source is not None:
+            stats = self.source.stats()
+            frames = stats["frames"]
+            input_rate = (frames - self._last_frames) / elapsed if elapsed > 0 else 0.0
+            self._last_frames = frames
+            parts.append(f"in {input_rate:5.0f} Hz out {output_rate:4.0f} Hz")
+            errors = stats["parse_errors"] + stats["crc_errors"]
+            if errors:
+                parts.append(f"errors {errors}")
+            if stats["overflows"]:
+                parts.append(f"overflows {stats['overflows']}")
+            if not stats.get("connected", True):
+                parts.append("DISCONNECTED")
+        else:
+            parts.append(f"out {output_rate:4.0f} Hz")
+
+        if self.bad_frames and self.last_bad_frame is not None:
+            example = self.last_bad_frame.decode('utf-8', errors='replace').strip()
+            parts.append(f"last bad: {example[:MAX_EXAMPLE_LENGTH]!r}")
+        if self.dropped:
+            parts.append(f"log dropped {self.dropped}")
+        self._last_time = now
+        return " | ".join(parts)
+
+    # Log thread
+
+    def _log_loop(self):
+        log_file = self.log_file
+        offset = self._clock_offset
+        try:
+            while True:
+                record = self.log_queue.get()
+                if record is None:
+                    break
+                kind, values = record
+                if kind == "sample":
+                    pitch, roll, yaw, midi_pitch, midi_roll, midi_yaw, read_time = values
+                    entry = {"type": "sample", "time": read_time + offset, "pitch": pitch, "roll": roll,
+                             "yaw": yaw, "midi": [midi_pitch, midi_roll, midi_yaw]}
+                else:
+                    read_time, frame = values
+                    entry = {"type": "bad_frame", "time": read_time + offset,
+                             "frame": frame.decode('utf-8', errors='replace')}
+                log_file.write(json.dumps(entry) + "\n")
+                self.logged += 1
+                if self.log_queue.empty():
+                    log_file.flush()
+        finally:
+            log_file.close()
+
+    def stats(self):
+        return {"outputs": self.outputs, "bad_frames": self.bad_frames, "logged": self.logged,
+                "dropped": self.dropped}
@@ -0,0 +1,308 @@
+"""Several controllers in one process
+
+All serial ports and WebSocket connections are serviced by one asyncio loop
+on a single I/O thread, and every device's pipeline by one processing
+thread, so the thread count stays at two however many devices are attached.
+Each device keeps its own filters, resampler and latency histograms and
+sends on its own MIDI channel and CC block through a shared output stage.
+With an OSC target each device also sends its angles under its own
+address, /6dof/1, /6dof/2, ...
+"""
+import asyncio
+import sys
+import threading
+import time
+
+import serial
+
+from filters import FilterBank, Resampler, RESAMPLE_MEAN
+from latency import LatencyTracker
+from midi_output import MODE_14BIT
+from osc_output import OSCSink, DEFAULT_OSC_PREFIX
+from pipeline import Pipeline, CCSink
+from serial_io import FrameRingBuffer, SerialFrameReader, PROTOCOL_AUTO, MAX_READ_SIZE
+from websocket_source import WebSocketSource
+
+# First of the three controllers (pitch, roll, yaw) each device sends by default
+DEFAULT_CC_BASE = 16
+
+# Poll interval where the event loop cannot watch serial handles (Windows)
+SERIAL_POLL_INTERVAL = 0.001
+
+
+def parse_device_spec(spec, index=0):
+    """Parse "PORT_OR_URL[,channel=N][,cc=N]" into (target, channel, cc_base)
+
+    channel is 1-16 as shown to users and defaults to one channel per
+    device in order; cc is the pitch controller, roll and yaw follow it.
+    """
+    target, *options = [part.strip() for part in spec.split(",")]
+    if not target:
+        raise ValueError(f"Invalid device '{spec}': no port or URL")
+    channel = index + 1
+    cc_base = DEFAULT_CC_BASE
+    for option in options:
+        key, _, value = option.partition("=")
+        try:
+            if key in ("channel", "ch"):
+                channel = int(value)
+            elif key == "cc":
+                cc_base = int(value)
+            else:
+                raise ValueError(f"unknown option '{key}'")
+        except ValueError as e:
+            raise ValueError(f"Invalid device '{spec}': {e}") from None
+    if not 1 <= channel <= 16:
+        raise ValueError(f"Invalid device '{spec}': channel must be 1-16")
+    if not 0 <= cc_base <= 125:
+        raise ValueError(f"Invalid device '{spec}': cc must be 0-125")
+    return target, channel, cc_base
+
+
+class Device:
+    """One attached controller: its source, pipeline and stats"""
+
+    def __init__(self, name, source, pipeline, channel, cc_base, latency=None):
+        self.name = name
+        self.source = source
+        self.pipeline = pipeline
+        self.channel = channel  # 0-15
+        self.cc_base = cc_base
+        self.latency = latency
+        self.osc = pipeline.osc
+        self.error = None
+        self.serial_conn = getattr(source, "serial_conn", None)
+
+        self._rate_time = time.perf_counter()
+        self._rate_frames = 0
+        self.input_rate = 0.0
+
+    def stats(self):
+        stats = self.source.stats()
+        stats.update(self.pipeline.stats())
+        stats.update(name=self.name, channel=self.channel + 1, cc_base=self.cc_base,
+                     input_rate=self.input_rate, error=str(self.error) if self.error else None)
+        if self.latency is not None:
+            stats["latency_ms"] = self.latency.summary()["send"]
+        if self.osc is not None:
+            osc = self.osc.stats()
+            stats.update(osc_sent=osc["sent"], osc_errors=osc["dropped"] + osc["errors"])
+        return stats
+
+    def update_rate(self, now):
+        elapsed = now - self._rate_time
+        if elapsed > 0:
+            frames = self.source.frames
+            self.input_rate = (frames - self._rate_frames) / elapsed
+            self._rate_frames = frames
+            self._rate_time = now
+
+
+class DeviceHub:
+    """Runs many devices on one I/O thread and one processing thread
+
+    mapper is shared by all devices (MIDIController provides map_axes), the
+    output stage too; devices only differ in channel and CC block. With
+    osc_target, a (host, port), every device gets an OSCSink as well.
+    """
+
+    def __init__(self, mapper, output, filter_specs=None, output_rate=50.0, resample_mode=RESAMPLE_MEAN,
+                 latency=False, osc_target=None, osc_prefix=DEFAULT_OSC_PREFIX):
+        self.mapper = mapper
+        self.output = output
+        self.filter_specs = filter_specs
+        self.output_rate = output_rate
+        self.resample_mode = resample_mode
+        self.latency = latency
+        self.osc_target = osc_target
+        self.osc_prefix = osc_prefix
+        self.devices = []
+        self.running = False
+
+        # Every ring signals this one event, so one thread can wait on all of them
+        self._data_ready = threading.Event()
+        self._loop = None
+        self._io_thread = None
+        self._process_thread = None
+
+    def _check_cc_block(self, cc_base):
+        # The 14-bit LSB controller is CC n+32, so only CC 0-31 can be paired
+        if self.output.mode == MODE_14BIT and cc_base + 2 > 31:
+            raise ValueError(f"CC {cc_base}-{cc_base + 2} have no 14-bit LSB pairs (CC 0-31 only)")
+
+    def _add(self, name, source, channel, cc_base, latency):
+        self._check_cc_block(cc_base)
+        osc = None
+        if self.osc_target is not None:
+            osc = OSCSink(*self.osc_target, prefix=f"{self.osc_prefix.rstrip('/')}/{len(self.devices) + 1}",
+                          motion=False)
+        pipeline = Pipeline(source, self.mapper,
+                            CCSink(self.output, channel - 1, cc_base, cc_base + 1, cc_base + 2),
+                            filters=FilterBank(self.filter_specs),
+                            resampler=Resampler(self.output_rate, self.resample_mode),
+                            latency=latency, osc=osc)
+        device = Device(name, source, pipeline, channel - 1, cc_base, latency)
+        self.devices.append(device)
+        return device
+
+    def add_serial(self, port, channel, cc_base=DEFAULT_CC_BASE, baudrate=115200, protocol=PROTOCOL_AUTO):
+        """Open a serial port and attach it (before start())"""
+        self._check_cc_block(cc_base)
+        ser = serial.serial_for_url(port, baudrate=baudrate, timeout=0)
+        latency = LatencyTracker() if self.latency else None
+        reader = SerialFrameReader(ser, ring=FrameRingBuffer(event=self._data_ready),
+                                   protocol=protocol, latency=latency)
+        return self._add(port, reader, channel, cc_base, latency)
+
+    def add_websocket(self, url, channel, cc_base=DEFAULT_CC_BASE):
+        """Attach a master's WebSocket (before start())"""
+        latency = LatencyTracker() if self.latency else None
+        source = WebSocketSource(url, ring=FrameRingBuffer(event=self._data_ready), latency=latency)
+        return self._add(url, source, channel, cc_base, latency)
+
+    def add_spec(self, spec, baudrate=115200, protocol=PROTOCOL_AUTO):
+        """Attach a device from a parse_device_spec() string"""
+        target, channel, cc_base = parse_device_spec(spec, len(self.devices))
+        if target.startswith(("ws://", "wss://")):
+            return self.add_websocket(target, channel, cc_base)
+        return self.add_serial(target, channel, cc_base, baudrate, protocol)
+
+    def start(self):
+        self.running = True
+        for device in self.devices:
+            device.pipeline.reset()
+            if device.serial_conn is not None:
+                device.serial_conn.reset_input_buffer()
+        self._io_thread = threading.Thread(target=self._io_main, daemon=True)
+        self._io_thread.start()
+        self._process_thread = threading.Thread(target=self._process_loop, daemon=True)
+        self._process_thread.start()
+
+    def stop(self):
+        self.running = False
+        self._data_ready.set()
+        loop = self._loop
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(loop.stop)
+            except RuntimeError:
+                pass  # loop already closed
+        for thread in (self._io_thread, self._process_thread):
+            if thread:
+                thread.join(timeout=1.0)
+        self._io_thread = self._process_thread = None
+        for device in self.devices:
+            if device.serial_conn is not None:
+                device.serial_conn.close()
+            if device.osc is not None:
+                device.osc.close()
+
+    # I/O thread
+
+    def _io_main(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        polled = []
+        try:
+            for device in self.devices:
+                if device.serial_conn is not None:
+                    if not self._watch_serial(loop, device):
+                        polled.append(device)
+                else:
+                    device.source.running = True
+                    loop.create_task(device.source.serve())
+            if polled:
+                loop.create_task(self._poll_serial(polled))
+            loop.run_forever()
+        finally:
+            for device in self.devices:
+                device.source.running = False
+            for task in asyncio.all_tasks(loop):
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*asyncio.all_tasks(loop), return_exceptions=True))
+            self._loop = None
+            loop.close()
+
+    def _watch_serial(self, loop, device):
+        """Have the loop call back when the port is readable, False if it can't"""
+        if sys.platform == "win32":
+            return False
+        try:
+            fd = device.serial_conn.fileno()
+            loop.add_reader(fd, self._read_serial, loop, device, fd)
+        except (AttributeError, NotImplementedError, ValueError, OSError):
+            return False  # loop:// and other URL handlers have no descriptor
+        return True
+
+    def _read_serial(self, loop, device, fd=None):
+        """Read what is buffered on one port and decode it, returns False on error"""
+        ser = device.serial_conn
+        try:
+            waiting = ser.in_waiting
+            chunk = ser.read(min(waiting, MAX_READ_SIZE)) if waiting else b""
+            if fd is not None and not chunk:
+                # Readable without data - the device has gone away
+                raise serial.SerialException("device disconnected")
+        except (serial.SerialException, OSError) as e:
+            device.source.error = e
+            self._data_ready.set()
+            if fd is not None:
+                loop.remove_reader(fd)
+            return False
+        if chunk:
+            device.source.feed(chunk, time.perf_counter())
+        return True
+
+    async def _poll_serial(self, devices):
+        while self.running and devices:
+            for device in list(devices):
+                if not self._read_serial(None, device):
+                    devices.remove(device)
+            await asyncio.sleep(SERIAL_POLL_INTERVAL)
+
+    # Processing thread
+
+    def _process_loop(self):
+        event = self._data_ready
+        active = list(self.devices)
+        while self.running and active:
+            timeout = min(device.pipeline.time_until_tick() for device in active)
+            event.clear()
+            # Check after clear() so a push in between is not missed
+            if not any(len(device.source.ring) for device in active):
+                event.wait(timeout)
+
+            for device in list(active):
+                try:
+                    device.pipeline.service()
+                except Exception as e:
+                    device.error = e
+                    active.remove(device)
+                    print(f"Device {device.name} stopped: {e}")
+
+    def stats(self):
+        now = time.perf_counter()
+        for device in self.devices:
+            device.update_rate(now)
+        return [device.stats() for device in self.devices]
+
+    def format_report(self):
+        """One status line per device"""
+        lines = []
+        for stats in self.stats():
+            line = (f"{stats['name']:<24} ch {stats['channel']:>2} cc {stats['cc_base']:>3}  "
+                    f"{stats['input_rate']:7.1f} Hz  frames {stats['frames']:>8}  "
+                    f"errors {stats['parse_errors'] + stats['crc_errors']:>4}  "
+                    f"overflows {stats['overflows']:>4}")
+            latency = stats.get("latency_ms")
+            if latency and latency["count"]:
+                line += f"  p50 {latency['p50']:.2f} ms  p95 {latency['p95']:.2f} ms"
+            if "osc_sent" in stats:
+                line += f"  OSC {stats['osc_sent']}"
+                if stats["osc_errors"]:
+                    line += f" ({stats['osc_errors']} failed)"
+            if stats["error"]:
+                line += f"  [{stats['error']}]"
+            lines.append(line)
+        return "\n".join(lines)
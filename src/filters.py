@@ -0,0 +1,350 @@
+import math
+import time
+
+# Default filter per axis - matches the original 3 sample average on roll and yaw
+DEFAULT_FILTERS = {"pitch": "none", "roll": "ma:3", "yaw": "ma:3"}
+
+# Axes reported as ±180° that jump from +180 to -180 (pitch only covers ±90°)
+WRAPPED_AXES = ("roll", "yaw")
+
+
+def wrap_angle(angle):
+    """Wrap an angle in degrees into [-180, 180)"""
+    return (angle + 180.0) % 360.0 - 180.0
+
+
+class PassThrough:
+    """No filtering"""
+
+    def update(self, value, t=None):
+        return value
+
+    def reset(self):
+        pass
+
+
+class MovingAverage:
+    """Moving average over a fixed window using a preallocated ring and a running sum
+
+    With wrap=True the input is unwrapped before averaging, so a window holding
+    179° and -179° averages to ±180° instead of 0°.
+    """
+
+    def __init__(self, window=3, wrap=False):
+        if window < 1:
+            raise ValueError("Moving average window must be at least 1")
+        self.window = window
+        self.wrap = wrap
+        self._values = [0.0] * window
+        self.reset()
+
+    def reset(self):
+        self._index = 0
+        self._count = 0
+        self._sum = 0.0
+        self._last = None  # last unwrapped input
+
+    def update(self, value, t=None):
+        if self.wrap:
+            if self._last is not None:
+                value = self._last + wrap_angle(value - self._last)
+            self._last = value
+
+        values = self._values
+        index = self._index
+        if self._count < self.window:
+            self._count += 1
+        else:
+            self._sum -= values[index]
+        values[index] = value
+        self._sum += value
+
+        index += 1
+        if index == self.window:
+            index = 0
+            # Once per lap: resum to stop rounding error building up and keep
+            # the unwrapped angles near the ±180° range
+            if self.wrap and abs(self._last) > 360.0:
+                shift = 360.0 * round(self._last / 360.0)
+                for i in range(self._count):
+                    values[i] -= shift
+                self._last -= shift
+            self._sum = sum(values[:self._count])
+        self._index = index
+
+        mean = self._sum / self._count
+        return wrap_angle(mean) if self.wrap else mean
+
+
+class ExponentialMovingAverage:
+    """Single pole low-pass: y += alpha * (x - y)"""
+
+    def __init__(self, alpha=0.5, wrap=False):
+        if not 0.0 < alpha <= 1.0:
+            raise ValueError("EMA alpha must be in (0, 1]")
+        self.alpha = alpha
+        self.wrap = wrap
+        self.reset()
+
+    def reset(self):
+        self._state = None
+
+    def update(self, value, t=None):
+        state = self._state
+        if state is None:
+            self._state = value
+            return value
+        if self.wrap:
+            state = wrap_angle(state + self.alpha * wrap_angle(value - state))
+        else:
+            state += self.alpha * (value - state)
+        self._state = state
+        return state
+
+
+class OneEuroFilter:
+    """One Euro filter (Casiez et al.) - adaptive low-pass that smooths slow
+    movement heavily and lets fast movement through with little lag
+
+    min_cutoff sets the smoothing at rest (Hz), beta how quickly the cutoff
+    rises with speed. Timestamps are in seconds.
+    """
+
+    def __init__(self, min_cutoff=1.0, beta=0.007, d_cutoff=1.0, wrap=False):
+        if not min_cutoff > 0.0:
+            raise ValueError("One Euro min_cutoff must be positive")
+        if not beta >= 0.0:
+            raise ValueError("One Euro beta must not be negative")
+        if not d_cutoff > 0.0:
+            raise ValueError("One Euro d_cutoff must be positive")
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.wrap = wrap
+        self.reset()
+
+    def reset(self):
+        self._x = None
+        self._dx = 0.0
+        self._t = None
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2.0 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def update(self, value, t=None):
+        if t is None:
+            t = time.perf_counter()
+        if self._x is None:
+            self._x = value
+            self._t = t
+            return value
+
+        dt = t - self._t
+        if dt <= 0.0:
+            dt = 1e-3
+        self._t = t
+
+        delta = value - self._x
+        if self.wrap:
+            delta = wrap_angle(delta)
+
+        # Filtered derivative drives the cutoff of the value filter
+        a_d = self._alpha(self.d_cutoff, dt)
+        self._dx += a_d * (delta / dt - self._dx)
+        cutoff = self.min_cutoff + self.beta * abs(self._dx)
+
+        x = self._x + self._alpha(cutoff, dt) * delta
+        if self.wrap:
+            x = wrap_angle(x)
+        self._x = x
+        return x
+
+
+class MedianFilter:
+    """Running median over a fixed window - removes single sample spikes"""
+
+    def __init__(self, window=3, wrap=False):
+        if window < 1:
+            raise ValueError("Median window must be at least 1")
+        self.window = window
+        self.wrap = wrap
+        self._values = [0.0] * window
+        self.reset()
+
+    def reset(self):
+        self._index = 0
+        self._count = 0
+
+    def update(self, value, t=None):
+        values = self._values
+        values[self._index] = value
+        self._index = (self._index + 1) % self.window
+        if self._count < self.window:
+            self._count += 1
+
+        window = values[:self._count]
+        if self.wrap:
+            # Unwrap around the newest sample so the window doesn't straddle ±180°
+            window = [value + wrap_angle(v - value) for v in window]
+        window.sort()
+        mid = self._count // 2
+        median = window[mid] if self._count % 2 else (window[mid - 1] + window[mid]) / 2
+        return wrap_angle(median) if self.wrap else median
+
+
+def make_filter(spec, wrap=False):
+    """Create a filter from a spec string
+
+    "none", "ma:<window>", "ema:<alpha>", "oneeuro:<min_cutoff>[,<beta>[,<d_cutoff>]]"
+    or "median:<window>"
+    """
+    name, _, args = spec.strip().lower().partition(":")
+    try:
+        params = [float(a) for a in args.split(",")] if args else []
+        if name in ("none", "off"):
+            return PassThrough()
+        if name in ("ma", "mean"):
+            return MovingAverage(int(params[0]) if params else 3, wrap=wrap)
+        if name == "ema":
+            return ExponentialMovingAverage(*params[:1], wrap=wrap)
+        if name in ("oneeuro", "1euro"):
+            return OneEuroFilter(*params[:3], wrap=wrap)
+        if name == "median":
+            return MedianFilter(int(params[0]) if params else 3, wrap=wrap)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid filter '{spec}': {e}") from None
+    raise ValueError(f"Unknown filter '{spec}'")
+
+
+class FilterBank:
+    """One filter per axis, with wraparound handling on the ±180° axes"""
+
+    def __init__(self, specs=None):
+        specs = dict(DEFAULT_FILTERS, **(specs or {}))
+        self.specs = specs
+        self.pitch = make_filter(specs["pitch"], wrap="pitch" in WRAPPED_AXES)
+        self.roll = make_filter(specs["roll"], wrap="roll" in WRAPPED_AXES)
+        self.yaw = make_filter(specs["yaw"], wrap="yaw" in WRAPPED_AXES)
+
+    def process(self, yaw, pitch, roll, t=None):
+        """Filter one sample, returns (yaw, pitch, roll)"""
+        if t is None:
+            t = time.perf_counter()
+        return (self.yaw.update(yaw, t),
+                self.pitch.update(pitch, t),
+                self.roll.update(roll, t))
+
+    def reset(self):
+        self.pitch.reset()
+        self.roll.reset()
+        self.yaw.reset()
+
+
+# Resampler aggregation modes
+RESAMPLE_MEAN = "mean"
+RESAMPLE_LAST = "last"
+RESAMPLE_MODES = (RESAMPLE_MEAN, RESAMPLE_LAST)
+
+
+class Resampler:
+    """Turns an irregular input stream into samples on a steady output clock
+
+    Every input sample that arrives within a tick is aggregated - by mean
+    (wrap-aware on the ±180° axes) or by keeping the last one - instead of
+    being dropped. The number of inputs each tick covered is kept in
+    last_count.
+    """
+
+    def __init__(self, rate=50.0, mode=RESAMPLE_MEAN):
+        if rate <= 0:
+            raise ValueError("Output rate must be positive")
+        if mode not in RESAMPLE_MODES:
+            raise ValueError(f"Unknown resample mode: {mode}")
+        self.rate = rate
+        self.interval = 1.0 / rate
+        self.mode = mode
+        self.reset()
+
+    def reset(self):
+        self.next_tick = None
+        self._count = 0
+        self._ref = None
+        self._last = None
+        self.last_sample_time = None  # timestamp passed with the newest sample
+        self._sum_yaw = self._sum_pitch = self._sum_roll = 0.0
+
+        # Counters
+        self.ticks = 0
+        self.samples = 0
+        self.last_count = 0
+        self.max_count = 0
+
+    def add(self, yaw, pitch, roll, now=None):
+        """Add one input sample to the current tick"""
+        if self.next_tick is None:
+            # Start the clock on the first sample
+            if now is None:
+                now = time.perf_counter()
+            self.next_tick = now + self.interval
+
+        if self._count == 0:
+            self._ref = (yaw, pitch, roll)
+            self._sum_yaw = self._sum_pitch = self._sum_roll = 0.0
+        elif self.mode == RESAMPLE_MEAN:
+            # Sum offsets from the first sample so wrapped axes average correctly
+            ref_yaw, ref_pitch, ref_roll = self._ref
+            self._sum_yaw += wrap_angle(yaw - ref_yaw)
+            self._sum_pitch += pitch - ref_pitch
+            self._sum_roll += wrap_angle(roll - ref_roll)
+        self._last = (yaw, pitch, roll)
+        self.last_sample_time = now
+        self._count += 1
+
+    def time_until_tick(self, now=None, idle_timeout=0.01):
+        """Seconds until the next output tick (idle_timeout before the first sample)"""
+        if self.next_tick is None:
+            return idle_timeout
+        if now is None:
+            now = time.perf_counter()
+        return max(0.0, self.next_tick - now)
+
+    def tick(self, now=None):
+        """Return (yaw, pitch, roll, count) if a tick is due and had input, else None"""
+        if self.next_tick is None:
+            return None
+        if now is None:
+            now = time.perf_counter()
+        if now < self.next_tick:
+            return None
+
+        # Keep a steady clock, but don't try to catch up on missed ticks
+        self.next_tick += self.interval
+        if self.next_tick <= now:
+            self.next_tick = now + self.interval
+
+        count = self._count
+        if count == 0:
+            return None
+        self._count = 0
+        self.ticks += 1
+        self.samples += count
+        self.last_count = count
+        if count > self.max_count:
+            self.max_count = count
+
+        if self.mode == RESAMPLE_LAST or count == 1:
+            yaw, pitch, roll = self._last
+        else:
+            ref_yaw, ref_pitch, ref_roll = self._ref
+            yaw = wrap_angle(ref_yaw + self._sum_yaw / count)
+            pitch = ref_pitch + self._sum_pitch / count
+            roll = wrap_angle(ref_roll + self._sum_roll / count)
+        return yaw, pitch, roll, count
+
+    def stats(self):
+        average = self.samples / self.ticks if self.ticks else 0.0
+        return {"rate": self.rate, "ticks": self.ticks, "samples": self.samples,
+                "samples_per_tick": average, "last_count": self.last_count,
+                "max_count": self.max_count}
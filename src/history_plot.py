@@ -0,0 +1,221 @@
+"""Scrolling plot of the last seconds of input, filtered angles and CC output
+
+Samples go into a HistoryBuffer - preallocated NumPy arrays used as a ring -
+from the pipeline thread. HistoryPlot reduces the visible window to one
+min/max pair per pixel column before drawing, so a redraw costs the same
+whether the window holds a few hundred samples or sixty seconds of kHz
+input, and moves one existing canvas polyline per trace instead of
+creating items.
+"""
+import tkinter as tk
+import tkinter.ttk as ttk
+
+import numpy as np
+
+# Seconds of history kept
+HISTORY_SECONDS = 60
+
+# Visible spans offered (seconds)
+PLOT_SPANS = (10, 30, 60)
+
+# Channels of each history row
+AXES = ("pitch", "roll", "yaw")
+RAW = 0        # input angles before filtering (pitch, roll, yaw)
+FILTERED = 3   # angles sent to the mapper
+CC = 6         # controller values sent
+CHANNELS = 9
+
+# Canvas layout (pixels)
+PLOT_HEIGHT = 180
+MARGIN = 4
+STRIP_GAP = 12
+ANGLES_SHARE = 0.6  # of the height for the angles strip, the rest shows CC values
+
+
+class HistoryBuffer:
+    """Fixed-size ring of (time, CHANNELS values) rows in NumPy arrays
+
+    Each channel is stored contiguously, so reading a few of them for the
+    plot never touches the others.
+
+    Written by one thread with append() while another reads window(); a
+    reader never blocks the writer, and at worst sees the oldest visible
+    row being overwritten.
+    """
+
+    def __init__(self, capacity, channels=CHANNELS):
+        self.capacity = capacity
+        self.times = np.zeros(capacity)
+        self.values = np.zeros((channels, capacity))
+        self.count = 0  # rows appended in total
+
+    def append(self, t, values):
+        index = self.count % self.capacity
+        self.times[index] = t
+        self.values[:, index] = values
+        self.count += 1
+
+    def clear(self):
+        self.count = 0
+
+    def window(self, span, channels):
+        """(times, values of channels) for the rows within span seconds of the newest, oldest first"""
+        count = self.count
+        capacity = self.capacity
+        channels = list(channels)
+        if count == 0:
+            return self.times[:0], np.zeros((len(channels), 0))
+        times = self.times
+        newest = (count - 1) % capacity
+        start_time = times[newest] - span
+        end = newest + 1
+        if count <= capacity or end == capacity or times[0] <= start_time:
+            # The window is one contiguous run ending at the newest row
+            first = np.searchsorted(times[:end], start_time)
+            return times[first:end], self.values[channels, first:end]
+        # It starts among the older rows, which run from the newest one to the end of the arrays
+        first = end + np.searchsorted(times[end:], start_time)
+        values = self.values[channels]
+        return (np.concatenate((times[first:], times[:end])),
+                np.concatenate((values[:, first:], values[:, :end]), axis=1))
+
+
+def decimate(times, values, start_time, span, width):
+    """Reduce samples to pixel columns: (columns, per-column minimum, per-column maximum)
+
+    values holds one row per channel; the minima and maxima come back the same way.
+    """
+    columns = ((times - start_time) * (width / span)).astype(np.intp)
+    np.clip(columns, 0, width - 1, out=columns)
+    starts = np.flatnonzero(np.diff(columns)) + 1
+    starts = np.concatenate(([0], starts))
+    return (columns[starts], np.minimum.reduceat(values, starts, axis=1),
+            np.maximum.reduceat(values, starts, axis=1))
+
+
+class HistoryPlot:
+    """Canvas with raw and filtered angles above and CC values below, for one axis"""
+
+    def __init__(self, parent, history, colors, cc_max=127):
+        self.history = history
+        self.colors = colors
+        self.cc_max = cc_max
+        self.axis = 0
+        self.span = PLOT_SPANS[0]
+        self._drawn_count = None
+
+        controls = ttk.Frame(parent)
+        controls.pack(fill=tk.X)
+        ttk.Label(controls, text="Axis:").pack(side=tk.LEFT, padx=5)
+        self.axis_var = tk.StringVar(value=AXES[self.axis].capitalize())
+        axis_combo = ttk.Combobox(controls, textvariable=self.axis_var, state="readonly", width=8,
+                                  values=[axis.capitalize() for axis in AXES])
+        axis_combo.pack(side=tk.LEFT, padx=5)
+        axis_combo.bind("<<ComboboxSelected>>", self._on_axis_changed)
+        ttk.Label(controls, text="Last:").pack(side=tk.LEFT, padx=5)
+        self.span_var = tk.StringVar(value=f"{self.span} s")
+        span_combo = ttk.Combobox(controls, textvariable=self.span_var, state="readonly", width=6,
+                                  values=[f"{span} s" for span in PLOT_SPANS])
+        span_combo.pack(side=tk.LEFT, padx=5)
+        span_combo.bind("<<ComboboxSelected>>", self._on_span_changed)
+        self.range_label = ttk.Label(controls, text="")
+        self.range_label.pack(side=tk.LEFT, padx=10)
+
+        self.canvas = tk.Canvas(parent, height=PLOT_HEIGHT, bg=colors["canvas_bg"], highlightthickness=0)
+        self.canvas.pack(fill=tk.X, expand=False)
+        self.width = int(self.canvas["width"])
+        self.height = PLOT_HEIGHT
+        self.canvas.bind("<Configure>", self._on_configure)
+
+        # One polyline per trace, moved with coords() on every redraw
+        self.separator = self.canvas.create_line(0, 0, 0, 0, fill=colors["plot_grid"])
+        self.raw_item = self.canvas.create_line(0, 0, 0, 0, fill=colors["plot_raw"])
+        self.filtered_item = self.canvas.create_line(0, 0, 0, 0, width=2)
+        self.cc_item = self.canvas.create_line(0, 0, 0, 0)
+        self._points = np.empty(0)
+        self.apply_colors(colors)
+
+    def _on_axis_changed(self, event=None):
+        self.axis = [axis.capitalize() for axis in AXES].index(self.axis_var.get())
+        self.apply_colors(self.colors)
+        self.redraw(force=True)
+
+    def _on_span_changed(self, event=None):
+        self.span = int(self.span_var.get().split()[0])
+        self.redraw(force=True)
+
+    def _on_configure(self, event):
+        self.width = event.width
+        self.height = event.height
+        self.redraw(force=True)
+
+    def apply_colors(self, colors):
+        """Recolor for a theme change (or another axis)"""
+        self.colors = colors
+        axis_color = colors[("axis_y", "axis_x", "axis_z")[self.axis]]
+        self.canvas.config(bg=colors["canvas_bg"])
+        self.canvas.itemconfig(self.separator, fill=colors["plot_grid"])
+        self.canvas.itemconfig(self.raw_item, fill=colors["plot_raw"])
+        self.canvas.itemconfig(self.filtered_item, fill=axis_color)
+        self.canvas.itemconfig(self.cc_item, fill=axis_color)
+
+    def set_cc_max(self, cc_max):
+        """Largest CC value, for the scale of the lower strip"""
+        self.cc_max = cc_max
+        self.redraw(force=True)
+
+    def redraw(self, force=False):
+        """Redraw if samples arrived since the last call (or always with force)"""
+        history = self.history
+        count = history.count
+        if count == self._drawn_count and not force:
+            return
+        self._drawn_count = count
+        width = self.width
+        plot_width = width - 2 * MARGIN
+        if plot_width < 2:
+            return
+
+        canvas = self.canvas
+        angles_bottom = MARGIN + (self.height - 2 * MARGIN - STRIP_GAP) * ANGLES_SHARE
+        cc_top = angles_bottom + STRIP_GAP
+        cc_bottom = self.height - MARGIN
+        separator_y = angles_bottom + STRIP_GAP / 2
+        canvas.coords(self.separator, MARGIN, separator_y, width - MARGIN, separator_y)
+
+        axis = self.axis
+        times, values = history.window(self.span, (RAW + axis, FILTERED + axis, CC + axis))
+        if len(times) < 2:
+            for item in (self.raw_item, self.filtered_item, self.cc_item):
+                canvas.coords(item, 0, 0, 0, 0)
+            self.range_label.config(text="")
+            return
+        start_time = times[-1] - self.span
+        columns, low, high = decimate(times, values, start_time, self.span, plot_width)
+
+        # Angle scale from what is visible, CC scale fixed
+        angle_min = low[:2].min()
+        angle_max = high[:2].max()
+        if angle_max - angle_min < 1.0:
+            middle = (angle_max + angle_min) / 2
+            angle_min, angle_max = middle - 0.5, middle + 0.5
+        self.range_label.config(text=f"{angle_min:.1f}° to {angle_max:.1f}°")
+
+        x = columns + MARGIN
+        self._set_trace(self.raw_item, x, low[0], high[0], angle_min, angle_max, MARGIN, angles_bottom)
+        self._set_trace(self.filtered_item, x, low[1], high[1], angle_min, angle_max, MARGIN, angles_bottom)
+        self._set_trace(self.cc_item, x, low[2], high[2], 0, self.cc_max, cc_top, cc_bottom)
+
+    def _set_trace(self, item, x, low, high, value_min, value_max, top, bottom):
+        """Point the polyline at a min/max envelope: per column, one point at each end"""
+        n = len(x)
+        if len(self._points) < 4 * n:
+            self._points = np.empty(4 * (self.width + 1))
+        points = self._points[:4 * n]
+        scale = (bottom - top) / (value_max - value_min)
+        points[0::4] = x
+        points[2::4] = x
+        # Screen Y points down
+        points[1::4] = bottom - (low - value_min) * scale
+        points[3::4] = bottom - (high - value_min) * scale
+        self.canvas.coords(item, points.tolist())
@@ -0,0 +1,252 @@
+"""Reconnecting serial and MIDI ports after they are unplugged
+
+A bumped USB cable used to end the session. ReconnectingSerialReader keeps
+reading through it instead: when the port fails it looks for the same
+device - by USB VID/PID/serial number, since the port name can change when
+it comes back - and reopens it with backoff. The ring buffer, filters and
+resampler behind it are never touched, so processing carries on warm once
+data flows again. MidiPortWatcher does the same for the MIDI output.
+"""
+import threading
+import time
+
+import serial
+import serial.tools.list_ports
+
+from serial_io import SerialFrameReader, PROTOCOL_AUTO, READ_TIMEOUT
+
+# Reconnect backoff (seconds)
+RECONNECT_DELAY = 0.1
+MAX_RECONNECT_DELAY = 2.0
+
+# How often the MIDI output ports are listed (seconds)
+MIDI_POLL_INTERVAL = 1.0
+
+
+class PortIdentity:
+    """USB identity of a serial device, stable across replugging"""
+
+    def __init__(self, vid, pid, serial_number=None):
+        self.vid = vid
+        self.pid = pid
+        self.serial_number = serial_number
+
+    def matches(self, info):
+        if info.vid != self.vid or info.pid != self.pid:
+            return False
+        return self.serial_number is None or info.serial_number == self.serial_number
+
+    def to_dict(self):
+        return {"vid": self.vid, "pid": self.pid, "serial_number": self.serial_number}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Identity from to_dict() values, None if data is missing or incomplete"""
+        if not isinstance(data, dict) or data.get("vid") is None or data.get("pid") is None:
+            return None
+        return cls(data["vid"], data["pid"], data.get("serial_number"))
+
+    def __str__(self):
+        text = f"{self.vid:04X}:{self.pid:04X}"
+        return f"{text} #{self.serial_number}" if self.serial_number else text
+
+
+def port_identity(port_name):
+    """PortIdentity of a USB serial port, None for other ports (pty, loop://, ...)"""
+    try:
+        for info in serial.tools.list_ports.comports():
+            if info.device == port_name and info.vid is not None:
+                return PortIdentity(info.vid, info.pid, info.serial_number)
+    except OSError:
+        pass
+    return None
+
+
+def find_port(identity, preferred=None):
+    """Current port name of the device, preferring the name it had before"""
+    if identity is None:
+        return None
+    try:
+        names = [info.device for info in serial.tools.list_ports.comports() if identity.matches(info)]
+    except OSError:
+        return None
+    if preferred in names:
+        return preferred
+    return names[0] if names else None
+
+
+def remember_port(config, port_name):
+    """Save a port and its device identity as the one to open next time"""
+    identity = port_identity(port_name)
+    config.update({"serial_port": port_name, "serial_device": identity.to_dict() if identity else None})
+
+
+class ReconnectingSerialReader(SerialFrameReader):
+    """SerialFrameReader that reopens its device when it goes away
+
+    error stays None through disconnects, so the pipeline just sees no
+    samples for a while; connected is False from the moment the port fails
+    until bytes arrive from the reopened one. The
+    outage (port lost to first bytes again) and the reconnect time (device
+    back to first bytes) of the last reconnect are kept in milliseconds.
+    """
+
+    def __init__(self, serial_conn, ring=None, protocol=PROTOCOL_AUTO, latency=None, identity=None,
+                 reconnect_delay=RECONNECT_DELAY, max_reconnect_delay=MAX_RECONNECT_DELAY):
+        super().__init__(serial_conn, ring=ring, protocol=protocol, latency=latency)
+        self.port = serial_conn.port
+        self.baudrate = serial_conn.baudrate
+        self.identity = identity if identity is not None else port_identity(self.port)
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.connected = True
+        self._original_conn = serial_conn  # closed by its owner
+
+        # Counters
+        self.disconnects = 0
+        self.reconnects = 0
+        self.last_outage_ms = None
+        self.last_reconnect_ms = None
+        self._lost_time = None
+        self._found_time = None
+
+    def stop(self):
+        super().stop()
+        if self.serial_conn is not None and self.serial_conn is not self._original_conn:
+            self.serial_conn.close()
+
+    def _read_loop(self):
+        delay = self.reconnect_delay
+        while self.running:
+            ser = self.serial_conn
+            if ser is None:
+                if self._reopen():
+                    delay = self.reconnect_delay
+                else:
+                    self._sleep(delay)
+                    delay = min(delay * 2, self.max_reconnect_delay)
+                continue
+
+            try:
+                chunk = self.read_chunk(ser)
+            except (serial.SerialException, OSError) as e:
+                self._lost(e)
+                continue
+            if chunk:
+                read_time = time.perf_counter()
+                if self._lost_time is not None:
+                    self.last_outage_ms = (read_time - self._lost_time) * 1000
+                    self.last_reconnect_ms = (read_time - self._found_time) * 1000
+                    self._lost_time = None
+                    self.connected = True
+                    print(f"Serial port {self.port} back after {self.last_outage_ms / 1000:.1f} s "
+                          f"(reconnected in {self.last_reconnect_ms:.0f} ms)")
+                self.feed(chunk, read_time)
+
+    def _lost(self, error):
+        print(f"Serial port {self.port} lost: {error} - waiting for it to come back")
+        try:
+            self.serial_conn.close()
+        except (serial.SerialException, OSError):
+            pass
+        self.serial_conn = None
+        self.connected = False
+        self.disconnects += 1
+        self._lost_time = time.perf_counter()
+        # A frame cut off by the disconnect can't be completed
+        self._buffer.clear()
+        self._last_sequence = None
+
+    def _reopen(self):
+        """Open the device again if it is back, returns True once it is"""
+        port = find_port(self.identity, self.port) if self.identity is not None else self.port
+        if port is None:
+            return False
+        found_time = time.perf_counter()
+        try:
+            ser = serial.Serial(port=port, baudrate=self.baudrate, timeout=READ_TIMEOUT)
+        except (serial.SerialException, OSError):
+            return False  # not ready yet, or still gone
+        self.port = port
+        self.serial_conn = ser
+        self.reconnects += 1
+        self._found_time = found_time
+        return True
+
+    def _sleep(self, delay):
+        # In short steps, so stop() does not wait for the whole backoff
+        deadline = time.perf_counter() + delay
+        while self.running and time.perf_counter() < deadline:
+            time.sleep(min(READ_TIMEOUT, delay))
+
+    def stats(self):
+        stats = super().stats()
+        stats.update(connected=self.connected, disconnects=self.disconnects, reconnects=self.reconnects,
+                     last_outage_ms=self.last_outage_ms, last_reconnect_ms=self.last_reconnect_ms)
+        return stats
+
+
+class MidiPortWatcher:
+    """Background thread reopening the MIDI output when its port comes back
+
+    Lists the ports every MIDI_POLL_INTERVAL on its own rtmidi handle. When
+    the port reappears, reopen(port_name) is called from the watcher thread
+    (MIDIController.reopen_port, for one); it should open the port and leave
+    switching over to the thread that sends.
+    """
+
+    def __init__(self, port_name, reopen, interval=MIDI_POLL_INTERVAL):
+        self.port_name = port_name
+        self.reopen = reopen
+        self.interval = interval
+        self.connected = True
+        self.running = False
+        self.thread = None
+        self._stop_event = threading.Event()
+
+        # Counters
+        self.disconnects = 0
+        self.reconnects = 0
+        self.last_outage_ms = None
+        self._lost_time = None
+
+    def start(self):
+        if self.port_name is None:
+            return  # a virtual port can't go away
+        self.running = True
+        self._stop_event.clear()
+        self.thread = threading.Thread(target=self._watch, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self._stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=1.0)
+            self.thread = None
+
+    def _watch(self):
+        import rtmidi
+        probe = rtmidi.MidiOut()
+        name = self.port_name
+        while not self._stop_event.wait(self.interval):
+            present = name in probe.get_ports()
+            if self.connected and not present:
+                print(f"MIDI port {name} lost - waiting for it to come back")
+                self.connected = False
+                self.disconnects += 1
+                self._lost_time = time.perf_counter()
+            elif not self.connected and present:
+                try:
+                    self.reopen(name)
+                except Exception as e:  # rtmidi's error types differ between versions
+                    print(f"Could not reopen MIDI port {name}: {e}")
+                    continue  # try again at the next poll
+                self.connected = True
+                self.reconnects += 1
+                self.last_outage_ms = (time.perf_counter() - self._lost_time) * 1000
+                print(f"MIDI port {name} reopened after {self.last_outage_ms / 1000:.1f} s")
+
+    def stats(self):
+        return {"midi_connected": self.connected, "midi_disconnects": self.disconnects,
+                "midi_reconnects": self.reconnects, "midi_last_outage_ms": self.last_outage_ms}
@@ -0,0 +1,99 @@
+import csv
+import json
+import time
+
+# Pipeline stages, in order. Each is measured from the moment the sample's
+# bytes were read from the serial port.
+STAGES = ("parse", "filter", "map", "send", "paint")
+
+# Latencies kept per stage for the rolling percentiles
+DEFAULT_WINDOW = 4096
+
+
+class RollingHistogram:
+    """Last N latency values in a preallocated ring, percentiles on demand"""
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.window = window
+        self._values = [0.0] * window
+        self._index = 0
+        self.count = 0  # total values recorded
+        self.max = 0.0
+
+    def add(self, value):
+        self._values[self._index] = value
+        self._index = (self._index + 1) % self.window
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+    def values(self):
+        """Values currently in the window, oldest first"""
+        if self.count < self.window:
+            return self._values[:self.count]
+        return self._values[self._index:] + self._values[:self._index]
+
+    def summary(self):
+        values = sorted(self.values())
+        if not values:
+            return {"count": 0}
+        n = len(values)
+
+        def percentile(p):
+            return values[min(n - 1, int(p * n))]
+
+        return {"count": self.count, "mean": sum(values) / n, "p50": percentile(0.50),
+                "p95": percentile(0.95), "p99": percentile(0.99), "max": self.max}
+
+
+class LatencyTracker:
+    """Per-stage latency histograms from serial read to MIDI send and GUI paint
+
+    Callers only hold a tracker when instrumentation is enabled and test for
+    None otherwise, so a disabled tracker costs one comparison per stage.
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.histograms = {stage: RollingHistogram(window) for stage in STAGES}
+
+    def record(self, stage, read_time, now=None):
+        """Record how long after read_time the sample finished a stage (seconds)"""
+        if now is None:
+            now = time.perf_counter()
+        self.histograms[stage].add(now - read_time)
+
+    def summary(self):
+        """Per-stage statistics in milliseconds"""
+        result = {}
+        for stage, histogram in self.histograms.items():
+            stats = histogram.summary()
+            result[stage] = {key: (value * 1000 if key != "count" else value)
+                             for key, value in stats.items()}
+        return result
+
+    def format_report(self):
+        """Text table of the per-stage percentiles"""
+        lines = [f"{'Stage':<8}{'count':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}  (ms)"]
+        for stage, stats in self.summary().items():
+            if not stats["count"]:
+                lines.append(f"{stage:<8}{0:>8}")
+                continue
+            lines.append(f"{stage:<8}{stats['count']:>8}{stats['p50']:>9.2f}{stats['p95']:>9.2f}"
+                         f"{stats['p99']:>9.2f}{stats['max']:>9.2f}")
+        return "\n".join(lines)
+
+    def export(self, path):
+        """Write the summary and raw window values to a .json or .csv file"""
+        path = str(path)
+        if path.lower().endswith(".json"):
+            data = {stage: dict(stats, samples_ms=[v * 1000 for v in self.histograms[stage].values()])
+                    for stage, stats in self.summary().items()}
+            with open(path, "w") as f:
+                json.dump(data, f, indent=2)
+        else:
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["stage", "latency_ms"])
+                for stage, histogram in self.histograms.items():
+                    for value in histogram.values():
+                        writer.writerow([stage, f"{value * 1000:.4f}"])
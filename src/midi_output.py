@@ -0,0 +1,163 @@
+import time
+
+# Default per-controller rate limit (messages per second, 0 = unlimited)
+DEFAULT_MAX_CC_RATE = 100
+
+# Output modes
+MODE_7BIT = "7bit"    # one CC message, values 0-127
+MODE_14BIT = "14bit"  # MSB on CC n, LSB on CC n+32, values 0-16383
+MODE_NRPN = "nrpn"    # NRPN parameter n with data entry MSB/LSB, values 0-16383
+OUTPUT_MODES = (MODE_7BIT, MODE_14BIT, MODE_NRPN)
+
+# Controller numbers used for NRPN
+NRPN_PARAM_MSB = 99
+NRPN_PARAM_LSB = 98
+DATA_ENTRY_MSB = 6
+DATA_ENTRY_LSB = 38
+
+
+def max_value_for_mode(mode):
+    """Largest controller value for an output mode"""
+    return 127 if mode == MODE_7BIT else 16383
+
+
+def check_14bit_ccs(ccs, mode):
+    """Raise ValueError if mode is 14-bit and one of ccs has no LSB controller"""
+    if mode == MODE_14BIT:
+        # The LSB controller is CC n+32, so only CC 0-31 can be paired
+        for cc_number in ccs:
+            if cc_number > 31:
+                raise ValueError(f"CC {cc_number} has no 14-bit LSB pair (CC 0-31 only)")
+
+
+class CCOutputStage:
+    """Change-only, rate-limited control change output
+
+    Remembers the last value sent on each (channel, CC) and drops repeats.
+    When a controller changes faster than max_rate, values inside the window
+    are coalesced and only the newest one is sent once the window has passed,
+    either by the next send() for that controller or by flush().
+    In the high resolution modes the MSB is only resent when it changes, so a
+    small move costs a single LSB message.
+    """
+
+    def __init__(self, midi_out, max_rate=DEFAULT_MAX_CC_RATE, mode=MODE_7BIT):
+        self.midi_out = midi_out
+        self.set_max_rate(max_rate)
+        self.set_mode(mode)
+
+        self.last_value = {}  # (channel, cc) -> last value sent
+        self.last_time = {}   # (channel, cc) -> time of last send
+        self.pending = {}     # (channel, cc) -> newest value waiting for its window
+        self.nrpn_selected = {}  # channel -> NRPN parameter currently selected
+
+        # Counters
+        self.sent = 0
+        self.duplicates = 0
+        self.coalesced = 0
+
+    def set_max_rate(self, max_rate):
+        """Change the per-controller limit (messages per second, 0/None = unlimited)"""
+        self.max_rate = max_rate or 0
+        self.min_interval = 1.0 / max_rate if max_rate else 0.0
+
+    def set_mode(self, mode):
+        """Switch between 7-bit CC, 14-bit CC pairs and NRPN output"""
+        if mode not in OUTPUT_MODES:
+            raise ValueError(f"Unknown MIDI output mode: {mode}")
+        self.mode = mode
+        self.max_value = max_value_for_mode(mode)
+        if hasattr(self, "last_value"):
+            # Stored values are in the old resolution
+            self.reset()
+
+    @property
+    def suppressed(self):
+        return self.duplicates + self.coalesced
+
+    def send(self, channel, cc_number, value, now=None):
+        """Queue a CC value, returns True if a message went out immediately"""
+        key = (channel, cc_number)
+        if now is None:
+            now = time.perf_counter()
+
+        if self.last_value.get(key) == value:
+            # Device already has this value - anything pending is now stale
+            if self.pending.pop(key, None) is not None:
+                self.coalesced += 1
+            self.duplicates += 1
+            return False
+
+        last_time = self.last_time.get(key)
+        if last_time is not None and now - last_time < self.min_interval:
+            # Inside the rate window: keep only the newest value
+            if key in self.pending:
+                self.coalesced += 1
+            self.pending[key] = value
+            return False
+
+        if self.pending.pop(key, None) is not None:
+            self.coalesced += 1
+        self._emit(key, value, now)
+        return True
+
+    def flush(self, now=None, force=False):
+        """Send pending values whose rate window has elapsed (all of them if force)"""
+        if not self.pending:
+            return
+        if now is None:
+            now = time.perf_counter()
+        for key, value in list(self.pending.items()):
+            if force or now - self.last_time[key] >= self.min_interval:
+                del self.pending[key]
+                self._emit(key, value, now)
+
+    def reset(self):
+        """Forget what was sent, e.g. after reopening the port"""
+        self.last_value.clear()
+        self.last_time.clear()
+        self.pending.clear()
+        self.nrpn_selected.clear()
+
+    def stats(self):
+        return {"sent": self.sent, "suppressed": self.suppressed,
+                "duplicates": self.duplicates, "coalesced": self.coalesced}
+
+    def _emit(self, key, value, now):
+        channel, cc_number = key
+        status = 0xB0 | channel
+        send_message = self.midi_out.send_message
+
+        if self.mode == MODE_7BIT:
+            send_message([status, cc_number, value])
+            sent = 1
+        else:
+            msb = value >> 7
+            lsb = value & 0x7F
+            last = self.last_value.get(key)
+            msb_changed = last is None or last >> 7 != msb
+            sent = 0
+
+            if self.mode == MODE_14BIT:
+                controller_msb, controller_lsb = cc_number, cc_number + 32
+            else:
+                controller_msb, controller_lsb = DATA_ENTRY_MSB, DATA_ENTRY_LSB
+                # Select the parameter only when another one was used last
+                if self.nrpn_selected.get(channel) != cc_number:
+                    send_message([status, NRPN_PARAM_MSB, cc_number >> 7])
+                    send_message([status, NRPN_PARAM_LSB, cc_number & 0x7F])
+                    self.nrpn_selected[channel] = cc_number
+                    msb_changed = True
+                    sent += 2
+
+            # Receivers clear the LSB when a new MSB arrives, so the LSB
+            # always follows; it goes out alone when only the LSB changed
+            if msb_changed:
+                send_message([status, controller_msb, msb])
+                sent += 1
+            send_message([status, controller_lsb, lsb])
+            sent += 1
+
+        self.last_value[key] = value
+        self.last_time[key] = now
+        self.sent += sent
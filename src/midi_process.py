@@ -0,0 +1,437 @@
+"""Acquisition, filtering and MIDI output in a separate process
+
+The GUI shares the GIL with any thread it starts, so window drags, modal
+dialogs and redraws can hold up MIDI output. MidiCoreProcess runs the whole
+pipeline in a child process instead. The child publishes its latest state
+through a shared memory block guarded by a seqlock, and the GUI reads it
+without ever blocking the child.
+"""
+import multiprocessing
+import queue
+import struct
+import threading
+import time
+from multiprocessing import shared_memory
+
+# Shared state: seqlock counter, then
+#   pitch, roll, yaw, midi_pitch, midi_roll, midi_yaw, read_time,
+#   frames, overflows, underflows, resampled samples, resampler ticks,
+#   samples in the last tick, MIDI messages sent,
+#   pitch, roll, yaw before filtering
+SEQ_FORMAT = struct.Struct('<Q')
+STATE_FORMAT = struct.Struct('<dddiiidQQQQQQQddd')
+STATE_OFFSET = SEQ_FORMAT.size
+STATE_SIZE = STATE_OFFSET + STATE_FORMAT.size
+
+# How often the child checks for commands and the stop request (seconds)
+COMMAND_INTERVAL = 0.05
+
+# How often the child reports its latency percentiles (seconds)
+LATENCY_REPORT_INTERVAL = 1.0
+
+# Grace period for the child to shut down before it is terminated (seconds)
+STOP_TIMEOUT = 2.0
+
+
+class SharedState:
+    """Single-writer seqlock over a shared memory block
+
+    The writer makes the counter odd, writes, then makes it even again. A
+    reader retries until it sees the same even counter before and after
+    copying, so it never returns a half-written state and never makes the
+    writer wait.
+    """
+
+    def __init__(self, name=None):
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=STATE_SIZE)
+            self.owner = True
+            SEQ_FORMAT.pack_into(self.shm.buf, 0, 0)
+        else:
+            # Spawned children share the parent's resource tracker, so the
+            # block stays registered once and is unlinked by the owner only
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        self.name = self.shm.name
+        self._seq = SEQ_FORMAT.unpack_from(self.shm.buf, 0)[0]
+
+    def publish(self, *values):
+        """Write a new state (writer side)"""
+        buf = self.shm.buf
+        seq = self._seq + 1
+        SEQ_FORMAT.pack_into(buf, 0, seq)
+        STATE_FORMAT.pack_into(buf, STATE_OFFSET, *values)
+        seq += 1
+        SEQ_FORMAT.pack_into(buf, 0, seq)
+        self._seq = seq
+
+    def read(self, retries=100):
+        """Return (version, *values) of the latest state, or None if never written"""
+        buf = self.shm.buf
+        for _ in range(retries):
+            before = SEQ_FORMAT.unpack_from(buf, 0)[0]
+            if before & 1:
+                continue  # write in progress
+            values = STATE_FORMAT.unpack_from(buf, STATE_OFFSET)
+            if SEQ_FORMAT.unpack_from(buf, 0)[0] == before:
+                if before == 0:
+                    return None
+                return (before >> 1,) + values
+        return None
+
+    def close(self):
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def open_midi_port(port_name=None):
+    """Open the named MIDI output, the first one, or a virtual port if there are none"""
+    import rtmidi
+
+    midi_out = rtmidi.MidiOut()
+    ports = midi_out.get_ports()
+    if port_name in ports:
+        midi_out.open_port(ports.index(port_name))
+    elif ports:
+        midi_out.open_port(0)
+    else:
+        midi_out.open_virtual_port("6DOF Controller")
+    return midi_out
+
+
+def opened_port_name(midi_out, port_name=None):
+    """Name of the port open_midi_port(port_name) opened, None for the virtual port"""
+    ports = midi_out.get_ports()
+    if port_name in ports:
+        return port_name
+    return ports[0] if ports else None
+
+
+def _open_source(config, latency):
+    """Create the configured source in the child"""
+    if config.get("replay_path"):
+        from session_recorder import ReplaySource
+        return ReplaySource(config["replay_path"], speed=config.get("replay_speed", 1.0))
+    if config.get("websocket_url"):
+        from websocket_source import WebSocketSource
+        return WebSocketSource(config["websocket_url"], latency=latency)
+
+    import serial
+    from hotplug import ReconnectingSerialReader
+    ser = serial.Serial(port=config["port"], baudrate=config["baudrate"], timeout=1)
+    ser.reset_input_buffer()
+    return ReconnectingSerialReader(ser, protocol=config["serial_protocol"], latency=latency)
+
+
+def profile_data(profile):
+    """A MappingProfile as plain values for the core process"""
+    return dict(profile.to_dict(), name=profile.name)
+
+
+class MappingCache:
+    """Mapping tables per profile and resolution, built on a helper thread
+    
+    Building a profile's tables takes tens of milliseconds, too long to do
+    between two samples. Requests are built in the background and the
+    pipeline loop picks finished ones up with ready().
+    """
+    
+    def __init__(self):
+        self._mappings = {}
+        self._requests = queue.Queue()
+        self._ready = queue.Queue()
+        self._thread = threading.Thread(target=self._build_loop, daemon=True)
+        self._thread.start()
+    
+    def get(self, data, max_value):
+        """Mapping for profile_data() values, built right here if it isn't cached"""
+        from profiles import MappingProfile, Mapping
+        profile = MappingProfile.from_dict(data.get("name", "profile"), data)
+        key = (profile.key(), max_value)
+        mapping = self._mappings.get(key)
+        if mapping is None:
+            mapping = self._mappings[key] = Mapping(profile, max_value)
+        return mapping
+    
+    def request(self, data, max_value, notify=True):
+        """Build in the background; with notify the result is handed back by ready()"""
+        self._requests.put((data, max_value, notify))
+    
+    def ready(self):
+        """A requested (mapping, error) pair, or None if none has finished"""
+        try:
+            return self._ready.get_nowait()
+        except queue.Empty:
+            return None
+    
+    def _build_loop(self):
+        while True:
+            data, max_value, notify = self._requests.get()
+            try:
+                result = (self.get(data, max_value), None)
+            except ValueError as e:
+                result = (None, e)
+            if notify:
+                self._ready.put(result)
+
+
+def _mapping_stages(mapping, output):
+    """Mapper and sink pipeline stages for a profiles.Mapping, sending to output"""
+    from pipeline import AxisMapper, CCSink
+    return (AxisMapper(mapping.pitch, mapping.roll, mapping.yaw),
+            CCSink(output, mapping.channel, mapping.pitch_cc, mapping.roll_cc, mapping.yaw_cc,
+                   mapping.motion))
+
+
+def core_main(state_name, config, stop_event, commands, messages):
+    """Child process: run the pipeline until stop_event is set"""
+    from filters import FilterBank, Resampler
+    from hotplug import MidiPortWatcher
+    from latency import LatencyTracker
+    from midi_output import CCOutputStage, check_14bit_ccs
+    from midi_scheduler import OutputScheduler, DEFAULT_TICK_RATE, DEFAULT_CLOCK_DIVISION
+    from motion import MotionTracker
+    from osc_output import OSCSink, DEFAULT_OSC_PREFIX
+    from pipeline import Pipeline
+    from profiles import MappingProfile
+    from session_recorder import SessionRecorder, ReplayFinished
+
+    state = SharedState(state_name)
+    latency = LatencyTracker() if config.get("latency") else None
+    source = None
+    recorder = None
+    midi_out = None
+    output = None
+    scheduler = None
+    osc = None
+    midi_watcher = None
+    reopened = []  # MIDI handles opened by the watcher, switched to by the loop
+    try:
+        midi_out = open_midi_port(config.get("midi_port"))
+        output = CCOutputStage(midi_out, max_rate=config["max_cc_rate"], mode=config["output_mode"])
+        # The sinks send to the output stage, or to a scheduler feeding it on a fixed tick
+        sender = output
+        if config.get("tick_rate") or config.get("clock_port"):
+            scheduler = sender = OutputScheduler(output, config.get("tick_rate") or DEFAULT_TICK_RATE,
+                                                 config.get("clock_port"),
+                                                 config.get("clock_division", DEFAULT_CLOCK_DIVISION))
+            scheduler.start()
+        if config.get("osc_target"):
+            osc = OSCSink(*config["osc_target"], prefix=config.get("osc_prefix", DEFAULT_OSC_PREFIX))
+        source = _open_source(config, latency)
+        if config.get("record_path"):
+            recorder = SessionRecorder(config["record_path"])
+        resampler = Resampler(config["output_rate"], config["resample_mode"])
+
+        raw = [0.0, 0.0, 0.0]  # newest sample before filtering
+
+        def keep_raw(yaw, pitch, roll, read_time):
+            raw[:] = pitch, roll, yaw
+
+        def publish(pitch, roll, yaw, midi_pitch, midi_roll, midi_yaw, read_time):
+            ring = source.ring
+            state.publish(pitch, roll, yaw, midi_pitch, midi_roll, midi_yaw, read_time,
+                          source.frames, ring.overflows, ring.underflows, resampler.samples,
+                          resampler.ticks, resampler.last_count, output.sent, *raw)
+
+        mappings = MappingCache()
+        profile = config.get("profile") or profile_data(MappingProfile())
+        mapper, sink = _mapping_stages(mappings.get(profile, output.max_value), sender)
+        pipeline = Pipeline(source, mapper, sink,
+                            filters=FilterBank(config["filter_specs"]), resampler=resampler,
+                            recorder=recorder, latency=latency, on_output=publish,
+                            motion=MotionTracker(), on_input=keep_raw, osc=osc)
+        messages.put(("started", None))
+        for data in config.get("profiles", ()):
+            mappings.request(data, output.max_value, notify=False)
+
+        def reopen_midi_port(name):
+            reopened.append(open_midi_port(name))
+        
+        def use_port(new_out):
+            # The synth lost whatever it had - send every controller again
+            if scheduler is not None:
+                scheduler.switch_port(new_out)
+            else:
+                output.midi_out = new_out
+                output.reset()
+        
+        midi_watcher = MidiPortWatcher(opened_port_name(midi_out, config.get("midi_port")), reopen_midi_port)
+        
+        source.start()
+        midi_watcher.start()
+        pipeline.reset()
+        ring = source.ring
+        serial_connected = getattr(source, "connected", True)
+        next_command_check = 0.0
+        next_latency_report = time.perf_counter() + LATENCY_REPORT_INTERVAL
+        while True:
+            ring.wait(min(pipeline.time_until_tick(), COMMAND_INTERVAL))
+            pipeline.service()
+
+            now = time.perf_counter()
+            if now < next_command_check:
+                continue
+            next_command_check = now + COMMAND_INTERVAL
+            if stop_event.is_set():
+                break
+            if reopened:
+                # The MIDI port came back
+                midi_out.close_port()
+                midi_out = reopened.pop()
+                use_port(midi_out)
+            if getattr(source, "connected", True) != serial_connected:
+                serial_connected = not serial_connected
+                messages.put(("serial", source.stats()))
+            while True:
+                try:
+                    command, value = commands.get_nowait()
+                except queue.Empty:
+                    break
+                if command == "output_mode":
+                    current = MappingProfile.from_dict(profile.get("name", "profile"), profile)
+                    try:
+                        check_14bit_ccs(current.ccs + current.motion_ccs, value)
+                    except ValueError as e:
+                        messages.put(("output_mode", (output.mode, str(e))))
+                        continue
+                    sender.set_mode(value)
+                    pipeline.mapper, pipeline.sink = _mapping_stages(
+                        mappings.get(profile, output.max_value), sender)
+                elif command == "profile":
+                    profile = value
+                    mappings.request(value, output.max_value)
+                elif command == "preload":
+                    for data in value:
+                        mappings.request(data, output.max_value, notify=False)
+                elif command == "midi_port":
+                    if scheduler is None:
+                        output.flush(force=True)
+                    midi_out.close_port()
+                    midi_out = open_midi_port(value)
+                    use_port(midi_out)
+                    midi_watcher.stop()
+                    midi_watcher = MidiPortWatcher(opened_port_name(midi_out, value), reopen_midi_port)
+                    midi_watcher.start()
+            # Swap a requested profile in between two samples
+            built = mappings.ready()
+            while built is not None:
+                mapping, error = built
+                if error is not None:
+                    messages.put(("error", str(error)))
+                elif mapping.max_value == output.max_value:
+                    pipeline.mapper, pipeline.sink = _mapping_stages(mapping, sender)
+                built = mappings.ready()
+            if latency is not None and now >= next_latency_report:
+                next_latency_report = now + LATENCY_REPORT_INTERVAL
+                messages.put(("latency", latency.summary()))
+
+    except ReplayFinished as e:
+        messages.put(("finished", str(e)))
+    except Exception as e:
+        messages.put(("error", str(e)))
+    finally:
+        if midi_watcher is not None:
+            midi_watcher.stop()
+        if source is not None:
+            source.stop()
+            serial_conn = getattr(source, "serial_conn", None)
+            if serial_conn is not None:
+                serial_conn.close()
+        if recorder is not None:
+            recorder.close()
+            messages.put(("recorded", (recorder.count, recorder.path)))
+        if scheduler is not None:
+            scheduler.stop()
+            messages.put(("scheduler", scheduler.format_report()))
+        if osc is not None:
+            osc.close()
+            messages.put(("osc", osc.format_report()))
+        if output is not None:
+            output.flush(force=True)
+        if midi_out is not None:
+            midi_out.close_port()
+        if latency is not None:
+            messages.put(("latency", latency.summary()))
+            if config.get("latency_export"):
+                try:
+                    latency.export(config["latency_export"])
+                except IOError as e:
+                    messages.put(("error", f"Could not export latency data: {e}"))
+        state.close()
+
+
+class MidiCoreProcess:
+    """Parent side handle of the core process
+
+    config holds plain values only (port, baudrate, serial_protocol,
+    filter_specs, output_rate, resample_mode, max_cc_rate, output_mode,
+    midi_port, profile and profiles (profile_data() values), tick_rate,
+    clock_port, osc_target, latency, ...), so it can be sent to a spawned process.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        # spawn, so the child starts clean instead of forking a Tk process
+        self._context = multiprocessing.get_context("spawn")
+        self.state = SharedState()
+        self._stop_event = self._context.Event()
+        self._commands = self._context.Queue()
+        self._messages = self._context.Queue()
+        self.process = None
+
+    def start(self):
+        self.process = self._context.Process(
+            target=core_main, name="6dof-midi-core", daemon=True,
+            args=(self.state.name, self.config, self._stop_event, self._commands, self._messages))
+        self.process.start()
+
+    def read(self):
+        """Latest (version, pitch, roll, yaw, midi_pitch, midi_roll, midi_yaw, read_time, counters...)"""
+        return self.state.read()
+
+    def set_output_mode(self, mode):
+        self._commands.put(("output_mode", mode))
+
+    def set_profile(self, profile):
+        """Switch to a profiles.MappingProfile without restarting"""
+        self._commands.put(("profile", profile_data(profile)))
+    
+    def preload_profiles(self, profiles):
+        """Have the child build the tables for profiles before they are selected"""
+        self._commands.put(("preload", [profile_data(profile) for profile in profiles]))
+    
+    def set_midi_port(self, port_name):
+        self._commands.put(("midi_port", port_name))
+
+    def poll(self):
+        """Messages from the child since the last call, as (kind, value) pairs"""
+        result = []
+        while True:
+            try:
+                result.append(self._messages.get_nowait())
+            except queue.Empty:
+                return result
+
+    @property
+    def alive(self):
+        return self.process is not None and self.process.is_alive()
+
+    def stop(self, timeout=STOP_TIMEOUT):
+        """Ask the child to finish, terminating it if it does not; returns its last messages"""
+        messages = []
+        if self.process is not None:
+            self._stop_event.set()
+            deadline = time.monotonic() + timeout
+            # Drain while waiting - a child blocked on a full queue would never exit
+            while self.process.is_alive() and time.monotonic() < deadline:
+                messages += self.poll()
+                self.process.join(timeout=0.05)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join(timeout=1.0)
+            messages += self.poll()
+            self.process = None
+        self.state.close()
+        return messages
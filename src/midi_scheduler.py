@@ -0,0 +1,276 @@
+"""Clock-driven MIDI output
+
+Without a scheduler a controller value goes out the moment its sample is
+processed, so the spacing of MIDI messages inherits USB, serial and thread
+scheduling jitter. OutputScheduler decouples the two: sinks only store the
+newest value per controller, and a thread of its own hands them to the
+output stage on a fixed tick and writes all of that tick's messages to the
+port back to back. It can follow incoming MIDI clock instead of its own
+timer, and measures how late each tick went out.
+"""
+import threading
+import time
+
+from latency import RollingHistogram
+
+# Default output tick rate (Hz)
+DEFAULT_TICK_RATE = 200.0
+
+# The last stretch before a tick is waited out by spinning, as sleep() can
+# overshoot by tens of microseconds (up to a millisecond on some systems)
+SPIN_TIME = 0.0002
+
+# MIDI real-time messages
+MIDI_CLOCK = 0xF8  # 24 per quarter note
+CLOCK_PPQN = 24
+
+# Output ticks per MIDI clock pulse - 4 gives 192 Hz at 120 BPM
+DEFAULT_CLOCK_DIVISION = 4
+
+# Without clock pulses for this long the scheduler falls back to its own timer (seconds)
+CLOCK_TIMEOUT = 0.5
+
+# Weight of each new pulse interval in the clock period estimate
+CLOCK_SMOOTHING = 0.1
+
+
+class MessageBatch:
+    """midi_out stand-in that holds messages until send() writes them to the port"""
+
+    def __init__(self, port):
+        self.port = port
+        self.messages = []
+
+    def send_message(self, message):
+        self.messages.append(message)
+
+    def send(self):
+        """Write the held messages in one go, returns how many there were"""
+        messages = self.messages
+        send_message = self.port.send_message
+        for message in messages:
+            send_message(message)
+        count = len(messages)
+        messages.clear()
+        return count
+
+
+class OutputScheduler:
+    """Sends the newest controller values on a fixed tick from its own thread
+
+    Takes the place of the output stage for the sinks: send() has the same
+    signature as midi_output.CCOutputStage.send but only stores the value,
+    flush() is left to the ticks. While running, the output stage belongs
+    to the scheduler thread - change its port with switch_port() and its
+    mode with set_mode().
+
+    With clock_port the ticks follow MIDI clock from that input: one on each
+    pulse and clock_division - 1 spread evenly up to the next one. When the
+    clock stops for CLOCK_TIMEOUT the scheduler carries on at rate.
+
+    jitter holds how late each tick's batch went out, in seconds.
+    """
+
+    def __init__(self, output, rate=DEFAULT_TICK_RATE, clock_port=None,
+                 clock_division=DEFAULT_CLOCK_DIVISION):
+        if rate <= 0:
+            raise ValueError("Tick rate must be positive")
+        if clock_division < 1:
+            raise ValueError("Clock division must be at least 1")
+        self.output = output
+        self.rate = rate
+        self.interval = 1.0 / rate
+        self.clock_port = clock_port
+        self.clock_division = clock_division
+        self.batch = MessageBatch(output.midi_out)
+        self.lock = threading.Lock()  # held while the output stage and port are in use
+        self.running = False
+        self.thread = None
+        self._values = {}  # (channel, cc) -> newest value, written by the sinks
+        self._values_lock = threading.Lock()
+
+        # MIDI clock input
+        self.midi_in = None
+        self.locked = False  # ticks currently follow the clock
+        self.clock_period = None  # smoothed pulse interval (seconds)
+        self._pulse_time = None
+        self._pulse = threading.Event()
+
+        # Counters
+        self.ticks = 0
+        self.missed = 0  # timer ticks skipped after falling behind
+        self.pulses = 0
+        self.jitter = RollingHistogram()
+
+    @property
+    def mode(self):
+        return self.output.mode
+
+    @property
+    def max_value(self):
+        return self.output.max_value
+
+    def start(self):
+        if self.clock_port is not None:
+            self._open_clock(self.clock_port)
+        self.output.midi_out = self.batch
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop ticking, send whatever is still held and give the port back to the output stage"""
+        self.running = False
+        self._pulse.set()
+        if self.thread:
+            self.thread.join(timeout=1.0)
+            self.thread = None
+        if self.midi_in is not None:
+            self.midi_in.close_port()
+            self.midi_in = None
+        with self.lock:
+            self._send_values(time.perf_counter())
+            self.output.flush(force=True)
+            self.batch.send()
+            self.output.midi_out = self.batch.port
+
+    def _open_clock(self, port_name):
+        import rtmidi
+        midi_in = rtmidi.MidiIn()
+        ports = midi_in.get_ports()
+        if port_name not in ports:
+            raise ValueError(f"MIDI clock input '{port_name}' not found "
+                             f"(available: {', '.join(ports) or 'none'})")
+        midi_in.open_port(ports.index(port_name))
+        midi_in.ignore_types(timing=False)
+        midi_in.set_callback(self._on_midi_in)
+        self.midi_in = midi_in
+
+    def _on_midi_in(self, event, data=None):
+        # rtmidi's input thread
+        message, _ = event
+        if not message or message[0] != MIDI_CLOCK:
+            return
+        now = time.perf_counter()
+        last = self._pulse_time
+        if last is not None and now - last < CLOCK_TIMEOUT:
+            period = now - last
+            if self.clock_period is None:
+                self.clock_period = period
+            else:
+                self.clock_period += CLOCK_SMOOTHING * (period - self.clock_period)
+        self._pulse_time = now
+        self.pulses += 1
+        self._pulse.set()
+
+    # Sink side
+
+    def send(self, channel, cc_number, value, now=None):
+        """Store a value for the next tick"""
+        with self._values_lock:
+            self._values[(channel, cc_number)] = value
+        return False
+
+    def flush(self, now=None, force=False):
+        pass  # every tick flushes
+
+    def switch_port(self, midi_out):
+        """Send to another port from the next tick on, with every controller sent again"""
+        with self.lock:
+            self.batch.port = midi_out
+            self.output.reset()
+
+    def set_mode(self, mode):
+        with self.lock:
+            self.output.set_mode(mode)
+            with self._values_lock:
+                self._values.clear()  # in the old resolution
+
+    # Scheduler thread
+
+    def _run(self):
+        clock = self.midi_in is not None
+        division = self.clock_division
+        next_tick = time.perf_counter() + self.interval
+        sub_ticks = 0  # ticks left before the next clock pulse
+        while self.running:
+            if clock:
+                waiting_for_pulse = self.locked and sub_ticks == 0
+                deadline = self._pulse_time + CLOCK_TIMEOUT if waiting_for_pulse else next_tick
+                if self._pulse.wait(max(0.0, deadline - time.perf_counter() - SPIN_TIME)):
+                    self._pulse.clear()
+                    if not self.running:
+                        break
+                    pulse_time = self._pulse_time
+                    self.locked = True
+                    self.tick(pulse_time)
+                    period = self.clock_period
+                    sub_ticks = division - 1 if period is not None else 0
+                    if sub_ticks:
+                        next_tick = pulse_time + period / division
+                    continue
+                if waiting_for_pulse:
+                    if time.perf_counter() >= deadline:
+                        # Clock stopped - back to the timer
+                        self.locked = False
+                        next_tick = time.perf_counter()
+                    continue
+            else:
+                delay = next_tick - time.perf_counter() - SPIN_TIME
+                if delay > 0:
+                    time.sleep(delay)
+
+            while time.perf_counter() < next_tick:
+                pass
+            self.tick(next_tick)
+
+            if self.locked:
+                sub_ticks -= 1
+                next_tick += self.clock_period / division
+                continue
+            next_tick += self.interval
+            now = time.perf_counter()
+            if next_tick <= now:
+                # Fell behind - keep the clock steady rather than catching up
+                self.missed += int((now - next_tick) / self.interval) + 1
+                next_tick = now + self.interval
+
+    def tick(self, scheduled):
+        """Send the values stored since the last tick, scheduled being when it was due"""
+        with self.lock:
+            self._send_values(time.perf_counter())
+            self.output.flush()
+            sent_time = time.perf_counter()
+            self.batch.send()
+        self.jitter.add(sent_time - scheduled)
+        self.ticks += 1
+
+    def _send_values(self, now):
+        with self._values_lock:
+            values, self._values = self._values, {}
+        send = self.output.send
+        for (channel, cc_number), value in values.items():
+            send(channel, cc_number, value, now)
+
+    def stats(self):
+        """Tick counters, with the lateness percentiles in milliseconds"""
+        stats = {"rate": self.rate, "ticks": self.ticks, "missed": self.missed, "locked": self.locked,
+                 "pulses": self.pulses}
+        if self.clock_period:
+            stats["bpm"] = 60.0 / (self.clock_period * CLOCK_PPQN)
+        stats["jitter"] = {key: (value * 1000 if key != "count" else value)
+                           for key, value in self.jitter.summary().items()}
+        return stats
+
+    def format_report(self):
+        stats = self.stats()
+        jitter = stats["jitter"]
+        clock = ""
+        if self.clock_port is not None:
+            clock = f", MIDI clock {stats['bpm']:.1f} BPM" if "bpm" in stats else ", no MIDI clock"
+
+        text = f"Output ticks: {stats['ticks']} at {self.rate:g} Hz{clock}, missed: {stats['missed']}"
+        if jitter["count"]:
+            text += (f"\nSend jitter (ms late): p50 {jitter['p50']:.3f}, p95 {jitter['p95']:.3f}, "
+                     f"p99 {jitter['p99']:.3f}, max {jitter['max']:.3f}")
+        return text
@@ -0,0 +1,122 @@
+"""Angular velocity, acceleration and motion energy from the sample stream
+
+MotionTracker is updated once per pipeline sample with the filtered angles
+and keeps its results in one preallocated list, so every update costs the
+same handful of float operations whatever the input rate. The values can be
+sent on extra controllers through a mapping profile's "motion" entry.
+"""
+import math
+import time
+
+from filters import wrap_angle
+
+# Values computed by MotionTracker, in the order of MotionTracker.values
+MOTION_SOURCES = ("pitch_velocity", "roll_velocity", "yaw_velocity", "speed", "acceleration", "energy")
+
+# Signed values - mapped with zero at the center of the controller range
+BIPOLAR_SOURCES = ("pitch_velocity", "roll_velocity", "yaw_velocity")
+
+# Value mapped to the end of the controller range unless a profile sets its
+# own: degrees/s, degrees/s² and (degrees/s)² for energy
+DEFAULT_RANGES = {
+    "pitch_velocity": 360.0,
+    "roll_velocity": 360.0,
+    "yaw_velocity": 360.0,
+    "speed": 360.0,
+    "acceleration": 3600.0,
+    "energy": 360.0 ** 2,
+}
+
+# Smoothing time constants (seconds) - differentiating amplifies sensor
+# noise, so velocity and acceleration each get a single pole low-pass
+VELOCITY_SMOOTHING = 0.02
+ACCELERATION_SMOOTHING = 0.05
+
+# Energy is the squared angular speed averaged over about this long (seconds),
+# so it rises with shaking and decays once the movement stops
+ENERGY_DECAY = 0.25
+
+# A longer pause between samples restarts the derivatives instead of
+# turning the jump across it into a spike (seconds)
+MAX_GAP = 0.25
+
+
+def motion_scale(source, value_range, max_value):
+    """(offset, scale) so int(offset + value * scale) is the controller value"""
+    if source in BIPOLAR_SOURCES:
+        center = max_value / 2
+        return center, center / value_range
+    return 0.0, max_value / value_range
+
+
+class MotionTracker:
+    """Incremental derivatives of (yaw, pitch, roll)
+
+    values holds pitch, roll and yaw velocity (degrees/s, signed), the
+    angular speed, the magnitude of the angular acceleration (degrees/s²)
+    and the motion energy, see MOTION_SOURCES. Roll and yaw are
+    differentiated across the ±180° wrap.
+    """
+
+    def __init__(self, velocity_smoothing=VELOCITY_SMOOTHING,
+                 acceleration_smoothing=ACCELERATION_SMOOTHING, energy_decay=ENERGY_DECAY,
+                 max_gap=MAX_GAP):
+        self.velocity_smoothing = velocity_smoothing
+        self.acceleration_smoothing = acceleration_smoothing
+        self.energy_decay = energy_decay
+        self.max_gap = max_gap
+        self.values = [0.0] * len(MOTION_SOURCES)
+        self.reset()
+
+    def reset(self):
+        values = self.values
+        for i in range(len(values)):
+            values[i] = 0.0
+        self._t = None
+        self._yaw = self._pitch = self._roll = 0.0
+
+    def update(self, yaw, pitch, roll, t=None):
+        """Add one sample, returns values (updated in place)"""
+        if t is None:
+            t = time.perf_counter()
+        values = self.values
+        last_t = self._t
+        if last_t is not None:
+            dt = t - last_t
+            if dt <= 0.0:
+                return values  # same timestamp - nothing to differentiate
+        self._t = t
+        if last_t is None or dt > self.max_gap:
+            # Start over from this sample
+            self._yaw, self._pitch, self._roll = yaw, pitch, roll
+            for i in range(len(values)):
+                values[i] = 0.0
+            return values
+
+        # Velocity, low-passed
+        d_pitch = (pitch - self._pitch) / dt
+        d_roll = wrap_angle(roll - self._roll) / dt
+        d_yaw = wrap_angle(yaw - self._yaw) / dt
+        self._yaw, self._pitch, self._roll = yaw, pitch, roll
+        old_pitch, old_roll, old_yaw = values[0], values[1], values[2]
+        alpha = dt / (self.velocity_smoothing + dt)
+        v_pitch = old_pitch + alpha * (d_pitch - old_pitch)
+        v_roll = old_roll + alpha * (d_roll - old_roll)
+        v_yaw = old_yaw + alpha * (d_yaw - old_yaw)
+        speed_squared = v_pitch * v_pitch + v_roll * v_roll + v_yaw * v_yaw
+
+        # Acceleration from the change of the smoothed velocity
+        a_pitch = v_pitch - old_pitch
+        a_roll = v_roll - old_roll
+        a_yaw = v_yaw - old_yaw
+        acceleration = math.sqrt(a_pitch * a_pitch + a_roll * a_roll + a_yaw * a_yaw) / dt
+
+        values[0] = v_pitch
+        values[1] = v_roll
+        values[2] = v_yaw
+        values[3] = math.sqrt(speed_squared)
+        alpha = dt / (self.acceleration_smoothing + dt)
+        values[4] += alpha * (acceleration - values[4])
+        alpha = dt / (self.energy_decay + dt)
+        values[5] += alpha * (speed_squared - values[5])
+        return values
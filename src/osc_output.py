@@ -0,0 +1,166 @@
+"""OSC over UDP output
+
+OSCSink sends the filtered angles as floats - and the motion.MotionTracker
+values with them - as one OSC bundle per sample, time-tagged with the time
+the sample was read. The layout of that bundle never changes, so it is
+encoded once into a preallocated buffer when the sink is created; a send
+only packs the numbers into it at precomputed offsets and hands the buffer
+to the socket, without building any message bytes.
+
+Addresses under the prefix (default /6dof):
+    /orientation     pitch roll yaw (degrees)
+    /velocity        pitch roll yaw (degrees/s)
+    /speed           angular speed (degrees/s)
+    /acceleration    angular acceleration (degrees/s²)
+    /energy          motion energy ((degrees/s)²)
+"""
+import socket
+import struct
+import time
+
+from motion import MOTION_SOURCES
+
+# Default destination - "HOST:PORT" on the command line
+DEFAULT_OSC_HOST = "127.0.0.1"
+DEFAULT_OSC_PORT = 9000
+
+# Address prefix of every message
+DEFAULT_OSC_PREFIX = "/6dof"
+
+# Messages sent with the motion values: (address, indices into MotionTracker.values)
+MOTION_MESSAGES = (
+    ("velocity", (MOTION_SOURCES.index("pitch_velocity"), MOTION_SOURCES.index("roll_velocity"),
+                  MOTION_SOURCES.index("yaw_velocity"))),
+    ("speed", (MOTION_SOURCES.index("speed"),)),
+    ("acceleration", (MOTION_SOURCES.index("acceleration"),)),
+    ("energy", (MOTION_SOURCES.index("energy"),)),
+)
+
+# OSC time tags count from 1900 (NTP), Unix time from 1970 (seconds)
+NTP_EPOCH_OFFSET = 2208988800
+
+BUNDLE_HEADER = b"#bundle\0"
+TIME_TAG = struct.Struct(">Q")
+ELEMENT_SIZE = struct.Struct(">i")
+
+
+def parse_osc_target(target):
+    """Parse "HOST:PORT", "HOST" or ":PORT" into (host, port)"""
+    host, separator, port = target.rpartition(":")
+    if not separator:
+        host, port = port, ""
+    host = host.strip("[]") or DEFAULT_OSC_HOST  # [::1]:9000
+    if not port:
+        return host, DEFAULT_OSC_PORT
+    try:
+        port = int(port)
+    except ValueError:
+        raise ValueError(f"Invalid OSC target '{target}': port must be a number") from None
+    if not 0 < port < 65536:
+        raise ValueError(f"Invalid OSC target '{target}': port must be 1-65535")
+    return host, port
+
+
+def osc_string(text):
+    """OSC string: ASCII, NUL terminated and padded to a multiple of 4 bytes"""
+    data = text.encode("ascii")
+    return data + b"\0" * (4 - len(data) % 4)
+
+
+def osc_message(address, arguments):
+    """Encoded message with float32 arguments"""
+    return (osc_string(address) + osc_string("," + "f" * len(arguments))
+            + struct.pack(f">{len(arguments)}f", *arguments))
+
+
+class OSCSink:
+    """Sends one OSC bundle of float messages per sample over UDP
+
+    With motion the bundle also carries the MotionTracker values passed to
+    send(). The socket is non-blocking: a bundle the OS can't take right
+    away is dropped and counted rather than holding up the pipeline, and
+    so is one refused because nothing is listening at the destination.
+    """
+
+    def __init__(self, host=DEFAULT_OSC_HOST, port=DEFAULT_OSC_PORT, prefix=DEFAULT_OSC_PREFIX, motion=True):
+        if prefix and not prefix.startswith("/"):
+            raise ValueError(f"OSC address prefix must start with '/': {prefix}")
+        self.host = host
+        self.port = port
+        self.prefix = prefix.rstrip("/")
+        self.motion = motion
+
+        # Encode the bundle with zeros once; send() only overwrites the numbers.
+        # Each entry: (offset of the float arguments, their struct, motion indices or None)
+        messages = [("orientation", (0.0, 0.0, 0.0), None)]
+        if motion:
+            messages += [(name, (0.0,) * len(indices), indices) for name, indices in MOTION_MESSAGES]
+        data = bytearray(BUNDLE_HEADER + TIME_TAG.pack(1))
+        fields = []
+        for name, arguments, indices in messages:
+            message = osc_message(f"{self.prefix}/{name}", arguments)
+            data += ELEMENT_SIZE.pack(len(message))
+            offset = len(data) + len(message) - 4 * len(arguments)
+            fields.append((offset, struct.Struct(f">{len(arguments)}f"), indices))
+            data += message
+        self.buffer = data
+        self._orientation_offset, self._orientation, _ = fields[0]
+        self._motion_fields = tuple(fields[1:])
+
+        # perf_counter() read times + offset = seconds since 1900, for the time tags
+        self._clock_offset = time.time() - time.perf_counter() + NTP_EPOCH_OFFSET
+
+        # Resolving the host name can fail here, but never in send()
+        address = socket.getaddrinfo(host, port, type=socket.SOCK_DGRAM)[0]
+        self.socket = socket.socket(address[0], socket.SOCK_DGRAM)
+        self.socket.setblocking(False)
+        self.socket.connect(address[4])
+
+        # Counters
+        self.sent = 0
+        self.dropped = 0  # send buffer full
+        self.errors = 0   # refused or unreachable
+        self.last_error = None
+
+    def send(self, pitch, roll, yaw, motion=None, read_time=None):
+        """Send one bundle, returns True if the socket took it"""
+        buffer = self.buffer
+        if read_time is None:
+            read_time = time.perf_counter()
+        # 32.32 fixed point seconds; wraps in 2036 like NTP itself
+        TIME_TAG.pack_into(buffer, len(BUNDLE_HEADER),
+                           int((read_time + self._clock_offset) * 4294967296.0) & 0xFFFFFFFFFFFFFFFF)
+        self._orientation.pack_into(buffer, self._orientation_offset, pitch, roll, yaw)
+        if motion is not None:
+            for offset, packer, indices in self._motion_fields:
+                if len(indices) == 3:
+                    packer.pack_into(buffer, offset, motion[indices[0]], motion[indices[1]],
+                                     motion[indices[2]])
+                else:
+                    packer.pack_into(buffer, offset, motion[indices[0]])
+        try:
+            self.socket.send(buffer)
+        except BlockingIOError:
+            self.dropped += 1
+            return False
+        except OSError as e:
+            self.errors += 1
+            self.last_error = e
+            return False
+        self.sent += 1
+        return True
+
+    def close(self):
+        self.socket.close()
+
+    def stats(self):
+        return {"sent": self.sent, "dropped": self.dropped, "errors": self.errors,
+                "bundle_size": len(self.buffer)}
+
+    def format_report(self):
+        stats = self.stats()
+        text = (f"OSC bundles sent to {self.host}:{self.port}: {stats['sent']} "
+                f"({stats['bundle_size']} bytes each), dropped: {stats['dropped']}, errors: {stats['errors']}")
+        if self.last_error is not None:
+            text += f" (last: {self.last_error})"
+        return text
@@ -0,0 +1,220 @@
+import time
+
+from filters import FilterBank
+
+# How long to wait for input before flushing rate-limited output (seconds)
+IDLE_TIMEOUT = 0.01
+
+
+class AxisMapper:
+    """Mapper stage: one CCMapper (or any callable) per axis"""
+
+    def __init__(self, pitch, roll=None, yaw=None):
+        self.pitch = pitch
+        self.roll = roll or pitch
+        self.yaw = yaw or pitch
+
+    def map_axes(self, pitch, roll, yaw):
+        return self.pitch(pitch), self.roll(roll), self.yaw(yaw)
+
+
+def send_motion(output, channel, motion, values):
+    """Send motion.MotionTracker values on the controllers of a profiles.Mapping motion entry"""
+    max_value = output.max_value
+    for index, cc_number, offset, scale in motion:
+        output.send(channel, cc_number, min(max_value, max(0, int(offset + values[index] * scale))))
+
+
+class CCSink:
+    """Sink stage: sends mapped values through a midi_output.CCOutputStage"""
+
+    def __init__(self, output, channel=0, pitch_cc=16, roll_cc=17, yaw_cc=18, motion=()):
+        self.output = output
+        self.channel = channel
+        self.pitch_cc = pitch_cc
+        self.roll_cc = roll_cc
+        self.yaw_cc = yaw_cc
+        self.motion = motion  # profiles.Mapping.motion
+
+    def send_axes(self, pitch, roll, yaw):
+        send = self.output.send
+        send(self.channel, self.pitch_cc, pitch)
+        send(self.channel, self.roll_cc, roll)
+        send(self.channel, self.yaw_cc, yaw)
+
+    def send_motion(self, values):
+        if self.motion:
+            send_motion(self.output, self.channel, self.motion, values)
+
+    def flush(self):
+        self.output.flush()
+
+
+class NullSink:
+    """Sink stage that sends nothing, for output through OSC alone"""
+
+    def send_axes(self, pitch, roll, yaw):
+        pass
+
+    def send_motion(self, values):
+        pass
+
+    def flush(self):
+        pass
+
+
+class Pipeline:
+    """Source -> resampler -> filters -> mapper -> sink, without any GUI
+
+    source is a SerialFrameReader or anything with the same ring / error
+    interface (ReplaySource). mapper provides map_axes(pitch, roll, yaw) and
+    sink send_axes(pitch, roll, yaw) and flush() - MIDIController does both.
+    Without a resampler every sample goes through the stages as it arrives.
+    With a motion.MotionTracker the filtered angles are differentiated too
+    and the results handed to sink.send_motion(values) after each send.
+    With an osc_output.OSCSink the filtered angles, and the motion values,
+    also go out as one OSC bundle per sample.
+
+    on_input(yaw, pitch, roll, read_time) is called with each sample before
+    filtering, on_output(pitch, roll, yaw, midi_pitch, midi_roll, midi_yaw,
+    read_time) after each send, on_bad_frame(raw_bytes) for every line the
+    source could not parse. All run on the pipeline thread.
+    """
+
+    def __init__(self, source, mapper, sink, filters=None, resampler=None, recorder=None,
+                 latency=None, on_output=None, on_bad_frame=None, motion=None, on_input=None,
+                 osc=None):
+        self.source = source
+        self.mapper = mapper
+        self.sink = sink
+        self.filters = filters if filters is not None else FilterBank()
+        self.resampler = resampler
+        self.recorder = recorder
+        self.latency = latency
+        self.on_input = on_input
+        self.on_output = on_output
+        self.on_bad_frame = on_bad_frame
+        self.motion = motion
+        self.osc = osc
+        self.running = False
+
+        # Counters
+        self.outputs = 0     # samples sent to the sink
+        self.bad_frames = 0  # unparseable lines seen
+
+    def stop(self):
+        """Make run() return (from any thread)"""
+        self.running = False
+
+    def run(self):
+        """Process samples until stop() is called, re-raising any source error
+
+        A finished replay surfaces as session_recorder.ReplayFinished.
+        """
+        self.running = True
+        self.reset()
+        ring = self.source.ring
+        try:
+            while self.running:
+                # Sleep until new data arrives or the next output tick is due
+                ring.wait(self.time_until_tick())
+                self.service()
+        finally:
+            self.running = False
+
+    def reset(self):
+        """Clear the filter, resampler and motion state"""
+        self.filters.reset()
+        if self.resampler is not None:
+            self.resampler.reset()
+        if self.motion is not None:
+            self.motion.reset()
+
+    def time_until_tick(self):
+        """Seconds service() can wait for input before it has output due"""
+        if self.resampler is None:
+            return IDLE_TIMEOUT
+        return self.resampler.time_until_tick()
+
+    def service(self):
+        """Take everything queued by the source and send whatever is due
+
+        Used by run(), or called directly when one thread drives several
+        pipelines. Raises the source's error once it has one.
+        """
+        source = self.source
+        ring = source.ring
+        resampler = self.resampler
+        recorder = self.recorder
+        process = self.process
+
+        frame = ring.pop()
+        while frame is not None:
+            # Lines the reader could not parse arrive as raw bytes
+            if isinstance(frame, bytes):
+                self.bad_frames += 1
+                if self.on_bad_frame is not None:
+                    self.on_bad_frame(frame)
+            else:
+                if recorder is not None:
+                    recorder.record(*frame)
+                if resampler is not None:
+                    # Every sample is aggregated into the current tick, none are dropped
+                    resampler.add(*frame)
+                else:
+                    process(*frame)
+            frame = ring.pop()
+
+        if source.error:
+            if resampler is not None and resampler.next_tick is not None:
+                # Send what the current tick collected before giving up
+                sample = resampler.tick(resampler.next_tick)
+                if sample is not None:
+                    yaw, pitch, roll, count = sample
+                    process(yaw, pitch, roll, resampler.last_sample_time)
+            raise source.error
+
+        if resampler is not None:
+            sample = resampler.tick()
+            if sample is not None:
+                yaw, pitch, roll, count = sample
+                process(yaw, pitch, roll, resampler.last_sample_time)
+                return
+        # Nothing to output - release any rate-limited values still waiting
+        self.sink.flush()
+
+    def process(self, yaw, pitch, roll, read_time=None):
+        """Filter, map and send one sample, returns the mapped values"""
+        latency = self.latency
+        if read_time is None:
+            read_time = time.perf_counter()
+        if self.on_input is not None:
+            self.on_input(yaw, pitch, roll, read_time)
+
+        # Apply the per-axis smoothing filters
+        yaw, pitch, roll = self.filters.process(yaw, pitch, roll)
+        if latency is not None:
+            latency.record("filter", read_time)
+
+        midi_pitch, midi_roll, midi_yaw = self.mapper.map_axes(pitch, roll, yaw)
+        if latency is not None:
+            latency.record("map", read_time)
+
+        self.sink.send_axes(midi_pitch, midi_roll, midi_yaw)
+        motion = self.motion
+        values = None
+        if motion is not None:
+            values = motion.update(yaw, pitch, roll, read_time)
+            self.sink.send_motion(values)
+        if self.osc is not None:
+            self.osc.send(pitch, roll, yaw, values, read_time)
+        if latency is not None:
+            latency.record("send", read_time)
+
+        self.outputs += 1
+        if self.on_output is not None:
+            self.on_output(pitch, roll, yaw, midi_pitch, midi_roll, midi_yaw, read_time)
+        return midi_pitch, midi_roll, midi_yaw
+
+    def stats(self):
+        return {"outputs": self.outputs, "bad_frames": self.bad_frames}
@@ -0,0 +1,212 @@
+from cc_mapping import CCMapper, piecewise_curve, make_curve
+from motion import MOTION_SOURCES, DEFAULT_RANGES, motion_scale
+
+DEFAULT_PROFILE = "default"
+
+AXES = ("pitch", "roll", "yaw")
+
+
+def _hashable(value):
+    """JSON value with lists and dicts turned into tuples"""
+    if isinstance(value, dict):
+        return tuple(sorted((key, _hashable(item)) for key, item in value.items()))
+    if isinstance(value, list):
+        return tuple(_hashable(item) for item in value)
+    return value
+
+
+class MappingProfile:
+    """Named mapping preset: MIDI channel, one CC per axis and the curve
+
+    The curve is the piecewise default shaped by mid_range and
+    mid_range_proportion; curves can override it per axis with
+    {"pitch": {"name": "s_curve", "steepness": 4}} style entries (see
+    cc_mapping.CURVES).
+
+    motion puts motion.MotionTracker values on further CCs of the same
+    channel: {"speed": 20, "energy": {"cc": 21, "range": 20000}}, with range
+    the value sent as the top of the controller range (motion.DEFAULT_RANGES
+    if left out).
+    """
+
+    def __init__(self, name=DEFAULT_PROFILE, channel=0, pitch_cc=16, roll_cc=17, yaw_cc=18,
+                 mid_range=30, mid_range_proportion=0.8, curves=None, motion=None):
+        self.name = name
+        self.channel = channel  # 0-15
+        self.pitch_cc = pitch_cc
+        self.roll_cc = roll_cc
+        self.yaw_cc = yaw_cc
+        self.mid_range = mid_range
+        self.mid_range_proportion = mid_range_proportion
+        self.curves = dict(curves or {})
+        self.motion = {source: dict(spec) if isinstance(spec, dict) else {"cc": spec}
+                       for source, spec in (motion or {}).items()}
+        self.validate()
+
+    @property
+    def ccs(self):
+        return (self.pitch_cc, self.roll_cc, self.yaw_cc)
+
+    @property
+    def motion_ccs(self):
+        return tuple(spec["cc"] for spec in self.motion.values())
+
+    def validate(self):
+        if not 0 <= self.channel <= 15:
+            raise ValueError(f"Profile '{self.name}': channel must be 1-16")
+        for cc_number in self.ccs:
+            if not 0 <= cc_number <= 127:
+                raise ValueError(f"Profile '{self.name}': CC {cc_number} is out of range (0-127)")
+        if self.mid_range <= 0:
+            raise ValueError(f"Profile '{self.name}': mid_range must be positive")
+        if not 0.0 < self.mid_range_proportion < 1.0:
+            raise ValueError(f"Profile '{self.name}': mid_range_proportion must be between 0 and 1")
+        for axis, spec in self.curves.items():
+            if axis not in AXES:
+                raise ValueError(f"Profile '{self.name}': unknown axis '{axis}'")
+            params = dict(spec)
+            try:
+                make_curve(params.pop("name", None), **params)
+            except TypeError as e:
+                raise ValueError(f"Profile '{self.name}': {e}") from None
+        for source, spec in self.motion.items():
+            if source not in MOTION_SOURCES:
+                raise ValueError(f"Profile '{self.name}': unknown motion value '{source}' "
+                                 f"(one of {', '.join(MOTION_SOURCES)})")
+            cc_number = spec.get("cc")
+            if not isinstance(cc_number, int) or not 0 <= cc_number <= 127:
+                raise ValueError(f"Profile '{self.name}': {source} CC {cc_number} is out of range (0-127)")
+            if cc_number in self.ccs:
+                raise ValueError(f"Profile '{self.name}': {source} CC {cc_number} is already used by an axis")
+            value_range = spec.get("range", DEFAULT_RANGES[source])
+            if not isinstance(value_range, (int, float)) or value_range <= 0:
+                raise ValueError(f"Profile '{self.name}': {source} range must be a positive number")
+        if len(set(self.motion_ccs)) != len(self.motion):
+            raise ValueError(f"Profile '{self.name}': motion values need a CC each")
+
+    def key(self):
+        """Hashable identity of everything the mapping tables depend on"""
+        return (self.channel, self.ccs, self.mid_range, self.mid_range_proportion,
+                _hashable(self.curves), _hashable(self.motion))
+
+    def to_dict(self):
+        data = {"channel": self.channel + 1, "pitch_cc": self.pitch_cc, "roll_cc": self.roll_cc,
+                "yaw_cc": self.yaw_cc, "mid_range": self.mid_range,
+                "mid_range_proportion": self.mid_range_proportion}
+        if self.curves:
+            data["curves"] = self.curves
+        if self.motion:
+            data["motion"] = self.motion
+        return data
+
+    @classmethod
+    def from_dict(cls, name, data):
+        """Profile from its settings file entry (channel 1-16 there)"""
+        try:
+            return cls(name, channel=int(data.get("channel", 1)) - 1,
+                       pitch_cc=int(data.get("pitch_cc", 16)), roll_cc=int(data.get("roll_cc", 17)),
+                       yaw_cc=int(data.get("yaw_cc", 18)), mid_range=float(data.get("mid_range", 30)),
+                       mid_range_proportion=float(data.get("mid_range_proportion", 0.8)),
+                       curves=data.get("curves"), motion=data.get("motion"))
+        except (AttributeError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid profile '{name}': {e}") from None
+
+
+class Mapping:
+    """Precomputed mapping state for one profile at one resolution
+
+    Never changed after it is built, so it can be swapped in with a single
+    attribute assignment while samples are flowing. motion holds
+    (index into MotionTracker.values, CC, offset, scale) per motion controller.
+    """
+
+    __slots__ = ("profile", "max_value", "channel", "pitch_cc", "roll_cc", "yaw_cc",
+                 "pitch", "roll", "yaw", "motion")
+
+    def __init__(self, profile, max_value=127, custom_curves=None):
+        self.profile = profile
+        self.max_value = max_value
+        self.channel = profile.channel
+        self.pitch_cc, self.roll_cc, self.yaw_cc = profile.ccs
+
+        # Axes without their own curve share one table
+        default_mapper = None
+        mappers = []
+        for axis, cc_number in zip(AXES, profile.ccs):
+            curve = (custom_curves or {}).get(cc_number)
+            if curve is None and axis in profile.curves:
+                params = dict(profile.curves[axis])
+                curve = make_curve(params.pop("name"), **params)
+            if curve is not None:
+                mappers.append(CCMapper(curve, max_value))
+                continue
+            if default_mapper is None:
+                default_mapper = CCMapper(piecewise_curve(profile.mid_range, profile.mid_range_proportion),
+                                          max_value)
+            mappers.append(default_mapper)
+        self.pitch, self.roll, self.yaw = mappers
+
+        motion = []
+        for source, spec in profile.motion.items():
+            offset, scale = motion_scale(source, spec.get("range", DEFAULT_RANGES[source]), max_value)
+            motion.append((MOTION_SOURCES.index(source), spec["cc"], offset, scale))
+        self.motion = tuple(motion)
+
+    def mappers(self):
+        """CC number -> CCMapper"""
+        return {self.pitch_cc: self.pitch, self.roll_cc: self.roll, self.yaw_cc: self.yaw}
+
+
+class ProfileStore:
+    """Named mapping profiles, kept under "profiles" in a ConfigStore"""
+
+    def __init__(self, config):
+        self.config = config
+        self.profiles = {}
+        self.reload()
+
+    def reload(self):
+        """Re-read the profiles from the config, skipping invalid ones"""
+        profiles = {}
+        for name, data in (self.config.get("profiles") or {}).items():
+            try:
+                profiles[name] = MappingProfile.from_dict(name, data)
+            except ValueError as e:
+                print(f"Warning: {e}")
+        if DEFAULT_PROFILE not in profiles:
+            profiles[DEFAULT_PROFILE] = MappingProfile()
+        self.profiles = profiles
+
+    def names(self):
+        return sorted(self.profiles)
+
+    def get(self, name):
+        try:
+            return self.profiles[name]
+        except KeyError:
+            raise ValueError(f"Unknown mapping profile: {name}") from None
+
+    @property
+    def active(self):
+        """Name of the profile selected last (falls back to the default one)"""
+        name = self.config.get("active_profile", DEFAULT_PROFILE)
+        return name if name in self.profiles else DEFAULT_PROFILE
+
+    def set_active(self, name):
+        self.get(name)
+        self.config.set("active_profile", name)
+
+    def save(self, profile):
+        """Add or replace a profile"""
+        profile.validate()
+        self.profiles[profile.name] = profile
+        self._store()
+
+    def delete(self, name):
+        if name == DEFAULT_PROFILE:
+            raise ValueError("The default profile can't be deleted")
+        self.profiles.pop(name, None)
+        self._store()
+
+    def _store(self):
+        self.config.set("profiles", {name: profile.to_dict() for name, profile in self.profiles.items()})
@@ -0,0 +1,362 @@
+import binascii
+import math
+import struct
+import threading
+import time
+
+import serial
+
+# How long a blocking read waits before checking whether it should stop (seconds)
+READ_TIMEOUT = 0.05
+
+# Upper bound for a single bulk read (bytes)
+MAX_READ_SIZE = 4096
+
+# Frames longer than this without a delimiter are treated as line noise (bytes)
+MAX_FRAME_SIZE = 1024
+
+# Serial protocols
+PROTOCOL_AUTO = "auto"      # text until a valid binary record arrives, binary until text lines do
+PROTOCOL_TEXT = "text"      # "%.2f, %.2f, %.2f\n" lines (yaw, pitch, roll)
+PROTOCOL_BINARY = "binary"  # COBS framed records terminated by 0x00
+PROTOCOLS = (PROTOCOL_AUTO, PROTOCOL_TEXT, PROTOCOL_BINARY)
+
+# Binary record: sequence, timestamp (ms), yaw, pitch, roll, CRC-16/CCITT-FALSE
+# Must match OrientationRecord in slave.cpp
+RECORD_FORMAT = struct.Struct('<HIfffH')
+RECORD_CRC_OFFSET = RECORD_FORMAT.size - 2
+
+# Auto mode goes back from binary to text after this many valid lines in a row
+AUTO_TEXT_LINES = 3
+
+
+def cobs_decode_into(frame, out):
+    """Decode a COBS frame (without its 0x00 delimiter) into a preallocated bytearray
+
+    Returns the decoded length, or -1 if the frame is malformed or too long.
+    """
+    length = len(frame)
+    out_size = len(out)
+    read_index = 0
+    write_index = 0
+    while read_index < length:
+        code = frame[read_index]
+        block_end = read_index + code
+        block_len = code - 1
+        if code == 0 or block_end > length or write_index + block_len > out_size:
+            return -1
+        out[write_index:write_index + block_len] = frame[read_index + 1:block_end]
+        write_index += block_len
+        read_index = block_end
+        # A zero byte follows every block except 0xFF blocks and the last one
+        if code != 0xFF and read_index < length:
+            if write_index >= out_size:
+                return -1
+            out[write_index] = 0
+            write_index += 1
+    return write_index
+
+
+class FrameRingBuffer:
+    """Bounded single-producer / single-consumer frame queue
+
+    The producer only ever writes _write_seq and the consumer only ever writes
+    _read_seq, so neither side takes a lock. When the producer laps the
+    consumer the oldest frames are overwritten - the consumer notices, skips
+    ahead and counts them as overflows. A consumer woken by wait() that then
+    finds nothing to pop counts an underflow - every drain loop ends on an
+    empty pop, and those are not counted.
+
+    Several rings can share one event so a single consumer can wait on all
+    of them at once.
+    """
+
+    def __init__(self, capacity=1024, event=None):
+        self.capacity = capacity
+        self._slots = [None] * capacity
+        self._write_seq = 0
+        self._read_seq = 0
+        self._data_ready = event if event is not None else threading.Event()
+        self._woken = False  # wait() reported data that has not been popped yet
+
+        # Counters
+        self.overflows = 0   # frames overwritten before they were consumed
+        self.underflows = 0  # wakeups that found the buffer empty
+
+    def __len__(self):
+        return min(self._write_seq - self._read_seq, self.capacity)
+
+    def push(self, frame):
+        """Add a frame (producer side, never blocks)"""
+        seq = self._write_seq
+        self._slots[seq % self.capacity] = frame
+        self._write_seq = seq + 1
+
+    def notify(self):
+        """Wake a waiting consumer - called once per bulk read rather than per frame"""
+        self._data_ready.set()
+
+    def pop(self):
+        """Return the oldest unread frame, or None if the buffer is empty"""
+        read_seq = self._read_seq
+        while True:
+            available = self._write_seq - read_seq
+            if available <= 0:
+                self._read_seq = read_seq
+                if self._woken:
+                    self.underflows += 1
+                    self._woken = False
+                return None
+            if available > self.capacity:
+                # Lapped by the producer - skip to the oldest frame still stored
+                lost = available - self.capacity
+                self.overflows += lost
+                read_seq += lost
+            frame = self._slots[read_seq % self.capacity]
+            # Re-check in case the slot was overwritten while we read it
+            if self._write_seq - read_seq <= self.capacity:
+                self._read_seq = read_seq + 1
+                self._woken = False
+                return frame
+
+    def wait(self, timeout=None):
+        """Block until a frame is available, returns False on timeout"""
+        if self._write_seq != self._read_seq:
+            return True
+        self._data_ready.clear()
+        # Check again so a push between the test above and clear() is not missed
+        if self._write_seq != self._read_seq:
+            return True
+        self._woken = self._data_ready.wait(timeout)
+        return self._woken
+
+    def clear(self):
+        """Drop everything not yet consumed (consumer side)"""
+        self._read_seq = self._write_seq
+
+    def stats(self):
+        return {"queued": len(self), "overflows": self.overflows, "underflows": self.underflows}
+
+
+class SerialFrameReader:
+    """Background thread that turns the serial byte stream into samples
+
+    The thread blocks in serial.read() with a short timeout instead of polling
+    in_waiting and reads everything that is buffered in one call. Complete
+    frames are decoded straight out of the bulk read buffer and pushed into a
+    FrameRingBuffer as (yaw, pitch, roll, read_time) tuples, read_time being
+    the time.perf_counter() at which the bytes came in. Text lines that do not parse
+    are pushed as the raw bytes so consumers can report them; corrupt binary
+    records are only counted. Non-finite angles (nan, inf) count as parse errors.
+    """
+
+    def __init__(self, serial_conn, ring=None, protocol=PROTOCOL_AUTO, latency=None):
+        if protocol not in PROTOCOLS:
+            raise ValueError(f"Unknown serial protocol: {protocol}")
+        self.serial_conn = serial_conn
+        self.ring = ring if ring is not None else FrameRingBuffer()
+        # Format being decoded; auto mode starts with text and follows the device
+        self.auto = protocol == PROTOCOL_AUTO
+        self.protocol = PROTOCOL_TEXT if self.auto else protocol
+        self.latency = latency  # optional latency.LatencyTracker
+        self.running = False
+        self.error = None
+        self.thread = None
+
+        # Scratch space for COBS decoding, reused for every record
+        self._record = bytearray(RECORD_FORMAT.size)
+        self._record_view = memoryview(self._record)
+        self._last_sequence = None
+        self._buffer = bytearray()  # bytes of the frame still being received
+
+        # Counters
+        self.bytes_read = 0
+        self.frames = 0
+        self.parse_errors = 0
+        self.crc_errors = 0
+        self.sequence_gaps = 0  # binary records lost on the wire
+
+    def start(self):
+        self.serial_conn.timeout = READ_TIMEOUT
+        self.running = True
+        self.error = None
+        self.thread = threading.Thread(target=self._read_loop, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=1.0)
+            self.thread = None
+
+    def _read_loop(self):
+        """Read bulk chunks and decode the complete frames in them"""
+        ser = self.serial_conn
+
+        while self.running:
+            try:
+                chunk = self.read_chunk(ser)
+            except (serial.SerialException, OSError) as e:
+                self.error = e
+                self.running = False
+                self.ring.notify()
+                break
+            if chunk:
+                self.feed(chunk, time.perf_counter())
+
+    @staticmethod
+    def read_chunk(ser):
+        """Wait up to the port timeout for one byte, then take whatever else is buffered"""
+        chunk = ser.read(1)
+        if chunk:
+            waiting = ser.in_waiting
+            if waiting:
+                chunk += ser.read(min(waiting, MAX_READ_SIZE))
+        return chunk
+
+    def feed(self, chunk, read_time=None):
+        """Decode a chunk of received bytes - for callers doing their own reads"""
+        buffer = self._buffer
+        self.bytes_read += len(chunk)
+        buffer += chunk
+        consumed = self.decode_buffer(buffer, read_time)
+        if consumed:
+            del buffer[:consumed]
+        if len(buffer) > MAX_FRAME_SIZE:
+            self.parse_errors += 1
+            buffer.clear()
+
+    def decode_buffer(self, buffer, read_time=None):
+        """Push every complete frame in buffer, returns the number of bytes consumed"""
+        start = self._detect_protocol(buffer) if self.auto else 0
+
+        if read_time is None:
+            read_time = time.perf_counter()
+        binary = self.protocol == PROTOCOL_BINARY
+        delimiter = 0 if binary else 10  # 0x00 or "\n"
+        ring = self.ring
+        pushed = 0
+
+        with memoryview(buffer) as view:
+            while True:
+                end = buffer.find(delimiter, start)
+                if end < 0:
+                    break
+                if end > start:
+                    if binary:
+                        sample = self._decode_record(view[start:end], read_time)
+                    else:
+                        sample = self._decode_line(buffer, start, end, read_time)
+                    if sample is not None:
+                        ring.push(sample)
+                        pushed += 1
+                start = end + 1
+
+        if pushed:
+            self.frames += pushed
+            if self.latency is not None:
+                self.latency.record("parse", read_time)
+            ring.notify()
+        return start
+
+    def _detect_protocol(self, buffer):
+        """Auto mode: switch format on evidence in buffer, returns the offset to decode from
+        
+        A stray 0x00 (boot messages, noise after a reset or at the wrong
+        baud rate) is not enough to leave text - only a record that passes
+        its CRC is. Binary goes back to text after AUTO_TEXT_LINES valid
+        lines in a row following the first newline, e.g. when text firmware
+        is flashed while running.
+        """
+        if self.protocol == PROTOCOL_TEXT:
+            if buffer.find(0) < 0:
+                return 0
+            # Text never contains 0x00 - look for a record that checks out
+            start = 0
+            with memoryview(buffer) as view:
+                while True:
+                    end = buffer.find(0, start)
+                    if end < 0:
+                        return 0
+                    if self._valid_record(view[start:end]):
+                        # Anything before it was noise or the end of the text stream
+                        self.protocol = PROTOCOL_BINARY
+                        self._last_sequence = None
+                        return start
+                    start = end + 1
+
+        # Binary: bytes left after decoding are the start of the next record,
+        # so complete text lines only pile up when the device sends text
+        if buffer.find(0) >= 0:
+            return 0
+        end = buffer.find(10)
+        if end < 0:
+            return 0
+        # The text may start mid-line after a partial record - resync on the
+        # first "\n" unless what comes before it is already a whole line
+        first = 0 if self._valid_line(buffer[:end]) else end + 1
+        start = first
+        for _ in range(AUTO_TEXT_LINES):
+            end = buffer.find(10, start)
+            if end < 0 or not self._valid_line(buffer[start:end]):
+                return 0
+            start = end + 1
+        self.protocol = PROTOCOL_TEXT
+        return first
+
+    def _valid_record(self, frame):
+        """Whether a COBS frame holds a record with a correct CRC (counts nothing)"""
+        if cobs_decode_into(frame, self._record) != RECORD_FORMAT.size:
+            return False
+        crc = RECORD_FORMAT.unpack_from(self._record_view)[-1]
+        return binascii.crc_hqx(self._record_view[:RECORD_CRC_OFFSET], 0xFFFF) == crc
+
+    @staticmethod
+    def _valid_line(line):
+        """Whether a text line holds three finite numbers"""
+        try:
+            values = [float(value) for value in line.split(b',')]
+        except ValueError:
+            return False
+        return len(values) == 3 and all(map(math.isfinite, values))
+
+    def _decode_line(self, buffer, start, end, read_time):
+        """Parse a "yaw, pitch, roll" text line"""
+        line = bytes(buffer[start:end])
+        try:
+            # float() accepts bytes and ignores surrounding whitespace
+            yaw, pitch, roll = map(float, line.split(b','))
+        except ValueError:
+            self.parse_errors += 1
+            return line
+        # float() also accepts "nan" and "inf", which no mapping can turn into a CC value
+        if not (math.isfinite(yaw) and math.isfinite(pitch) and math.isfinite(roll)):
+            self.parse_errors += 1
+            return line
+        return (yaw, pitch, roll, read_time)
+
+    def _decode_record(self, frame, read_time):
+        """Decode one COBS framed binary record"""
+        record = self._record
+        if cobs_decode_into(frame, record) != RECORD_FORMAT.size:
+            self.parse_errors += 1
+            return None
+        sequence, timestamp, yaw, pitch, roll, crc = RECORD_FORMAT.unpack_from(self._record_view)
+        if binascii.crc_hqx(self._record_view[:RECORD_CRC_OFFSET], 0xFFFF) != crc:
+            self.crc_errors += 1
+            return None
+        if not (math.isfinite(yaw) and math.isfinite(pitch) and math.isfinite(roll)):
+            self.parse_errors += 1
+            return None
+
+        if self._last_sequence is not None:
+            self.sequence_gaps += (sequence - self._last_sequence - 1) & 0xFFFF
+        self._last_sequence = sequence
+        return (yaw, pitch, roll, read_time)
+
+    def stats(self):
+        stats = self.ring.stats()
+        stats.update(protocol=self.protocol, bytes_read=self.bytes_read, frames=self.frames,
+                     parse_errors=self.parse_errors, crc_errors=self.crc_errors,
+                     sequence_gaps=self.sequence_gaps)
+        return stats
@@ -1,19 +1,87 @@
+import time
+IMPORT_START = time.perf_counter()  # for --startup-profile
 import serial
 import serial.tools.list_ports
-import time
 import rtmidi
-import pygame
-import re
-import numpy as np
-import json
 import os
 import argparse
 import threading
-import tkinter as tk
-from tkinter import ttk, messagebox
 import math
 from pathlib import Path
 import sys
+from config_store import ConfigStore
+from profiles import MappingProfile, Mapping, ProfileStore
+from session_recorder import SessionRecorder, ReplaySource, ReplayFinished
+from latency import LatencyTracker, STAGES as LATENCY_STAGES
+from filters import FilterBank, Resampler, DEFAULT_FILTERS, RESAMPLE_MEAN, RESAMPLE_MODES
+from pipeline import Pipeline, AxisMapper, NullSink, send_motion
+from motion import MotionTracker
+from serial_io import PROTOCOL_AUTO, PROTOCOLS
+from hotplug import ReconnectingSerialReader, MidiPortWatcher, PortIdentity, find_port, remember_port
+from console_status import ConsoleStatus, DEFAULT_STATUS_RATE, DEFAULT_LOG_QUEUE_SIZE
+from midi_scheduler import OutputScheduler, DEFAULT_TICK_RATE, DEFAULT_CLOCK_DIVISION
+from osc_output import OSCSink, parse_osc_target, DEFAULT_OSC_PREFIX
+from midi_output import (CCOutputStage, DEFAULT_MAX_CC_RATE, MODE_7BIT, OUTPUT_MODES, max_value_for_mode,
+                         check_14bit_ccs)
+IMPORT_END = time.perf_counter()
+
+# GUI-only modules (tkinter, numpy), loaded by import_gui() - console mode never needs them.
+# device_hub, midi_process and websocket_source (asyncio, websockets, multiprocessing)
+# are imported where they are used for the same reason.
+tk = ttk = messagebox = np = None
+
+
+def import_gui():
+    """Load the GUI-only modules on first use"""
+    global tk, ttk, messagebox, np
+    if tk is None:
+        import tkinter
+        import tkinter.ttk
+        import tkinter.messagebox
+        import numpy
+        tk, ttk, messagebox, np = tkinter, tkinter.ttk, tkinter.messagebox, numpy
+
+# Default serial speed - must match SERIAL_BAUD in slave.cpp
+DEFAULT_BAUD_RATE = 115200
+
+# Default GUI processing rate (Hz)
+DEFAULT_OUTPUT_RATE = 50
+
+# Default GUI redraw rate (frames per second)
+DEFAULT_RENDER_FPS = 30
+
+# Default history plot redraw rate (frames per second, 0 hides the plot)
+DEFAULT_PLOT_FPS = 15
+
+# Cube model used for the orientation display
+CUBE_VERTICES = [
+    [-1, -1, -1], [1, -1, -1], [1, 1, -1], [-1, 1, -1],
+    [-1, -1, 1], [1, -1, 1], [1, 1, 1], [-1, 1, 1]
+]
+CUBE_EDGES = [
+    (0, 1), (1, 2), (2, 3), (3, 0),  # Back face
+    (4, 5), (5, 6), (6, 7), (7, 4),  # Front face
+    (0, 4), (1, 5), (2, 6), (3, 7)   # Connecting edges
+]
+AXIS_ENDPOINTS = [(1.5, 0, 0), (0, 1.5, 0), (0, 0, 1.5)]
+
+# All points projected per frame: cube vertices, then the axes origin and endpoints
+SCENE_POINTS = CUBE_VERTICES + [(0, 0, 0)] + AXIS_ENDPOINTS
+AXES_ORIGIN_INDEX = len(CUBE_VERTICES)
+
+
+def rotation_matrix(pitch, roll, yaw, out=None):
+    """Rotation applying yaw (Z), then pitch (Y), then roll (X) - angles in radians"""
+    cy, sy = math.cos(yaw), math.sin(yaw)
+    cp, sp = math.cos(pitch), math.sin(pitch)
+    cr, sr = math.cos(roll), math.sin(roll)
+    if out is None:
+        out = np.empty((3, 3))
+    # Rx(roll) @ Ry(pitch) @ Rz(yaw), written out
+    out[0] = (cp * cy, -cp * sy, sp)
+    out[1] = (cr * sy + sr * sp * cy, cr * cy - sr * sp * sy, -sr * cp)
+    out[2] = (sr * sy - cr * sp * cy, sr * cy + cr * sp * sy, cr * cp)
+    return out
 
 # Define color schemes for light and dark modes
 class ColorScheme:
@@ -32,7 +100,9 @@ class ColorScheme:
             "axis_z": "#0000ff",
             "status_ok": "#00a000",
             "status_error": "#ff0000",
-            "cube_lines": "#000000"
+            "cube_lines": "#000000",
+            "plot_raw": "#a0a0a0",
+            "plot_grid": "#d0d0d0"
         }
         
         # Dark mode
@@ -49,58 +119,206 @@ class ColorScheme:
             "axis_z": "#5050ff",
             "status_ok": "#50ff50",
             "status_error": "#ff5050",
-            "cube_lines": "#ffffff"
+            "cube_lines": "#ffffff",
+            "plot_raw": "#707070",
+            "plot_grid": "#444444"
         }
         
         # Current scheme (start with light)
         self.current = self.light
 
+def gui_select_midi_port(parent, available_ports, config):
+    """Modal dialog to pick a MIDI output; saves the choice and returns its index"""
+    if not available_ports:
+        return None
+    import_gui()
+        
+    # Create a popup dialog window
+    dialog = tk.Toplevel(parent)
+    dialog.title("Select MIDI Port")
+    dialog.geometry("400x300")
+    dialog.transient(parent)  # Make dialog modal
+    dialog.grab_set()
+    
+    # Center the dialog
+    dialog.update_idletasks()
+    width = dialog.winfo_width()
+    height = dialog.winfo_height()
+    x = (dialog.winfo_screenwidth() // 2) - (width // 2)
+    y = (dialog.winfo_screenheight() // 2) - (height // 2)
+    dialog.geometry(f'+{x}+{y}')
+    
+    # Create a label
+    ttk.Label(dialog, text="Select a MIDI port:", padding=10).pack()
+    
+    # Create a listbox to display the ports
+    port_listbox = tk.Listbox(dialog, width=50, height=10)
+    port_listbox.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
+    
+    # Add ports to the listbox
+    for port in available_ports:
+        port_listbox.insert(tk.END, port)
+    
+    # Select the first port by default
+    port_listbox.selection_set(0)
+    
+    # Result variable
+    result = [None]  # Use list to allow modification from nested function
+    
+    # Function to handle selection
+    def on_select():
+        selection = port_listbox.curselection()
+        if selection:
+            index = selection[0]
+            # Save selection to config
+            config.set('midi_port', available_ports[index])
+            result[0] = index
+            dialog.destroy()
+    
+    # Add a select button
+    ttk.Button(dialog, text="Select", command=on_select).pack(pady=10)
+    
+    # Wait until the dialog is closed
+    parent.wait_window(dialog)
+    
+    return result[0]
+
 class MIDIController:
-    def __init__(self, force_select=False, gui_mode=False, parent=None):
+    def __init__(self, force_select=False, gui_mode=False, parent=None, max_cc_rate=DEFAULT_MAX_CC_RATE,
+                 output_mode=MODE_7BIT, config=None, profile=None, midi_port=None, interactive=True):
         self.midi_out = rtmidi.MidiOut()
-        self.config_file = Path.home() / '.6dof_config2.json'
+        self.config = config if config is not None else ConfigStore()
         self.gui_mode = gui_mode
         self.parent = parent
+        self.midi_port = midi_port  # port name that overrides the saved one
+        self.interactive = interactive  # False: raise ValueError instead of prompting
         port_index = self._get_midi_port(force_select)
         
         if port_index is None:
             print("No MIDI ports available. Creating virtual port...")
             self.midi_out.open_virtual_port("6DOF Controller")
+            self.port_name = None
         else:
             self.midi_out.open_port(port_index)
-        
-        # MIDI CC numbers for pitch, roll, and yaw
-        self.PITCH_CC = 16
-        self.ROLL_CC = 17
-        self.YAW_CC = 18
-        
-        # Mapping configuration
-        self.MID_RANGE = 30  # degrees - how far from center before entering outer range
-        self.MID_RANGE_PROPORTION = 0.8  # proportion of MIDI range allocated to middle section
+            self.port_name = self.midi_out.get_ports()[port_index]
+        self._reopened_out = None  # set by reopen_port(), swapped in by the pipeline thread
+        
+        # Change-only, rate-limited output stage in front of the port
+        self.output = CCOutputStage(self.midi_out, max_rate=max_cc_rate, mode=output_mode)
+        # Where the sinks send: the output stage, or the scheduler feeding it on a fixed tick
+        self.scheduler = None
+        self.sender = self.output
+        
+        # Channel, CC numbers and curve come from a mapping profile:
+        #   MIDI_CHANNEL, PITCH_CC, ROLL_CC, YAW_CC,
+        #   MID_RANGE - degrees from center before entering the outer range
+        #   MID_RANGE_PROPORTION - proportion of the MIDI range given to the middle section
+        # Precomputed lookup tables for them are kept in self.mapping
+        self.custom_curves = {}
+        self._mapping_cache = {}  # (profile key, max value) -> Mapping
+        self.apply_profile(profile or MappingProfile())
+    
+    def apply_profile(self, profile):
+        """Switch to a mapping profile without touching the MIDI port
+        
+        The new tables are built (or taken from the cache) first and then
+        swapped in with one assignment, so the pipeline picks them up at its
+        next sample and never sees a mix of old and new settings.
+        """
+        check_14bit_ccs(profile.ccs + profile.motion_ccs, self.output.mode)
+        self.profile = profile
+        self.MIDI_CHANNEL = profile.channel
+        self.PITCH_CC, self.ROLL_CC, self.YAW_CC = profile.ccs
+        self.MID_RANGE = profile.mid_range
+        self.MID_RANGE_PROPORTION = profile.mid_range_proportion
+        self.rebuild_mapping()
+    
+    def rebuild_mapping(self):
+        """Recompute the lookup tables after changing MID_RANGE, MID_RANGE_PROPORTION or curves"""
+        profile = self.profile
+        if (profile.channel, profile.ccs, profile.mid_range, profile.mid_range_proportion) != (
+                self.MIDI_CHANNEL, (self.PITCH_CC, self.ROLL_CC, self.YAW_CC),
+                self.MID_RANGE, self.MID_RANGE_PROPORTION):
+            # Attributes were changed directly - keep the profile in step
+            profile = MappingProfile(profile.name, self.MIDI_CHANNEL, self.PITCH_CC, self.ROLL_CC,
+                                     self.YAW_CC, self.MID_RANGE, self.MID_RANGE_PROPORTION, profile.curves,
+                                     profile.motion)
+            self.profile = profile
+        
+        if self.custom_curves:
+            mapping = Mapping(profile, self.output.max_value, self.custom_curves)
+        else:
+            mapping = self._cached_mapping(profile)
+        self.mappers = mapping.mappers()
+        self.mapping = mapping
+    
+    def _cached_mapping(self, profile):
+        max_value = self.output.max_value
+        key = (profile.key(), max_value)
+        mapping = self._mapping_cache.get(key)
+        if mapping is None:
+            mapping = self._mapping_cache[key] = Mapping(profile, max_value)
+        return mapping
+    
+    def preload_profiles(self, profiles):
+        """Build the tables for profiles ahead of time, so switching to them is just a swap"""
+        for profile in profiles:
+            self._cached_mapping(profile)
+    
+    def set_output_mode(self, mode):
+        """Switch between 7-bit CC, 14-bit CC pairs (CC n / n+32) and NRPN"""
+        check_14bit_ccs((self.PITCH_CC, self.ROLL_CC, self.YAW_CC) + self.profile.motion_ccs, mode)
+        self.sender.set_mode(mode)
+        self.rebuild_mapping()
+    
+    def start_scheduler(self, rate=DEFAULT_TICK_RATE, clock_port=None, clock_division=DEFAULT_CLOCK_DIVISION):
+        """Send the newest values on a fixed tick (or MIDI clock) instead of with each sample
+        
+        Call before the pipeline starts; raises ValueError if clock_port isn't there.
+        """
+        scheduler = OutputScheduler(self.output, rate, clock_port, clock_division)
+        scheduler.start()
+        self.scheduler = self.sender = scheduler
+    
+    def set_curve(self, cc_number, curve):
+        """Use a user-defined curve (see cc_mapping) for one CC, or None for the default"""
+        if curve is None:
+            self.custom_curves.pop(cc_number, None)
+        else:
+            self.custom_curves[cc_number] = curve
+        self.rebuild_mapping()
+    
+    def map_value(self, cc_number, value):
+        """Map an angle to the MIDI CC value that would be sent for it"""
+        return self.mappers[cc_number](value)
     
     def _get_midi_port(self, force_select):
         available_ports = self.midi_out.get_ports()
         
+        # Port given on the command line
+        if self.midi_port and not force_select:
+            if self.midi_port not in available_ports:
+                raise ValueError(f"MIDI port '{self.midi_port}' not found "
+                                 f"(available: {', '.join(available_ports) or 'none'})")
+            return available_ports.index(self.midi_port)
+        
         if not available_ports:
             return None
             
-        # Load saved configuration
-        saved_port = None
-        if not force_select and self.config_file.exists():
-            try:
-                with open(self.config_file, 'r') as f:
-                    config = json.load(f)
-                    saved_port = config.get('midi_port')
-                    if saved_port in available_ports:
-                        print(f"Using saved MIDI port: {saved_port}")
-                        return available_ports.index(saved_port)
-            except (json.JSONDecodeError, IOError):
-                pass
+        # Saved selection
+        if not force_select:
+            saved_port = self.config.get('midi_port')
+            if saved_port in available_ports:
+                print(f"Using saved MIDI port: {saved_port}")
+                return available_ports.index(saved_port)
         
         # GUI Mode - Show dialog instead of console input
         if self.gui_mode:
             return self._gui_select_midi_port(available_ports)
         
+        if not self.interactive:
+            raise ValueError(f"No MIDI port saved - pass --midi-port (available: {', '.join(available_ports)})")
+        
         # Console Mode - Show selection menu
         print("\nAvailable MIDI ports:")
         for i, port in enumerate(available_ports):
@@ -111,13 +329,9 @@ class MIDIController:
                 choice = int(input("\nSelect MIDI port number: "))
                 if 0 <= choice < len(available_ports):
                     # Save the selection
-                    try:
-                        with open(self.config_file, 'w') as f:
-                            json.dump({'midi_port': available_ports[choice]}, f)
-                        return choice
-                    except IOError as e:
-                        print(f"Warning: Could not save MIDI port selection: {e}")
-                        return choice
+                    self.config.set('midi_port', available_ports[choice])
+                    self.config.flush()
+                    return choice
                 else:
                     print("Invalid selection. Please try again.")
             except ValueError:
@@ -125,119 +339,166 @@ class MIDIController:
     
     def _gui_select_midi_port(self, available_ports):
         """Display a GUI dialog to select MIDI port"""
-        if not available_ports:
-            return None
-            
-        if self.parent:
-            # Create a popup dialog window
-            dialog = tk.Toplevel(self.parent)
-            dialog.title("Select MIDI Port")
-            dialog.geometry("400x300")
-            dialog.transient(self.parent)  # Make dialog modal
-            dialog.grab_set()
-            
-            # Center the dialog
-            dialog.update_idletasks()
-            width = dialog.winfo_width()
-            height = dialog.winfo_height()
-            x = (dialog.winfo_screenwidth() // 2) - (width // 2)
-            y = (dialog.winfo_screenheight() // 2) - (height // 2)
-            dialog.geometry(f'+{x}+{y}')
-            
-            # Create a label
-            ttk.Label(dialog, text="Select a MIDI port:", padding=10).pack()
-            
-            # Create a listbox to display the ports
-            port_listbox = tk.Listbox(dialog, width=50, height=10)
-            port_listbox.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
-            
-            # Add ports to the listbox
-            for port in available_ports:
-                port_listbox.insert(tk.END, port)
-            
-            # Select the first port by default
-            port_listbox.selection_set(0)
-            
-            # Result variable
-            result = [None]  # Use list to allow modification from nested function
-            
-            # Function to handle selection
-            def on_select():
-                selection = port_listbox.curselection()
-                if selection:
-                    index = selection[0]
-                    # Save selection to config
-                    try:
-                        with open(self.config_file, 'w') as f:
-                            json.dump({'midi_port': available_ports[index]}, f)
-                    except IOError:
-                        pass
-                    result[0] = index
-                    dialog.destroy()
-            
-            # Add a select button
-            ttk.Button(dialog, text="Select", command=on_select).pack(pady=10)
-            
-            # Wait until the dialog is closed
-            self.parent.wait_window(dialog)
-            
-            return result[0]
-        else:
+        if not self.parent:
             # If no parent window is provided, default to first port
             return 0 if available_ports else None
+        return gui_select_midi_port(self.parent, available_ports, self.config)
     
     def send_controller_change(self, cc_number, value):
-        # Piecewise linear mapping
-        if abs(value) <= self.MID_RANGE:
-            # Middle range: Map ±MID_RANGE° to ±MID_RANGE_PROPORTION of the MIDI range
-            mapped = (value / self.MID_RANGE) * self.MID_RANGE_PROPORTION
-        else:
-            # Outer range: Map remaining angles to the outer (1-MID_RANGE_PROPORTION) of the MIDI range
-            sign = 1 if value > 0 else -1
-            remaining_angle = abs(value) - self.MID_RANGE
-            mapped = sign * (self.MID_RANGE_PROPORTION + (remaining_angle / (180 - self.MID_RANGE)) * (1 - self.MID_RANGE_PROPORTION))
-            
-        # Scale to MIDI range (0-127) and ensure the midpoint (0 degrees) maps to 63/64
-        midi_value = min(127, max(0, int(63.5 + (mapped * 63.5))))
+        """Map an angle through the lookup table, send it and return the MIDI value"""
+        midi_value = self.mappers[cc_number](value)
         
-        # Send MIDI CC message on channel 1
-        self.midi_out.send_message([0xB0, cc_number, midi_value])
+        # Only changed values reach the port, at most max_cc_rate per controller
+        self.sender.send(self.MIDI_CHANNEL, cc_number, midi_value)
+        return midi_value
+    
+    def send_mapped(self, cc_number, midi_value):
+        """Send a value already produced by map_value"""
+        self.sender.send(self.MIDI_CHANNEL, cc_number, midi_value)
+    
+    def map_axes(self, pitch, roll, yaw):
+        """Pipeline mapper stage: MIDI values for all three axes"""
+        # Read the mapping once, and send with the same one even if a profile
+        # switch lands in between
+        mapping = self.mapping
+        self._sample_mapping = mapping
+        if self._reopened_out is not None:
+            # Here rather than in send_axes, so device hub sinks switch too
+            self._switch_port()
+        return mapping.pitch(pitch), mapping.roll(roll), mapping.yaw(yaw)
+    
+    def reopen_port(self, port_name):
+        """Open the MIDI port again after it was unplugged, or switch to another one (from any thread)
+        
+        The new handle is only opened here; the pipeline thread switches to
+        it at its next sample, so the output stage is never touched from
+        two threads at once.
+        """
+        midi_out = rtmidi.MidiOut()
+        ports = midi_out.get_ports()
+        if port_name not in ports:
+            raise ValueError(f"MIDI port '{port_name}' not found")
+        midi_out.open_port(ports.index(port_name))
+        self.port_name = port_name
+        self._reopened_out = midi_out
+    
+    def _switch_port(self):
+        midi_out, self._reopened_out = self._reopened_out, None
+        old_out, self.midi_out = self.midi_out, midi_out
+        # The synth lost whatever it had - send every controller again
+        if self.scheduler is not None:
+            self.scheduler.switch_port(midi_out)
+        else:
+            self.output.midi_out = midi_out
+            self.output.reset()
+        old_out.close_port()
+    
+    def send_axes(self, midi_pitch, midi_roll, midi_yaw):
+        """Pipeline sink stage: send the values from map_axes"""
+        mapping = self._sample_mapping
+        send = self.sender.send
+        channel = mapping.channel
+        send(channel, mapping.pitch_cc, midi_pitch)
+        send(channel, mapping.roll_cc, midi_roll)
+        send(channel, mapping.yaw_cc, midi_yaw)
+    
+    def send_motion(self, values):
+        """Pipeline sink stage: send the profile's motion controllers"""
+        mapping = self._sample_mapping
+        if mapping.motion:
+            send_motion(self.sender, mapping.channel, mapping.motion, values)
+    
+    def flush(self):
+        """Send values held back by the rate limit once their window has passed"""
+        if self._reopened_out is not None:
+            self._switch_port()
+        self.sender.flush()
         
     def close(self):
+        if self.scheduler is not None:
+            self.scheduler.stop()
+        self.output.flush(force=True)
         self.midi_out.close_port()
-
-def smooth_value(values, new_value, window_size=3):
-    values.append(new_value)
-    if len(values) > window_size:
-        values.pop(0)
-    return np.mean(values)
+        if self._reopened_out is not None:
+            self._reopened_out.close_port()
+        self.config.flush()
 
 class SensorGUI:
-    def __init__(self, root):
+    def __init__(self, root, max_cc_rate=DEFAULT_MAX_CC_RATE, output_mode=MODE_7BIT,
+                 baudrate=DEFAULT_BAUD_RATE, serial_protocol=PROTOCOL_AUTO, filter_specs=None,
+                 output_rate=DEFAULT_OUTPUT_RATE, resample_mode=RESAMPLE_MEAN,
+                 render_fps=DEFAULT_RENDER_FPS, latency=False, latency_export=None,
+                 record_path=None, replay_path=None, replay_speed=1.0, websocket_url=None,
+                 midi_process=False, config=None, profile_name=None, serial_port=None, midi_port=None,
+                 tick_rate=None, clock_port=None, clock_division=DEFAULT_CLOCK_DIVISION,
+                 plot_fps=DEFAULT_PLOT_FPS, osc_target=None, osc_prefix=DEFAULT_OSC_PREFIX):
+        import_gui()
         self.root = root
         self.root.title("6DOF MIDI Controller")
-        self.root.geometry("800x600")
+        self.root.geometry("800x800" if plot_fps else "800x600")
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
         
         # Initialize color scheme
         self.colors = ColorScheme()
         self.is_dark_mode = False
         
-        # Load theme preference from config
-        self.config_file = Path.home() / '.6dof_config2.json'
+        # Settings file (theme, MIDI port, mapping profiles), saved debounced
+        self.config = config if config is not None else ConfigStore()
         self._load_theme_preference()
         
+        # Named mapping presets, switchable while running
+        self.profiles = ProfileStore(self.config)
+        if profile_name:
+            self.profiles.set_active(profile_name)
+        self.profile = self.profiles.get(self.profiles.active)
+        
         # Configure initial theme
         self._configure_theme()
         
         self.midi_controller = None
+        self.midi_watcher = None
+        self.midi_port = midi_port  # overrides the saved MIDI port
+        self.max_cc_rate = max_cc_rate
+        self.output_mode = output_mode
+        # Clock-driven MIDI output (off without a tick rate or clock input)
+        self.tick_rate = tick_rate
+        self.clock_port = clock_port
+        self.clock_division = clock_division
+        # OSC bundles sent alongside MIDI (off without a target)
+        self.osc_target = osc_target
+        self.osc_prefix = osc_prefix
+        self.osc = None
         self.serial_conn = None
+        self.serial_reader = None
+        self.baudrate = baudrate
+        self.serial_protocol = serial_protocol
         self.running = False
         self.data_thread = None
+        self.pipeline = None
+        
+        # Per-axis smoothing filters, fed at a steady output rate by the resampler
+        self.filters = FilterBank(filter_specs)
+        self.resampler = Resampler(output_rate, resample_mode)
         
-        # Data buffers
-        self.roll_buffer = []
-        self.yaw_buffer = []
+        # Optional serial-to-MIDI latency instrumentation (None when disabled)
+        self.latency = LatencyTracker() if latency else None
+        self.latency_export = latency_export
+        
+        # Session recording of the raw samples, and replay in place of the serial port
+        self.record_path = record_path
+        self.recorder = None
+        self.replay_path = replay_path
+        self.replay_speed = replay_speed
+        
+        # Master's WebSocket in place of the serial port
+        self.websocket_url = websocket_url
+        
+        # Optionally run acquisition and MIDI output in a separate process,
+        # so GUI stalls can't delay MIDI (the core then replaces the threads above)
+        self.midi_process = midi_process
+        self.core = None
+        self.core_port = None
+        self.core_latency = None  # latency summary reported by the core process
         
         # Current values
         self.pitch = 0
@@ -246,41 +507,52 @@ class SensorGUI:
                 
         self.playing = False
         self.playback_index = 0
+        
+        # Latest processed state, published by the data thread and drawn by the
+        # render loop: (sequence, pitch, roll, yaw, midi_pitch, midi_roll, midi_yaw, read_time)
+        self.snapshot = (0, 0, 0, 0, 64, 64, 64, None)
+        self.render_interval = 1.0 / render_fps
+        self.rendered_sequence = 0
+        
+        # Recent raw, filtered and CC values for the history plot, written by
+        # the pipeline thread (or from the core's state) and drawn at plot_fps
+        self.history = None
+        self.history_plot = None
+        self.plot_interval = 1.0 / plot_fps if plot_fps else None
+        self.last_plot_time = 0.0
+        self._raw = (0.0, 0.0, 0.0)  # pitch, roll, yaw of the sample being processed
+        if plot_fps:
+            from history_plot import HistoryBuffer, HISTORY_SECONDS
+            # One row per output sample, or per frame read from the core process
+            rows_per_second = max(self.resampler.rate, render_fps)
+            self.history = HistoryBuffer(int(HISTORY_SECONDS * rows_per_second * 1.1))
+        self.render_job = None
+        self.frames_rendered = 0
+        self.last_stats_time = time.perf_counter()
+        self.last_stats_frames = 0
+        self.last_stats_samples = 0
 
         self._create_widgets()
+        if not serial_port:
+            # The device used last time, under whatever name it has now
+            serial_port = find_port(PortIdentity.from_dict(self.config.get('serial_device')),
+                                    self.config.get('serial_port'))
+        if serial_port:
+            self.port_var.set(serial_port)
         self._list_ports()
+        self._render_loop()
     
     def _load_theme_preference(self):
         """Load dark mode preference from config file"""
-        if self.config_file.exists():
-            try:
-                with open(self.config_file, 'r') as f:
-                    config = json.load(f)
-                    self.is_dark_mode = config.get('dark_mode', False)
-                    if self.is_dark_mode:
-                        self.colors.current = self.colors.dark
-                    else:
-                        self.colors.current = self.colors.light
-            except (json.JSONDecodeError, IOError):
-                pass
+        self.is_dark_mode = bool(self.config.get('dark_mode', False))
+        if self.is_dark_mode:
+            self.colors.current = self.colors.dark
+        else:
+            self.colors.current = self.colors.light
     
     def _save_theme_preference(self):
         """Save dark mode preference to config file"""
-        config = {}
-        if self.config_file.exists():
-            try:
-                with open(self.config_file, 'r') as f:
-                    config = json.load(f)
-            except (json.JSONDecodeError, IOError):
-                pass
-                
-        config['dark_mode'] = self.is_dark_mode
-        
-        try:
-            with open(self.config_file, 'w') as f:
-                json.dump(config, f)
-        except IOError as e:
-            print(f"Warning: Could not save theme preference: {e}")
+        self.config.set('dark_mode', self.is_dark_mode)
     
     def _configure_theme(self):
         """Apply the current theme to the root window"""
@@ -318,17 +590,19 @@ class SensorGUI:
         # Apply theme
         self._configure_theme()
         
-        # Update canvas background
+        # Update canvas background and recolor the scene items
         self.canvas.config(bg=self.colors.current["canvas_bg"])
-        
-        # If we have orientation data, redraw the visualization with the new colors
-        if hasattr(self, 'pitch') and hasattr(self, 'roll') and hasattr(self, 'yaw'):
-            self.draw_orientation(self.pitch, self.roll, self.yaw)
+        self._apply_scene_colors()
+        if self.history_plot is not None:
+            self.history_plot.apply_colors(self.colors.current)
         
         # Save preference
         self._save_theme_preference()
 
     def toggle_playback(self):
+        # Loaded on first use - it is slow to import and prints a banner
+        os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+        import pygame
         if not pygame.mixer.get_init():
             pygame.mixer.init()
         file_path = os.path.join(os.getcwd(), "recording.mp3")  
@@ -360,6 +634,22 @@ class SensorGUI:
         )
         self.dark_mode_button.pack(side=tk.RIGHT, padx=5, pady=5)
         
+        # MIDI resolution selection
+        ttk.Label(top_buttons_frame, text="MIDI Resolution:").pack(side=tk.LEFT, padx=5, pady=5)
+        self.output_mode_var = tk.StringVar(value=self.output_mode)
+        output_mode_combo = ttk.Combobox(top_buttons_frame, textvariable=self.output_mode_var,
+                                         values=OUTPUT_MODES, state="readonly", width=8)
+        output_mode_combo.pack(side=tk.LEFT, padx=5, pady=5)
+        output_mode_combo.bind("<<ComboboxSelected>>", self.on_output_mode_changed)
+        
+        # Mapping profile selection, applied without reconnecting
+        ttk.Label(top_buttons_frame, text="Profile:").pack(side=tk.LEFT, padx=5, pady=5)
+        self.profile_var = tk.StringVar(value=self.profile.name)
+        self.profile_combo = ttk.Combobox(top_buttons_frame, textvariable=self.profile_var,
+                                          values=self.profiles.names(), state="readonly", width=14)
+        self.profile_combo.pack(side=tk.LEFT, padx=5, pady=5)
+        self.profile_combo.bind("<<ComboboxSelected>>", self.on_profile_changed)
+        
         # Serial port selection
         ttk.Label(control_frame, text="Serial Port:").grid(row=1, column=0, padx=5, pady=5, sticky=tk.W)
         self.port_var = tk.StringVar()
@@ -395,6 +685,18 @@ class SensorGUI:
         self.midi_status = ttk.Label(status_frame, text="Disconnected", foreground=self.colors.current["status_error"])
         self.midi_status.grid(row=0, column=3, padx=5, pady=5, sticky=tk.W)
         
+        ttk.Label(status_frame, text="Buffer:").grid(row=0, column=4, padx=5, pady=5, sticky=tk.W)
+        self.buffer_status = ttk.Label(status_frame, text="-")
+        self.buffer_status.grid(row=0, column=5, padx=5, pady=5, sticky=tk.W)
+        
+        ttk.Label(status_frame, text="Samples/tick:").grid(row=0, column=6, padx=5, pady=5, sticky=tk.W)
+        self.resample_status = ttk.Label(status_frame, text="-")
+        self.resample_status.grid(row=0, column=7, padx=5, pady=5, sticky=tk.W)
+        
+        ttk.Label(status_frame, text="Display:").grid(row=1, column=0, padx=5, pady=5, sticky=tk.W)
+        self.display_status = ttk.Label(status_frame, text="-")
+        self.display_status.grid(row=1, column=1, columnspan=3, padx=5, pady=5, sticky=tk.W)
+        
         visual_frame = ttk.Frame(self.root, padding="10")
         visual_frame.pack(fill=tk.BOTH, expand=True)
         
@@ -405,6 +707,7 @@ class SensorGUI:
         # Create canvas for 3D visualization with the current theme background
         self.canvas = tk.Canvas(data_frame, bg=self.colors.current["canvas_bg"], width=400, height=300)
         self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self._create_scene()
         
         # Angle displays
         values_frame = ttk.Frame(data_frame)
@@ -436,6 +739,24 @@ class SensorGUI:
         ttk.Label(values_frame, text="Yaw CC:").grid(row=6, column=0, padx=5, pady=5, sticky=tk.W)
         self.yaw_cc = ttk.Label(values_frame, text="64")
         self.yaw_cc.grid(row=6, column=1, padx=5, pady=5, sticky=tk.W)
+        
+        # Latency stats panel (only with --latency)
+        if self.latency is not None:
+            latency_frame = ttk.LabelFrame(values_frame, text="Latency p50/p95/p99 (ms)", padding="5")
+            latency_frame.grid(row=7, column=0, columnspan=2, padx=5, pady=(15, 5), sticky=tk.W+tk.E)
+            self.latency_labels = {}
+            for row, stage in enumerate(LATENCY_STAGES):
+                ttk.Label(latency_frame, text=f"{stage.capitalize()}:").grid(row=row, column=0, padx=5, sticky=tk.W)
+                self.latency_labels[stage] = ttk.Label(latency_frame, text="-")
+                self.latency_labels[stage].grid(row=row, column=1, padx=5, sticky=tk.W)
+        
+        # Scrolling history of raw vs filtered angles and CC output
+        if self.history is not None:
+            from history_plot import HistoryPlot
+            history_frame = ttk.LabelFrame(visual_frame, text="History", padding="5")
+            history_frame.pack(fill=tk.X, pady=(10, 0))
+            self.history_plot = HistoryPlot(history_frame, self.history, self.colors.current,
+                                            max_value_for_mode(self.output_mode))
     
     def _list_ports(self):
         """Update the list of available serial ports"""
@@ -459,132 +780,426 @@ class SensorGUI:
     def start_serial(self):
         """Connect to serial port and start data acquisition"""
         port = self.port_var.get()
-        if not port:
+        if not port and not self.replay_path and not self.websocket_url:
             messagebox.showerror("Error", "Please select a serial port")
             return
+        
+        if self.midi_process:
+            self._start_core(port)
+            return
             
         try:
-            self.serial_conn = serial.Serial(
-                port=port,
-                baudrate=115200,
-                timeout=1
-            )
+            if self.replay_path:
+                # Replay a recorded session through the same pipeline
+                self.serial_reader = ReplaySource(self.replay_path, speed=self.replay_speed)
+                port = f"replay of {Path(self.replay_path).name}"
+            elif self.websocket_url:
+                # Frames straight from the master, reconnecting on its own
+                from websocket_source import WebSocketSource
+                self.serial_reader = WebSocketSource(self.websocket_url, latency=self.latency)
+                port = self.websocket_url
+            else:
+                self.serial_conn = serial.Serial(
+                    port=port,
+                    baudrate=self.baudrate,
+                    timeout=1
+                )
+                remember_port(self.config, port)
             
             # Initialize MIDI controller if not already done
             if not self.midi_controller:
-                self.midi_controller = MIDIController(gui_mode=True, parent=self.root)
+                self.midi_controller = MIDIController(gui_mode=True, parent=self.root,
+                                                      max_cc_rate=self.max_cc_rate,
+                                                      output_mode=self.output_mode,
+                                                      config=self.config, profile=self.profile,
+                                                      midi_port=self.midi_port)
+                self._start_scheduler()
+                self._preload_profiles()
+                self._watch_midi_port()
                 self.midi_status.config(text=f"Connected", foreground=self.colors.current["status_ok"])
+            if self.osc_target and not self.osc:
+                self.osc = OSCSink(*self.osc_target, prefix=self.osc_prefix)
             
             self.running = True
             self.connect_button.config(text="Disconnect")
             self.serial_status.config(text=f"Connected to {port}", foreground=self.colors.current["status_ok"])
             
-            # Reset input buffer
-            self.serial_conn.reset_input_buffer()
+            if self.serial_conn:
+                # Reset input buffer
+                self.serial_conn.reset_input_buffer()
+                
+                # Blocking reader thread feeding the processing thread; it reopens
+                # the device if it is unplugged, with the pipeline left running
+                self.serial_reader = ReconnectingSerialReader(self.serial_conn, protocol=self.serial_protocol,
+                                                              latency=self.latency)
+            
+            if self.record_path and not self.recorder:
+                self.recorder = SessionRecorder(self.record_path)
             
-            # Start data acquisition thread
+            # Start the reader and the processing thread that consumes its frames
+            self.pipeline = Pipeline(self.serial_reader, self.midi_controller, self.midi_controller,
+                                     filters=self.filters, resampler=self.resampler,
+                                     recorder=self.recorder, latency=self.latency,
+                                     on_output=self._publish, motion=MotionTracker(),
+                                     on_input=self._keep_raw, osc=self.osc)
+            self.serial_reader.start()
             self.data_thread = threading.Thread(target=self.read_data_loop)
             self.data_thread.daemon = True
             self.data_thread.start()
             
-        except serial.SerialException as e:
+        except (serial.SerialException, OSError, ValueError, ImportError) as e:
+            # Release what was opened, so the next Connect can have the port
+            self.running = False
+            self.pipeline = None
+            if self.serial_reader:
+                self.serial_reader.stop()
+                self.serial_reader = None
+            if self.serial_conn:
+                self.serial_conn.close()
+                self.serial_conn = None
+            self.connect_button.config(text="Connect")
             messagebox.showerror("Connection Error", f"Failed to connect to {port}: {str(e)}")
     
+    def _start_core(self, port):
+        """Start the acquisition and MIDI core process"""
+        from midi_process import MidiCoreProcess, profile_data
+        
+        config = {
+            "port": port, "baudrate": self.baudrate, "serial_protocol": self.serial_protocol,
+            "replay_path": self.replay_path, "replay_speed": self.replay_speed,
+            "websocket_url": self.websocket_url, "record_path": self.record_path,
+            "filter_specs": self.filters.specs, "output_rate": self.resampler.rate,
+            "resample_mode": self.resampler.mode, "max_cc_rate": self.max_cc_rate,
+            "output_mode": self.output_mode, "midi_port": self.midi_port or self.config.get('midi_port'),
+            "profile": profile_data(self.profile),
+            "profiles": [profile_data(profile) for profile in self.profiles.profiles.values()],
+            "latency": self.latency is not None, "latency_export": self.latency_export,
+            "tick_rate": self.tick_rate, "clock_port": self.clock_port, "clock_division": self.clock_division,
+            "osc_target": self.osc_target, "osc_prefix": self.osc_prefix,
+        }
+        self.core = MidiCoreProcess(config)
+        self.core.start()
+        self.rendered_sequence = 0
+        self.last_stats_samples = 0
+        
+        self.running = True
+        self.connect_button.config(text="Disconnect")
+        if self.replay_path:
+            port = f"replay of {Path(self.replay_path).name}"
+        elif self.websocket_url:
+            port = self.websocket_url
+        self.serial_status.config(text=f"Connecting to {port}...", foreground=self.colors.current["status_ok"])
+        self.core_port = port
+    
+    def _stop_core(self):
+        """Shut the core process down and report what it sent last"""
+        core, self.core = self.core, None
+        self._handle_core_messages(core.stop())
+    
+    def _handle_core_messages(self, messages):
+        for kind, value in messages:
+            if kind == "started":
+                self.serial_status.config(text=f"Connected to {self.core_port}",
+                                          foreground=self.colors.current["status_ok"])
+                self.midi_status.config(text="Connected (core process)",
+                                        foreground=self.colors.current["status_ok"])
+            elif kind == "latency":
+                self.core_latency = value
+            elif kind == "serial":
+                # The serial device was unplugged or is back
+                if value["connected"]:
+                    text, color = f"Connected to {self.core_port}", "status_ok"
+                    if value["last_reconnect_ms"] is not None:
+                        text += f" (reconnected in {value['last_reconnect_ms']:.0f} ms)"
+                else:
+                    text, color = f"Waiting for {self.core_port}...", "status_error"
+                self.serial_status.config(text=text, foreground=self.colors.current[color])
+            elif kind == "recorded":
+                count, path = value
+                print(f"Recorded {count} samples to {path}")
+            elif kind in ("scheduler", "osc"):
+                print(value)
+            elif kind == "output_mode":
+                # The core kept its resolution rather than switch to one the CCs can't use
+                mode, error = value
+                self.output_mode = mode
+                self.output_mode_var.set(mode)
+                if self.history_plot is not None:
+                    self.history_plot.set_cc_max(max_value_for_mode(mode))
+                messagebox.showerror("MIDI Resolution", error)
+            elif kind == "finished":
+                self.root.after(0, self.stop_serial)
+            elif kind == "error":
+                print(f"Error in core process: {value}")
+                self.root.after(0, self.handle_error, value)
+    
     def stop_serial(self):
         """Stop data acquisition and disconnect"""
         self.running = False
+        if self.core:
+            self._stop_core()
+            self.midi_status.config(text="Disconnected", foreground=self.colors.current["status_error"])
+        if self.pipeline:
+            self.pipeline.stop()
         if self.data_thread:
             self.data_thread.join(timeout=1.0)
             self.data_thread = None
+        self.pipeline = None
+            
+        if self.serial_reader:
+            self.serial_reader.stop()
+            self.serial_reader = None
             
         if self.serial_conn:
             self.serial_conn.close()
             self.serial_conn = None
             
+        if self.recorder:
+            self.recorder.close()
+            print(f"Recorded {self.recorder.count} samples to {self.recorder.path}")
+            self.recorder = None
+            
         self.connect_button.config(text="Connect")
         self.serial_status.config(text="Disconnected", foreground=self.colors.current["status_error"])
     
     def select_midi_port(self):
         """Force reselection of MIDI port"""
+        if self.midi_process:
+            # The core process owns the port - just tell it which one to use
+            available_ports = rtmidi.MidiOut().get_ports()
+            index = gui_select_midi_port(self.root, available_ports, self.config)
+            if index is not None and self.core:
+                self.core.set_midi_port(available_ports[index])
+            return
+        
         if self.midi_controller:
-            self.midi_controller.close()
+            # Switch the existing controller over - a running pipeline maps and
+            # sends through it, and picks the new port up at its next sample
+            available_ports = rtmidi.MidiOut().get_ports()
+            index = gui_select_midi_port(self.root, available_ports, self.config)
+            if index is None:
+                return
+            port_name = available_ports[index]
+            try:
+                self.midi_controller.reopen_port(port_name)
+            except Exception as e:  # rtmidi's error types differ between versions
+                messagebox.showerror("MIDI Port", f"Could not open {port_name}: {e}")
+                return
+            self.midi_watcher.stop()
+            self._watch_midi_port()
+            self.midi_status.config(text=f"Connected", foreground=self.colors.current["status_ok"])
+            return
         
-        self.midi_controller = MIDIController(force_select=True, gui_mode=True, parent=self.root)
+        self.midi_controller = MIDIController(force_select=True, gui_mode=True, parent=self.root,
+                                              max_cc_rate=self.max_cc_rate,
+                                              output_mode=self.output_mode,
+                                              config=self.config, profile=self.profile)
+        self._start_scheduler()
+        self._preload_profiles()
+        self._watch_midi_port()
         self.midi_status.config(text=f"Connected", foreground=self.colors.current["status_ok"])
     
-    def read_data_loop(self):
-        """Background thread to read data from serial port"""
-        # Clear the buffers at start
-        self.roll_buffer = []
-        self.yaw_buffer = []
-        
-        # Track timing to maintain consistent rate
-        last_process_time = time.time()
-        target_interval = 0.02  # 50Hz processing rate
-        
-        while self.running and self.serial_conn:
+    def _start_scheduler(self):
+        """Clock-driven MIDI output, if a tick rate or clock input was given"""
+        if self.tick_rate or self.clock_port:
             try:
-                if self.serial_conn.in_waiting > 0:
-                    line = self.serial_conn.readline().decode('utf-8').strip()
-                    
-                    # Only process at the target rate
-                    current_time = time.time()
-                    if current_time - last_process_time < target_interval:
-                        continue
-                    
-                    last_process_time = current_time
-                    
-                    try:
-                        # Parse the comma-separated angle values
-                        yaw, pitch, roll = map(float, line.split(','))
-                        
-                        # Apply smoothing to roll and yaw
-                        smoothed_roll = smooth_value(self.roll_buffer, roll)
-                        smoothed_yaw = smooth_value(self.yaw_buffer, yaw)
-                        
-                        # Update current values
-                        self.pitch = pitch
-                        self.roll = smoothed_roll
-                        self.yaw = smoothed_yaw
-                        
-                        # Send MIDI CC messages
-                        midi_cc_pitch = self.calculate_midi_cc(self.midi_controller.PITCH_CC, pitch)
-                        midi_cc_roll = self.calculate_midi_cc(self.midi_controller.ROLL_CC, smoothed_roll)
-                        midi_cc_yaw = self.calculate_midi_cc(self.midi_controller.YAW_CC, smoothed_yaw)
-                        
-                        # Update the GUI (thread-safe)
-                        self.root.after(0, self.update_display, pitch, smoothed_roll, smoothed_yaw, 
-                                        midi_cc_pitch, midi_cc_roll, midi_cc_yaw)
-                        
-                    except ValueError:
-                        pass  # Ignore parsing errors
-                        
-                # Reduced sleep time for more responsive reads
-                time.sleep(0.001)  # Just enough to prevent CPU hogging
-                
-            except Exception as e:
-                print(f"Error in read loop: {e}")
-                self.root.after(0, self.handle_error, str(e))
-                break
-    
-    def calculate_midi_cc(self, cc_number, value):
-        """Calculate MIDI CC value from angle"""
-        # Replicate the MIDI mapping logic from MIDIController class
-        if abs(value) <= self.midi_controller.MID_RANGE:
-            mapped = (value / self.midi_controller.MID_RANGE) * self.midi_controller.MID_RANGE_PROPORTION
+                self.midi_controller.start_scheduler(self.tick_rate or DEFAULT_TICK_RATE, self.clock_port,
+                                                     self.clock_division)
+            except ValueError:
+                self.midi_controller.close()
+                self.midi_controller = None
+                raise
+    
+    def _watch_midi_port(self):
+        """Reopen the MIDI port in the background if it is unplugged"""
+        self.midi_watcher = MidiPortWatcher(self.midi_controller.port_name, self.midi_controller.reopen_port)
+        self.midi_watcher.start()
+    
+    def on_output_mode_changed(self, event=None):
+        """Apply the MIDI resolution chosen in the GUI"""
+        mode = self.output_mode_var.get()
+        try:
+            if self.core:
+                # Same check as MIDIController.set_output_mode - the core reports any it still rejects
+                check_14bit_ccs(self.profile.ccs + self.profile.motion_ccs, mode)
+                self.core.set_output_mode(mode)
+            elif self.midi_controller:
+                self.midi_controller.set_output_mode(mode)
+        except ValueError as e:
+            messagebox.showerror("MIDI Resolution", str(e))
+            self.output_mode_var.set(self.output_mode)
+            return
+        self.output_mode = mode
+        if self.history_plot is not None:
+            self.history_plot.set_cc_max(max_value_for_mode(mode))
+    
+    def on_profile_changed(self, event=None):
+        """Switch to the mapping profile chosen in the GUI"""
+        name = self.profile_var.get()
+        try:
+            self.apply_profile(self.profiles.get(name))
+        except ValueError as e:
+            messagebox.showerror("Mapping Profile", str(e))
+            self.profile_var.set(self.profile.name)
+            return
+        self.profiles.set_active(name)
+    
+    def apply_profile(self, profile):
+        """Hand a profile to whatever is sending MIDI - the port stays open"""
+        if self.core:
+            check_14bit_ccs(profile.ccs + profile.motion_ccs, self.output_mode)
+            self.core.set_profile(profile)
+        elif self.midi_controller:
+            self.midi_controller.apply_profile(profile)
+        self.profile = profile
+    
+    def _preload_profiles(self):
+        """Build every profile's tables in the background (a few tens of ms each)"""
+        profiles = list(self.profiles.profiles.values())
+        if self.core:
+            self.core.preload_profiles(profiles)
+        elif self.midi_controller:
+            threading.Thread(target=self.midi_controller.preload_profiles, args=(profiles,),
+                             daemon=True).start()
+    
+    def _reload_profiles(self):
+        """Pick up profiles edited in the settings file while running"""
+        if not self.config.reload_if_changed():
+            return
+        self.profiles.reload()
+        self.profile_combo.config(values=self.profiles.names())
+        self._preload_profiles()
+        profile = self.profiles.get(self.profiles.active)
+        if profile.key() != self.profile.key() or profile.name != self.profile.name:
+            try:
+                self.apply_profile(profile)
+            except ValueError as e:
+                print(f"Warning: {e}")
+                return
+            self.profile_var.set(profile.name)
+    
+    def read_data_loop(self):
+        """Background thread running the processing pipeline on the reader's samples"""
+        try:
+            self.pipeline.run()
+        except ReplayFinished:
+            self.root.after(0, self.stop_serial)
+        except Exception as e:
+            print(f"Error in read loop: {e}")
+            self.root.after(0, self.handle_error, str(e))
+    
+    def _keep_raw(self, yaw, pitch, roll, read_time):
+        """Pipeline input: the sample before filtering, for the history plot"""
+        self._raw = (pitch, roll, yaw)
+    
+    def _publish(self, pitch, roll, yaw, midi_pitch, midi_roll, midi_yaw, read_time):
+        """Pipeline output: keep the values sent for the render loop"""
+        if self.history is not None:
+            self.history.append(read_time, (*self._raw, pitch, roll, yaw, midi_pitch, midi_roll, midi_yaw))
+        self.pitch = pitch
+        self.roll = roll
+        self.yaw = yaw
+        # A single tuple assignment, so the GUI never sees a half-updated
+        # state and never slows the pipeline thread
+        self.snapshot = (self.snapshot[0] + 1, pitch, roll, yaw,
+                         midi_pitch, midi_roll, midi_yaw, read_time)
+    
+    def _render_loop(self):
+        """Draw the newest snapshot at a capped frame rate, skipping stale ones"""
+        start = time.perf_counter()
+        
+        snapshot = self.snapshot if self.core is None else self.core.read()
+        if snapshot and snapshot[0] != self.rendered_sequence:
+            self.rendered_sequence = snapshot[0]
+            self.update_display(*snapshot[1:7])
+            self.frames_rendered += 1
+            if self.latency is not None:
+                self.latency.record("paint", snapshot[7])
+            if self.core is not None and self.history is not None:
+                # Only the newest state is shared, so the core's history is sampled per frame
+                self.history.append(snapshot[7], snapshot[15:18] + snapshot[1:7])
+        
+        if self.history_plot is not None and start - self.last_plot_time >= self.plot_interval:
+            self.last_plot_time = start
+            self.history_plot.redraw()
+        
+        if start - self.last_stats_time >= 1.0:
+            self._update_stats(start)
+        
+        # Schedule the next frame, allowing for the time this one took
+        elapsed = time.perf_counter() - start
+        delay_ms = max(1, int((self.render_interval - elapsed) * 1000))
+        self.render_job = self.root.after(delay_ms, self._render_loop)
+    
+    def _update_stats(self, now):
+        """Refresh the rate and buffer counters in the status bar (once per second)"""
+        elapsed = now - self.last_stats_time
+        self._reload_profiles()
+        core_state = None
+        if self.core:
+            self._handle_core_messages(self.core.poll())
+            core_state = self.core and self.core.read()
+            samples = core_state[8] if core_state else 0
         else:
-            sign = 1 if value > 0 else -1
-            remaining_angle = abs(value) - self.midi_controller.MID_RANGE
-            mapped = sign * (self.midi_controller.MID_RANGE_PROPORTION + 
-                            (remaining_angle / (180 - self.midi_controller.MID_RANGE)) * 
-                            (1 - self.midi_controller.MID_RANGE_PROPORTION))
-            
-        midi_value = min(127, max(0, int(63.5 + (mapped * 63.5))))
-        
-        # Send MIDI CC message
-        self.midi_controller.send_controller_change(cc_number, value)
-        
-        return midi_value
+            samples = self.serial_reader.frames if self.serial_reader else 0
+        if samples < self.last_stats_samples:
+            self.last_stats_samples = 0  # reconnected
+        fps = (self.frames_rendered - self.last_stats_frames) / elapsed
+        input_rate = (samples - self.last_stats_samples) / elapsed
+        self.last_stats_time = now
+        self.last_stats_frames = self.frames_rendered
+        self.last_stats_samples = samples
+        
+        self.display_status.config(text=f"{fps:.0f} FPS (draw {self.draw_time_ms:.2f} ms), "
+                                        f"input {input_rate:.0f} Hz")
+        self._update_port_status()
+        
+        # Serial ring buffer counters
+        if core_state:
+            self.buffer_status.config(text=f"{core_state[9]} overflows, {core_state[10]} underflows")
+        elif self.serial_reader:
+            stats = self.serial_reader.ring.stats()
+            self.buffer_status.config(text=f"{stats['overflows']} overflows, {stats['underflows']} underflows")
+        
+        # Input samples covered by the last output tick
+        if core_state:
+            samples, ticks, last_count = core_state[11:14]
+            average = samples / ticks if ticks else 0.0
+            self.resample_status.config(text=f"{last_count} (avg {average:.1f}) @ {self.resampler.rate:g} Hz")
+        else:
+            stats = self.resampler.stats()
+            self.resample_status.config(text=f"{stats['last_count']} (avg {stats['samples_per_tick']:.1f}) "
+                                             f"@ {stats['rate']:g} Hz")
+        
+        # Latency percentiles since the serial read, per stage
+        if self.latency is not None:
+            summary = self.latency.summary()
+            if self.core_latency:
+                # Everything but the paint stage is measured in the core process
+                summary.update((stage, stats) for stage, stats in self.core_latency.items()
+                               if stage != "paint")
+            for stage, stats in summary.items():
+                if stats["count"]:
+                    self.latency_labels[stage].config(
+                        text=f"{stats['p50']:.1f} / {stats['p95']:.1f} / {stats['p99']:.1f}")
+    
+    def _update_port_status(self):
+        """Show ports that are unplugged and being waited for"""
+        reader = self.serial_reader
+        if isinstance(reader, ReconnectingSerialReader) and self.running:
+            if reader.connected:
+                text, color = f"Connected to {reader.port}", "status_ok"
+                if reader.last_outage_ms is not None:
+                    text += f" (reconnected in {reader.last_reconnect_ms:.0f} ms)"
+            else:
+                text, color = f"Waiting for {reader.port}...", "status_error"
+            self.serial_status.config(text=text, foreground=self.colors.current[color])
+        if self.midi_watcher is not None and self.midi_controller:
+            if self.midi_watcher.connected:
+                self.midi_status.config(text="Connected", foreground=self.colors.current["status_ok"])
+            else:
+                self.midi_status.config(text=f"Waiting for {self.midi_watcher.port_name}...",
+                                        foreground=self.colors.current["status_error"])
     
     def update_display(self, pitch, roll, yaw, midi_pitch, midi_roll, midi_yaw):
         """Update the GUI with new sensor values"""
@@ -606,13 +1221,74 @@ class SensorGUI:
         # Update the 3D visualization
         self.draw_orientation(pitch, roll, yaw)
     
+    def _create_scene(self):
+        """Create the canvas items for the cube, axes and labels once"""
+        colors = self.colors.current
+        
+        # Cube edges and colored axes, moved with coords() on every frame
+        self.edge_items = [
+            self.canvas.create_line(0, 0, 0, 0, width=2, fill=colors["cube_lines"])
+            for _ in CUBE_EDGES
+        ]
+        self.axis_items = [
+            self.canvas.create_line(0, 0, 0, 0, width=3, fill=colors[key], arrow=tk.LAST)
+            for key in ("axis_x", "axis_y", "axis_z")
+        ]
+        
+        # Axes labels, only moved when the canvas is resized
+        self.label_items = [
+            self.canvas.create_text(0, 0, text=text, fill=colors[key])
+            for text, key in (("Roll", "axis_x"), ("Pitch", "axis_y"), ("Yaw", "axis_z"))
+        ]
+        
+        # Preallocated arrays for the per-frame rotation and projection
+        self.scene_points = np.array(SCENE_POINTS, dtype=float)
+        self._rotation = np.empty((3, 3))
+        self._projected = np.empty((len(SCENE_POINTS), 2))
+        self._scale = np.empty(2)
+        self._scale_size = None
+        
+        # Canvas geometry, updated from <Configure> instead of queried per frame
+        self.canvas_width = int(self.canvas["width"])
+        self.canvas_height = int(self.canvas["height"])
+        self._position_labels()
+        self.canvas.bind("<Configure>", self._on_canvas_configure)
+        
+        # Rolling average of draw_orientation time (ms)
+        self.draw_time_ms = 0.0
+    
+    def _on_canvas_configure(self, event):
+        """Track the canvas size and re-layout the scene after a resize"""
+        self.canvas_width = event.width
+        self.canvas_height = event.height
+        self._position_labels()
+        self.draw_orientation(self.pitch, self.roll, self.yaw)
+    
+    def _position_labels(self):
+        """Place the axes labels for the current canvas size"""
+        width, height = self.canvas_width, self.canvas_height
+        roll_label, pitch_label, yaw_label = self.label_items
+        self.canvas.coords(roll_label, width - 50, height / 2)
+        self.canvas.coords(pitch_label, width / 2, height - 20)
+        self.canvas.coords(yaw_label, 20, height / 2)
+    
+    def _apply_scene_colors(self):
+        """Recolor the existing scene items after a theme change"""
+        colors = self.colors.current
+        for item in self.edge_items:
+            self.canvas.itemconfig(item, fill=colors["cube_lines"])
+        for item, key in zip(self.axis_items, ("axis_x", "axis_y", "axis_z")):
+            self.canvas.itemconfig(item, fill=colors[key])
+        for item, key in zip(self.label_items, ("axis_x", "axis_y", "axis_z")):
+            self.canvas.itemconfig(item, fill=colors[key])
+    
     def draw_orientation(self, pitch, roll, yaw):
         """Draw a simple 3D representation of the sensor orientation"""
-        self.canvas.delete("all")
+        start = time.perf_counter()
         
         # Canvas dimensions
-        width = self.canvas.winfo_width()
-        height = self.canvas.winfo_height()
+        width = self.canvas_width
+        height = self.canvas_height
         center_x = width / 2
         center_y = height / 2
         
@@ -624,94 +1300,41 @@ class SensorGUI:
         roll_rad = math.radians(roll)
         yaw_rad = math.radians(yaw)
         
-        # Draw a simple cube representation
+        # Move the cube and axes into place
         self._draw_cube(center_x, center_y, size, pitch_rad, roll_rad, yaw_rad)
         
-        # Draw axes labels with the current theme colors
-        self.canvas.create_text(width - 50, center_y, text="Roll", fill=self.colors.current["axis_x"])
-        self.canvas.create_text(center_x, height - 20, text="Pitch", fill=self.colors.current["axis_y"])
-        self.canvas.create_text(20, center_y, text="Yaw", fill=self.colors.current["axis_z"])
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.draw_time_ms += 0.05 * (elapsed_ms - self.draw_time_ms)
     
     def _draw_cube(self, cx, cy, size, pitch, roll, yaw):
-        """Draw a cube rotated according to the given angles"""
-        # Define the cube vertices in 3D space
-        vertices = [
-            [-1, -1, -1], [1, -1, -1], [1, 1, -1], [-1, 1, -1],
-            [-1, -1, 1], [1, -1, 1], [1, 1, 1], [-1, 1, 1]
-        ]
-        
-        # Apply rotations
-        rotated = []
-        for v in vertices:
-            # Apply yaw, pitch, roll rotations (in that order)
-            x, y, z = self._rotate_point(v[0], v[1], v[2], pitch, roll, yaw)
-            
-            # Project to 2D and scale
-            screen_x = cx + x * size
-            screen_y = cy - z * size  # Invert y for screen coordinates
-            
-            rotated.append((screen_x, screen_y))
-        
-        # Draw the cube edges
-        edges = [
-            (0, 1), (1, 2), (2, 3), (3, 0),  # Back face
-            (4, 5), (5, 6), (6, 7), (7, 4),  # Front face
-            (0, 4), (1, 5), (2, 6), (3, 7)   # Connecting edges
-        ]
-        
-        # Draw each edge
-        for edge in edges:
-            self.canvas.create_line(
-                rotated[edge[0]][0], rotated[edge[0]][1],
-                rotated[edge[1]][0], rotated[edge[1]][1],
-                width=2,
-                fill=self.colors.current["cube_lines"]
-            )
-        
-        # Draw colored axes
-        origin = self._rotate_point(0, 0, 0, pitch, roll, yaw)
-        origin_x = cx + origin[0] * size
-        origin_y = cy - origin[2] * size
-        
-        # X axis (red)
-        x_end = self._rotate_point(1.5, 0, 0, pitch, roll, yaw)
-        self.canvas.create_line(
-            origin_x, origin_y,
-            cx + x_end[0] * size, cy - x_end[2] * size,
-            width=3, fill=self.colors.current["axis_x"], arrow=tk.LAST
-        )
-        
-        # Y axis (green)
-        y_end = self._rotate_point(0, 1.5, 0, pitch, roll, yaw)
-        self.canvas.create_line(
-            origin_x, origin_y,
-            cx + y_end[0] * size, cy - y_end[2] * size,
-            width=3, fill=self.colors.current["axis_y"], arrow=tk.LAST
-        )
-        
-        # Z axis (blue)
-        z_end = self._rotate_point(0, 0, 1.5, pitch, roll, yaw)
-        self.canvas.create_line(
-            origin_x, origin_y,
-            cx + z_end[0] * size, cy - z_end[2] * size,
-            width=3, fill=self.colors.current["axis_z"], arrow=tk.LAST
-        )
+        """Update the cube and axes items for the given angles"""
+        # Rotate every scene point with one matrix product; the view looks
+        # along Y, so only the X and Z rows of the rotation are needed
+        rotation = rotation_matrix(pitch, roll, yaw, out=self._rotation)
+        projected = self._projected
+        np.matmul(self.scene_points, rotation[::2].T, out=projected)
+        
+        # Scale and move to the canvas center (screen Y points down)
+        projected *= self._screen_scale(size)
+        projected += (cx, cy)
+        points = projected.tolist()
+        
+        # Move each edge
+        coords = self.canvas.coords
+        for item, (start, end) in zip(self.edge_items, CUBE_EDGES):
+            coords(item, *points[start], *points[end])
+        
+        # Move the colored axes (X red, Y green, Z blue)
+        origin = points[AXES_ORIGIN_INDEX]
+        for item, end in zip(self.axis_items, points[AXES_ORIGIN_INDEX + 1:]):
+            coords(item, *origin, *end)
     
-    def _rotate_point(self, x, y, z, pitch, roll, yaw):
-        """Apply 3D rotation to a point"""
-        # Yaw rotation (around Z axis)
-        x_yaw = x * math.cos(yaw) - y * math.sin(yaw)
-        y_yaw = x * math.sin(yaw) + y * math.cos(yaw)
-        
-        # Pitch rotation (around Y axis)
-        x_pitch = x_yaw * math.cos(pitch) + z * math.sin(pitch)
-        z_pitch = -x_yaw * math.sin(pitch) + z * math.cos(pitch)
-        
-        # Roll rotation (around X axis)
-        y_roll = y_yaw * math.cos(roll) - z_pitch * math.sin(roll)
-        z_roll = y_yaw * math.sin(roll) + z_pitch * math.cos(roll)
-        
-        return x_pitch, y_roll, z_roll
+    def _screen_scale(self, size):
+        """Per-axis scale from model units to canvas pixels, cached per size"""
+        if self._scale_size != size:
+            self._scale_size = size
+            self._scale[:] = (size, -size)
+        return self._scale
     
     def handle_error(self, error_msg):
         """Handle errors from the data thread"""
@@ -721,96 +1344,397 @@ class SensorGUI:
     def on_closing(self):
         """Clean up before closing the application"""
         self.running = False
+        if self.render_job:
+            self.root.after_cancel(self.render_job)
+            
+        if self.core:
+            self._stop_core()
+        if self.pipeline:
+            self.pipeline.stop()
         if self.data_thread:
             self.data_thread.join(timeout=1.0)
             
+        if self.serial_reader:
+            self.serial_reader.stop()
+            
         if self.serial_conn:
             self.serial_conn.close()
             
+        if self.recorder:
+            self.recorder.close()
+            
         if self.midi_controller:
+            self.midi_watcher.stop()
             self.midi_controller.close()
+        if self.osc:
+            print(self.osc.format_report())
+            self.osc.close()
+        self.config.flush()
+            
+        # The core process exports its own measurements
+        if self.latency is not None and self.latency_export and not self.midi_process:
+            try:
+                self.latency.export(self.latency_export)
+            except IOError as e:
+                print(f"Warning: Could not export latency data: {e}")
             
         self.root.destroy()
 
-def read_serial_data(force_select_midi=False):
-    # Configure the serial port
+class StartupProfile:
+    """Time taken by each startup step, printed with --startup-profile
+    
+    Steps are timed from the first line of this module, so interpreter
+    start-up itself is not included (python -X importtime breaks the
+    imports down further).
+    """
+    
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.steps = [("imports", IMPORT_END)]
+        self.reported = False
+    
+    def mark(self, step):
+        """Record that step has just finished"""
+        if self.enabled and not self.reported:
+            self.steps.append((step, time.perf_counter()))
+    
+    def report(self):
+        """Print the steps once - at the first output, or on exit if there was none"""
+        if not self.enabled or self.reported:
+            return
+        self.reported = True
+        print("Startup profile:")
+        previous = IMPORT_START
+        for step, t in self.steps:
+            print(f"  {step:<16} {(t - previous) * 1000:8.1f} ms")
+            previous = t
+        print(f"  {'total':<16} {(previous - IMPORT_START) * 1000:8.1f} ms")
+
+
+def print_reconnects(source_stats, midi_stats=None):
+    """Console summary of the ports that were unplugged and reconnected"""
+    if source_stats.get('disconnects'):
+        line = f"Serial disconnects: {source_stats['disconnects']}, reconnects: {source_stats['reconnects']}"
+        if source_stats['last_outage_ms'] is not None:
+            line += (f", last outage {source_stats['last_outage_ms']:.0f} ms "
+                     f"(reconnect {source_stats['last_reconnect_ms']:.0f} ms)")
+        print(line)
+    if midi_stats and midi_stats['midi_disconnects']:
+        line = f"MIDI disconnects: {midi_stats['midi_disconnects']}, reconnects: {midi_stats['midi_reconnects']}"
+        if midi_stats['midi_last_outage_ms'] is not None:
+            line += f", last outage {midi_stats['midi_last_outage_ms']:.0f} ms"
+        print(line)
+
+
+def open_console_port(baudrate=DEFAULT_BAUD_RATE, port=None, interactive=True, config=None):
+    """Open the given serial port, or ask for one on the console
+    
+    Without a port, the device saved in config is looked up by its USB
+    identity, then by its last port name, then COM6 is tried. The port
+    opened is saved to config, if given, for the next start.
+    """
+    if port is None and config is not None:
+        identity = PortIdentity.from_dict(config.get('serial_device'))
+        port = find_port(identity, config.get('serial_port')) or config.get('serial_port')
+    port = port or 'COM6'
+    try:
+        ser = serial.Serial(
+            port=port,
+            baudrate=baudrate,
+            timeout=1
+        )
+        if config is not None:
+            remember_port(config, port)
+        return ser
+    except serial.SerialException as e:
+        print(f"Failed to open port {port}: {e}")
+    if not interactive:
+        return None
+    
     while True:
+        print("\nAvailable ports:")
+        try:
+            ports = list(serial.tools.list_ports.comports())
+            for i, port in enumerate(ports):
+                print(f"{i}: {port.device} - {port.description}")
+        except ImportError:
+            print("Could not list available ports. Please check your connection and try again.")
+            return None
+        
+        try:
+            choice = int(input("\nSelect port number (or -1 to exit): "))
+        except ValueError:
+            print("Please enter a number.")
+            continue
+        if choice == -1:
+            return None
+        if not 0 <= choice < len(ports):
+            print("Invalid selection. Please try again.")
+            continue
+        
+        port = ports[choice].device
         try:
             ser = serial.Serial(
-                port='COM6',
-                baudrate=115200,
+                port=port,
+                baudrate=baudrate,
                 timeout=1
             )
-            break
+            print(f"Successfully opened port {port}")
+            if config is not None:
+                remember_port(config, port)
+            return ser
         except serial.SerialException as e:
-            print(f"Failed to open port com7: {e}")
-            print("\nAvailable ports:")
-            try:
-                ports = list(serial.tools.list_ports.comports())
-                for i, port in enumerate(ports):
-                    print(f"{i}: {port.device} - {port.description}")
-                
-                while True:
-                    try:
-                        choice = int(input("\nSelect port number (or -1 to exit): "))
-                        if choice == -1:
-                            return
-                        if 0 <= choice < len(ports):
-                            port = ports[choice].device
-                            try:
-                                ser = serial.Serial(
-                                    port=port,
-                                    baudrate=115200,
-                                    timeout=1
-                                )
-                                print(f"Successfully opened port {port}")
-                                break
-                            except serial.SerialException as e:
-                                print(f"Failed to open port {port}: {e}")
-                        else:
-                            print("Invalid selection. Please try again.")
-                    except ValueError:
-                        print("Please enter a number.")
-            except ImportError:
-                print("Could not list available ports. Please check your connection and try again.")
-                return
+            print(f"Failed to open port {port}: {e}")
+
+def start_output_scheduler(midi_controller, tick_rate, clock_port, clock_division):
+    """Clock-driven MIDI output if a tick rate or clock input was given; False (port closed) on failure"""
+    if not tick_rate and not clock_port:
+        return True
+    try:
+        midi_controller.start_scheduler(tick_rate or DEFAULT_TICK_RATE, clock_port, clock_division)
+    except ValueError as e:
+        print(e)
+        midi_controller.close()
+        return False
+    if clock_port:
+        print(f"MIDI output follows the clock from {clock_port}")
+    else:
+        print(f"MIDI output on a {tick_rate:g} Hz tick")
+    return True
+
+def read_serial_data(force_select_midi=False, max_cc_rate=DEFAULT_MAX_CC_RATE, output_mode=MODE_7BIT,
+                     baudrate=DEFAULT_BAUD_RATE, serial_protocol=PROTOCOL_AUTO, filter_specs=None,
+                     latency=False, latency_export=None, record_path=None, replay_path=None,
+                     replay_speed=1.0, output_rate=DEFAULT_OUTPUT_RATE, resample_mode=RESAMPLE_MEAN,
+                     websocket_url=None, config=None, profile=None, serial_port=None, midi_port=None,
+                     interactive=True, startup=None, status_rate=DEFAULT_STATUS_RATE, log_path=None,
+                     log_queue_size=DEFAULT_LOG_QUEUE_SIZE, tick_rate=None, clock_port=None,
+                     clock_division=DEFAULT_CLOCK_DIVISION, osc_target=None, osc_prefix=DEFAULT_OSC_PREFIX,
+                     midi=True):
+    """Console mode; returns an exit status (1 if it could not start)
+    
+    osc_target is a (host, port) to send OSC bundles to as well; without
+    midi they are the only output and no MIDI port is opened.
+    """
+    if config is None:
+        config = ConfigStore()
+    startup = startup or StartupProfile()
+    
+    # Configure the serial port, or replay a recorded session instead
+    ser = None
+    if replay_path:
+        try:
+            reader = ReplaySource(replay_path, speed=replay_speed)
+        except (IOError, ValueError) as e:
+            print(f"Cannot replay {replay_path}: {e}")
+            return 1
+    elif websocket_url:
+        try:
+            from websocket_source import WebSocketSource
+            reader = WebSocketSource(websocket_url)
+        except ImportError as e:
+            print(e)
+            return 1
+        print(f"Receiving from {websocket_url}")
+    else:
+        ser = open_console_port(baudrate, serial_port, interactive, config)
+        if ser is None:
+            return 1
+    startup.mark("input")
     
     # Initialize MIDI controller
-    midi_controller = MIDIController(force_select=force_select_midi)
+    midi_controller = None
+    if midi:
+        try:
+            midi_controller = MIDIController(force_select=force_select_midi, max_cc_rate=max_cc_rate,
+                                             output_mode=output_mode, config=config, profile=profile,
+                                             midi_port=midi_port, interactive=interactive)
+        except ValueError as e:
+            print(e)
+            if ser:
+                ser.close()
+            return 1
+        if not start_output_scheduler(midi_controller, tick_rate, clock_port, clock_division):
+            if ser:
+                ser.close()
+            return 1
+        startup.mark("MIDI port")
     
-    # Buffers for smoothing
-    roll_buffer = []
-    yaw_buffer = []
+    # Float orientation over OSC, alongside MIDI or instead of it
+    osc = None
+    if osc_target:
+        try:
+            osc = OSCSink(*osc_target, prefix=osc_prefix)
+        except (OSError, ValueError) as e:
+            print(f"Cannot send OSC to {osc_target[0]}:{osc_target[1]}: {e}")
+            if midi_controller is not None:
+                midi_controller.close()
+            if ser:
+                ser.close()
+            return 1
+        print(f"Sending OSC to {osc.host}:{osc.port} under {osc.prefix or '/'}")
+        startup.mark("OSC socket")
+    if midi_controller is not None:
+        mapper = sink = midi_controller
+    else:
+        # The profile's curves still give the values on the status line
+        mapping = Mapping(profile or MappingProfile(), max_value_for_mode(output_mode))
+        mapper, sink = AxisMapper(mapping.pitch, mapping.roll, mapping.yaw), NullSink()
+    
+    # Per-axis smoothing filters
+    filters = FilterBank(filter_specs)
+    
+    # Optional serial-to-MIDI latency instrumentation (None when disabled)
+    latency = LatencyTracker() if latency else None
+    
+    if ser:
+        # Reopens the device if it is unplugged, with the pipeline left running
+        reader = ReconnectingSerialReader(ser, protocol=serial_protocol, latency=latency)
+    ring = reader.ring
+    midi_watcher = None
+    if midi_controller is not None:
+        midi_watcher = MidiPortWatcher(midi_controller.port_name, midi_controller.reopen_port)
+    
+    # Optional recording of the raw samples
+    recorder = SessionRecorder(record_path) if record_path else None
+    
+    # Status line and optional structured log, written off the pipeline thread
+    status = ConsoleStatus(reader, rate=status_rate, log_path=log_path, log_queue_size=log_queue_size)
+    
+    def show_sample(pitch, roll, yaw, midi_pitch, midi_roll, midi_yaw, read_time):
+        if not startup.reported:
+            startup.mark("first output")
+            startup.report()
+        status.update(pitch, roll, yaw, midi_pitch, midi_roll, midi_yaw, read_time)
+    
+    # Same processing pipeline as the GUI
+    pipeline = Pipeline(reader, mapper, sink, filters=filters,
+                        resampler=Resampler(output_rate, resample_mode), recorder=recorder,
+                        latency=latency, on_output=show_sample, on_bad_frame=status.bad_frame,
+                        motion=MotionTracker(), osc=osc)
+    startup.mark("pipeline")
     
     try:
-        ser.reset_input_buffer()
-        
-        while True:
-            if ser.in_waiting > 0:
-                line = ser.readline().decode('utf-8').strip()
+        if ser:
+            ser.reset_input_buffer()
+        reader.start()
+        if midi_watcher is not None:
+            midi_watcher.start()
+        status.start()
+        pipeline.run()
+    
+    except ReplayFinished as e:
+        print(e)
+    except (serial.SerialException, OSError) as e:
+        print(f"Serial error: {e}")
+    except KeyboardInterrupt:
+        print("\nStopping serial reader...")
+    finally:
+        status.stop()
+        startup.report()
+        reader.stop()
+        if midi_watcher is not None:
+            midi_watcher.stop()
+        stats = status.stats()
+        print(f"Outputs: {stats['outputs']}, bad frames: {stats['bad_frames']}")
+        if log_path:
+            print(f"Logged {stats['logged']} records to {log_path} ({stats['dropped']} dropped)")
+        if midi_controller is not None:
+            stats = midi_controller.output.stats()
+            print(f"MIDI messages sent: {stats['sent']}, suppressed: {stats['suppressed']} "
+                  f"({stats['duplicates']} unchanged, {stats['coalesced']} coalesced)")
+        if osc is not None:
+            print(osc.format_report())
+        stats = reader.stats()
+        print(f"Serial frames ({stats['protocol']}): {stats['frames']}, parse errors: {stats['parse_errors']}, "
+              f"CRC errors: {stats['crc_errors']}, lost records: {stats['sequence_gaps']}")
+        print(f"Ring buffer overflows: {stats['overflows']}, underflows: {stats['underflows']}")
+        print_reconnects(stats, midi_watcher.stats() if midi_watcher is not None else None)
+        if midi_controller is not None and midi_controller.scheduler is not None:
+            print(midi_controller.scheduler.format_report())
+        if latency is not None:
+            print("\nLatency since serial read:")
+            print(latency.format_report())
+            if latency_export:
                 try:
-                    # Parse the comma-separated angle values
-                    yaw, pitch, roll = map(float, line.split(','))
-                    
-                    # Apply smoothing to roll and yaw
-                    smoothed_roll = smooth_value(roll_buffer, roll)
-                    smoothed_yaw = smooth_value(yaw_buffer, yaw)
-                    
-                    print(f"Pitch: {pitch:.2f}°, Roll: {smoothed_roll:.2f}°, Yaw: {smoothed_yaw:.2f}°")
-                    
-                    # Send MIDI CC messages
-                    midi_controller.send_controller_change(midi_controller.PITCH_CC, pitch)
-                    midi_controller.send_controller_change(midi_controller.ROLL_CC, smoothed_roll)
-                    midi_controller.send_controller_change(midi_controller.YAW_CC, smoothed_yaw)
-                    
-                except ValueError as e:
-                    print(f"Error parsing data: {line}")
+                    latency.export(latency_export)
+                    print(f"Latency data written to {latency_export}")
+                except IOError as e:
+                    print(f"Warning: Could not export latency data: {e}")
+        if recorder is not None:
+            recorder.close()
+            print(f"Recorded {recorder.count} samples to {recorder.path}")
+        if osc is not None:
+            osc.close()
+        if midi_controller is not None:
+            midi_controller.close()
+        else:
+            config.flush()
+        if ser:
+            ser.close()
 
+def run_devices(device_specs, force_select_midi=False, max_cc_rate=DEFAULT_MAX_CC_RATE,
+                output_mode=MODE_7BIT, baudrate=DEFAULT_BAUD_RATE, serial_protocol=PROTOCOL_AUTO,
+                filter_specs=None, output_rate=DEFAULT_OUTPUT_RATE, resample_mode=RESAMPLE_MEAN,
+                latency=False, config=None, profile=None, midi_port=None, interactive=True,
+                startup=None, tick_rate=None, clock_port=None, clock_division=DEFAULT_CLOCK_DIVISION,
+                osc_target=None, osc_prefix=DEFAULT_OSC_PREFIX):
+    """Console mode for several controllers at once, each on its own channel / CC block"""
+    from device_hub import DeviceHub
+    startup = startup or StartupProfile()
+    
+    # Devices use the profile's curve, with their own channel and CC block
+    try:
+        midi_controller = MIDIController(force_select=force_select_midi, max_cc_rate=max_cc_rate,
+                                         output_mode=output_mode, config=config, profile=profile,
+                                         midi_port=midi_port, interactive=interactive)
+    except ValueError as e:
+        print(e)
+        return 1
+    if not start_output_scheduler(midi_controller, tick_rate, clock_port, clock_division):
+        return 1
+    startup.mark("MIDI port")
+    hub = DeviceHub(midi_controller, midi_controller.sender, filter_specs=filter_specs,
+                    output_rate=output_rate, resample_mode=resample_mode, latency=latency,
+                    osc_target=osc_target, osc_prefix=osc_prefix)
+    try:
+        for spec in device_specs:
+            device = hub.add_spec(spec, baudrate=baudrate, protocol=serial_protocol)
+            line = f"Device {device.name}: channel {device.channel + 1}, CC {device.cc_base}-{device.cc_base + 2}"
+            if device.osc is not None:
+                line += f", OSC {device.osc.prefix}"
+            print(line)
+    except (serial.SerialException, OSError, ValueError, ImportError) as e:
+        print(f"Cannot attach device: {e}")
+        hub.stop()
+        midi_controller.close()
+        return 1
+    startup.mark("devices")
+    
+    midi_watcher = MidiPortWatcher(midi_controller.port_name, midi_controller.reopen_port)
+    
+    try:
+        hub.start()
+        midi_watcher.start()
+        startup.mark("started")
+        startup.report()
+        while hub.running:
+            time.sleep(2.0)
+            print(hub.format_report())
+            print()
     except KeyboardInterrupt:
-        print("\nStopping serial reader...")
+        print("\nStopping devices...")
     finally:
+        hub.stop()
+        midi_watcher.stop()
+        print(hub.format_report())
+        stats = midi_controller.output.stats()
+        print(f"MIDI messages sent: {stats['sent']}, suppressed: {stats['suppressed']} "
+              f"({stats['duplicates']} unchanged, {stats['coalesced']} coalesced)")
+        print_reconnects({}, midi_watcher.stats())
+        if midi_controller.scheduler is not None:
+            print(midi_controller.scheduler.format_report())
         midi_controller.close()
-        ser.close()
 
 def main():
     parser = argparse.ArgumentParser(description='6DOF MIDI Controller')
@@ -818,15 +1742,181 @@ def main():
                       help='Force MIDI port selection menu')
     parser.add_argument('--no-gui', action='store_true',
                       help='Run in console mode without GUI')
+    parser.add_argument('--max-cc-rate', type=float, default=DEFAULT_MAX_CC_RATE,
+                      help='Maximum MIDI messages per second per controller (0 = unlimited)')
+    parser.add_argument('--midi-mode', choices=OUTPUT_MODES, default=MODE_7BIT,
+                      help='MIDI output resolution: 7-bit CC, 14-bit CC pairs (CC n/n+32) or NRPN')
+    parser.add_argument('--baud', type=int, default=DEFAULT_BAUD_RATE,
+                      help='Serial baud rate (must match the slave firmware)')
+    parser.add_argument('--serial-protocol', choices=PROTOCOLS, default=PROTOCOL_AUTO,
+                      help='Serial data format: text lines, COBS framed binary records, or auto-detect')
+    for axis in ('pitch', 'roll', 'yaw'):
+        parser.add_argument(f'--{axis}-filter', default=DEFAULT_FILTERS[axis], metavar='SPEC',
+                          help=f'Smoothing for {axis}: none, ma:N, ema:ALPHA, oneeuro:MIN_CUTOFF[,BETA] '
+                               f'or median:N (default {DEFAULT_FILTERS[axis]})')
+    parser.add_argument('--rate', type=float, default=DEFAULT_OUTPUT_RATE,
+                      help=f'Processing and MIDI output rate in Hz (default {DEFAULT_OUTPUT_RATE})')
+    parser.add_argument('--resample', choices=RESAMPLE_MODES, default=RESAMPLE_MEAN,
+                      help='How samples arriving within one processing tick are combined')
+    parser.add_argument('--fps', type=float, default=DEFAULT_RENDER_FPS,
+                      help=f'Maximum GUI redraw rate (default {DEFAULT_RENDER_FPS})')
+    parser.add_argument('--plot-fps', type=float, default=DEFAULT_PLOT_FPS,
+                      help=f'History plot redraw rate, 0 to hide the plot (default: {DEFAULT_PLOT_FPS})')
+    parser.add_argument('--latency', action='store_true',
+                      help='Measure per-stage latency from serial read to MIDI send and GUI paint')
+    parser.add_argument('--latency-export', metavar='FILE',
+                      help='Write latency data to a .csv or .json file on exit (implies --latency)')
+    parser.add_argument('--record', metavar='FILE',
+                      help='Record the raw sensor samples of this session to FILE '
+                           '(FILE-1, FILE-2, ... if it exists - recordings are never overwritten)')
+    parser.add_argument('--replay', metavar='FILE',
+                      help='Replay a recorded session instead of reading the serial port')
+    parser.add_argument('--websocket', nargs='?', const='', metavar='URL',
+                      help='Read the master over WebSocket instead of the serial port '
+                           '(default URL: the master\'s access point, ws://192.168.4.1:81)')
+    parser.add_argument('--device', action='append', metavar='SPEC',
+                      help='Attach a controller: PORT_OR_URL[,channel=N][,cc=N]. Repeat for several '
+                           'devices (console mode, channels 1, 2, ... and CC 16-18 by default)')
+    parser.add_argument('--midi-process', action='store_true',
+                      help='Run acquisition and MIDI output in a separate process so GUI stalls '
+                           'cannot delay MIDI (GUI mode)')
+    parser.add_argument('--replay-speed', type=float, default=1.0,
+                      help='Replay speed multiplier (0 = as fast as possible)')
+    parser.add_argument('--profile', metavar='NAME',
+                      help='Mapping profile to start with, from "profiles" in the settings file '
+                           '(remembered; the GUI can switch while running)')
+    parser.add_argument('--port', metavar='PORT',
+                      help='Serial port to open (console mode; preselected in the GUI). '
+                           'Defaults to the last port picked on the console')
+    parser.add_argument('--midi-port', metavar='NAME',
+                      help='MIDI output port to use instead of the saved one')
+    parser.add_argument('--non-interactive', action='store_true',
+                      help='Never prompt on the console: exit with an error if the serial or MIDI port '
+                           'cannot be opened (for supervisors; implied when stdin is not a terminal)')
+    parser.add_argument('--startup-profile', action='store_true',
+                      help='Print how long imports and each startup step took')
+    parser.add_argument('--status-rate', type=float, default=DEFAULT_STATUS_RATE,
+                      help=f'Console status line refresh rate in Hz (default: {DEFAULT_STATUS_RATE:g})')
+    parser.add_argument('--log', metavar='FILE',
+                      help='Console mode: write every output sample and bad frame to FILE as JSON lines')
+    parser.add_argument('--log-queue', type=int, default=DEFAULT_LOG_QUEUE_SIZE, metavar='N',
+                      help='Records --log may fall behind by before new ones are dropped '
+                           f'(default: {DEFAULT_LOG_QUEUE_SIZE})')
+    parser.add_argument('--tick-rate', type=float, metavar='HZ',
+                      help='Send MIDI on a fixed clock from its own thread, e.g. 200 or 1000, instead of '
+                           f'with each sample (default with --midi-clock: {DEFAULT_TICK_RATE:g})')
+    parser.add_argument('--midi-clock', metavar='PORT',
+                      help='Time MIDI output by the MIDI clock received on this input port, '
+                           'falling back to --tick-rate while it is stopped')
+    parser.add_argument('--clock-division', type=int, default=DEFAULT_CLOCK_DIVISION, metavar='N',
+                      help=f'MIDI output ticks per clock pulse (default: {DEFAULT_CLOCK_DIVISION}, '
+                           '24 pulses per quarter note)')
+    parser.add_argument('--osc', nargs='?', const='', metavar='HOST:PORT',
+                      help='Also send the angles and motion values as float OSC bundles over UDP '
+                           '(default target: 127.0.0.1:9000)')
+    parser.add_argument('--osc-prefix', default=DEFAULT_OSC_PREFIX, metavar='ADDRESS',
+                      help=f'Address the OSC messages go under (default: {DEFAULT_OSC_PREFIX}; '
+                           'devices add /1, /2, ...)')
+    parser.add_argument('--no-midi', action='store_true',
+                      help='Console mode: send OSC only, without opening a MIDI port')
     args = parser.parse_args()
+    startup = StartupProfile(args.startup_profile)
+    startup.mark("arguments")
+    
+    filter_specs = {'pitch': args.pitch_filter, 'roll': args.roll_filter, 'yaw': args.yaw_filter}
+    try:
+        FilterBank(filter_specs)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.rate <= 0:
+        parser.error("--rate must be positive")
+    if args.fps <= 0:
+        parser.error("--fps must be positive")
+    if args.plot_fps < 0:
+        parser.error("--plot-fps must not be negative")
+    if args.status_rate <= 0:
+        parser.error("--status-rate must be positive")
+    if args.log_queue <= 0:
+        parser.error("--log-queue must be positive")
+    if args.tick_rate is not None and args.tick_rate <= 0:
+        parser.error("--tick-rate must be positive")
+    if args.clock_division < 1:
+        parser.error("--clock-division must be at least 1")
+    osc_target = None
+    if args.osc is not None:
+        try:
+            osc_target = parse_osc_target(args.osc)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.osc_prefix and not args.osc_prefix.startswith('/'):
+        parser.error("--osc-prefix must start with '/'")
+    if args.no_midi and (not args.no_gui or args.device):
+        parser.error("--no-midi works in console mode only (--no-gui without --device)")
+    if args.no_midi and osc_target is None:
+        parser.error("--no-midi needs --osc")
+    latency = args.latency or bool(args.latency_export)
+    if args.replay_speed < 0:
+        parser.error("--replay-speed must not be negative")
+    interactive = not args.non_interactive and sys.stdin is not None and sys.stdin.isatty()
+    if args.select_midi and not interactive and (args.no_gui or args.device):
+        parser.error("--select-midi needs an interactive console")
+    websocket_url = args.websocket
+    if websocket_url == '':
+        from websocket_source import DEFAULT_URL
+        websocket_url = DEFAULT_URL
+    
+    config = ConfigStore()
+    profiles = ProfileStore(config)
+    if args.profile:
+        try:
+            profiles.set_active(args.profile)
+        except ValueError as e:
+            parser.error(f"{e} (available: {', '.join(profiles.names())})")
+    profile = profiles.get(profiles.active)
+    startup.mark("settings")
     
-    if args.no_gui:
+    if args.device:
+        # Several controllers at once, headless
+        return run_devices(args.device, force_select_midi=args.select_midi, max_cc_rate=args.max_cc_rate,
+                           output_mode=args.midi_mode, baudrate=args.baud,
+                           serial_protocol=args.serial_protocol, filter_specs=filter_specs,
+                           output_rate=args.rate, resample_mode=args.resample, latency=latency,
+                           config=config, profile=profile, midi_port=args.midi_port,
+                           interactive=interactive, startup=startup, tick_rate=args.tick_rate,
+                           clock_port=args.midi_clock, clock_division=args.clock_division,
+                           osc_target=osc_target, osc_prefix=args.osc_prefix)
+    elif args.no_gui:
         # Run in console mode
-        read_serial_data(force_select_midi=args.select_midi)
+        return read_serial_data(force_select_midi=args.select_midi, max_cc_rate=args.max_cc_rate,
+                                output_mode=args.midi_mode, baudrate=args.baud,
+                                serial_protocol=args.serial_protocol, filter_specs=filter_specs,
+                                latency=latency, latency_export=args.latency_export,
+                                record_path=args.record, replay_path=args.replay,
+                                replay_speed=args.replay_speed, output_rate=args.rate,
+                                resample_mode=args.resample, websocket_url=websocket_url,
+                                config=config, profile=profile, serial_port=args.port,
+                                midi_port=args.midi_port, interactive=interactive, startup=startup,
+                                status_rate=args.status_rate, log_path=args.log,
+                                log_queue_size=args.log_queue, tick_rate=args.tick_rate,
+                                clock_port=args.midi_clock, clock_division=args.clock_division,
+                                osc_target=osc_target, osc_prefix=args.osc_prefix, midi=not args.no_midi)
     else:
         # Run GUI mode
+        import_gui()
+        startup.mark("GUI imports")
         root = tk.Tk()
-        app = SensorGUI(root)
+        app = SensorGUI(root, max_cc_rate=args.max_cc_rate, output_mode=args.midi_mode,
+                        baudrate=args.baud, serial_protocol=args.serial_protocol,
+                        filter_specs=filter_specs, output_rate=args.rate, resample_mode=args.resample,
+                        render_fps=args.fps, latency=latency, latency_export=args.latency_export,
+                        record_path=args.record, replay_path=args.replay,
+                        replay_speed=args.replay_speed, websocket_url=websocket_url,
+                        midi_process=args.midi_process, config=config,
+                        serial_port=args.port, midi_port=args.midi_port, tick_rate=args.tick_rate,
+                        clock_port=args.midi_clock, clock_division=args.clock_division,
+                        plot_fps=args.plot_fps, osc_target=osc_target, osc_prefix=args.osc_prefix)
+        startup.mark("window")
+        root.after_idle(startup.report)
         if args.select_midi:
             app.select_midi_port()
         root.mainloop()
@@ -834,4 +1924,4 @@ def main():
 if __name__ == "__main__":
     if len(sys.argv) > 1 and sys.argv[1] == "--no-gui":
         print("Starting serial reader with MIDI output... Press Ctrl+C to stop.")
-    main()
+    sys.exit(main())
@@ -0,0 +1,202 @@
+import mmap
+import struct
+import threading
+import time
+from pathlib import Path
+
+from serial_io import FrameRingBuffer
+
+# File layout: one header followed by fixed-size little-endian records
+#   header: magic, version, record size, wall clock start time (UNIX seconds)
+#   record: seconds since the first sample, yaw, pitch, roll
+FILE_MAGIC = b'6DOFREC\0'
+FILE_VERSION = 1
+HEADER_FORMAT = struct.Struct('<8sHHd')
+RECORD_FORMAT = struct.Struct('<dfff')
+
+# Records buffered in memory before each write
+WRITE_BATCH = 256
+
+
+class ReplayFinished(Exception):
+    """Raised by consumers of a ReplaySource when the recording has ended"""
+
+
+class SessionRecorder:
+    """Writes raw sensor samples with their timestamps to a session file
+
+    An existing file is never overwritten: when path is taken the recording
+    goes to name-1.rec, name-2.rec, ... instead, and self.path is the file
+    actually written.
+    """
+
+    def __init__(self, path):
+        path = Path(path)
+        candidate = path
+        number = 0
+        while True:
+            try:
+                self.file = open(candidate, 'xb')
+                break
+            except FileExistsError:
+                number += 1
+                candidate = path.with_name(f"{path.stem}-{number}{path.suffix}")
+        self.path = str(candidate)
+        self.file.write(HEADER_FORMAT.pack(FILE_MAGIC, FILE_VERSION, RECORD_FORMAT.size, time.time()))
+        self._batch = bytearray(RECORD_FORMAT.size * WRITE_BATCH)
+        self._batch_count = 0
+        self._start = None
+        self.count = 0
+
+    def record(self, yaw, pitch, roll, read_time):
+        """Append one sample - read_time is the time.perf_counter() it arrived at"""
+        if self._start is None:
+            self._start = read_time
+        RECORD_FORMAT.pack_into(self._batch, self._batch_count * RECORD_FORMAT.size,
+                                read_time - self._start, yaw, pitch, roll)
+        self._batch_count += 1
+        self.count += 1
+        if self._batch_count == WRITE_BATCH:
+            self.flush()
+
+    def flush(self):
+        if self._batch_count:
+            self.file.write(memoryview(self._batch)[:self._batch_count * RECORD_FORMAT.size])
+            self._batch_count = 0
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+
+class SessionFile:
+    """Memory-mapped, read-only view of a session file
+
+    Records are unpacked on access, so the file is never loaded into memory
+    as a whole - the OS pages in what is being replayed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        try:
+            self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.file.close()
+            raise ValueError(f"{path} is empty") from None
+
+        if len(self.mm) < HEADER_FORMAT.size:
+            self.close()
+            raise ValueError(f"{path} is not a session recording")
+        magic, version, record_size, self.start_time = HEADER_FORMAT.unpack_from(self.mm, 0)
+        if magic != FILE_MAGIC or version != FILE_VERSION or record_size != RECORD_FORMAT.size:
+            self.close()
+            raise ValueError(f"{path} is not a supported session recording")
+        self.count = (len(self.mm) - HEADER_FORMAT.size) // RECORD_FORMAT.size
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        """Return (t, yaw, pitch, roll) for one record"""
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("record index out of range")
+        return RECORD_FORMAT.unpack_from(self.mm, HEADER_FORMAT.size + index * RECORD_FORMAT.size)
+
+    def __iter__(self):
+        return (record for record in RECORD_FORMAT.iter_unpack(
+            memoryview(self.mm)[HEADER_FORMAT.size:HEADER_FORMAT.size + self.count * RECORD_FORMAT.size]))
+
+    @property
+    def duration(self):
+        return self[-1][0] if self.count else 0.0
+
+    def close(self):
+        if not self.mm.closed:
+            self.mm.close()
+        self.file.close()
+
+
+class ReplaySource:
+    """Plays a session file into a FrameRingBuffer like SerialFrameReader does
+
+    speed is a multiplier on the recorded timing (2.0 = twice as fast);
+    0 replays as fast as the consumer keeps up. Samples carry the replay time
+    as read_time, so latency and resampling behave as they do live.
+    """
+
+    def __init__(self, path, speed=1.0, loop=False, ring=None):
+        self.session = SessionFile(path)
+        self.speed = speed
+        self.loop = loop
+        self.ring = ring if ring is not None else FrameRingBuffer()
+        self.protocol = "replay"
+        self.running = False
+        self.error = None
+        self.thread = None
+
+        # Counters, matching SerialFrameReader.stats()
+        self.frames = 0
+        self.bytes_read = 0
+        self.parse_errors = 0
+        self.crc_errors = 0
+        self.sequence_gaps = 0
+
+    def start(self):
+        self.running = True
+        self.error = None
+        self.thread = threading.Thread(target=self._replay_loop, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=1.0)
+            self.thread = None
+        self.session.close()
+
+    def _replay_loop(self):
+        ring = self.ring
+        high_water = ring.capacity // 2
+
+        while self.running:
+            start = time.perf_counter()
+            for t, yaw, pitch, roll in self.session:
+                if not self.running:
+                    return
+                if self.speed > 0:
+                    # Sleep in short steps so stop() is never kept waiting by a gap
+                    delay = start + t / self.speed - time.perf_counter()
+                    while delay > 0 and self.running:
+                        time.sleep(min(delay, 0.05))
+                        delay = start + t / self.speed - time.perf_counter()
+                else:
+                    # As fast as possible, but never lap the consumer
+                    while len(ring) > high_water and self.running:
+                        ring.notify()
+                        time.sleep(0.001)
+                ring.push((yaw, pitch, roll, time.perf_counter()))
+                self.frames += 1
+                self.bytes_read += RECORD_FORMAT.size
+                if self.speed > 0:
+                    ring.notify()
+            ring.notify()
+            if not self.loop:
+                break
+
+        # Tell the consumer the recording is over once it has drained the ring
+        while self.running and len(ring):
+            time.sleep(0.01)
+        self.error = ReplayFinished(f"Replay of {self.session.path} finished")
+        self.running = False
+        ring.notify()
+
+    def stats(self):
+        stats = self.ring.stats()
+        stats.update(protocol=self.protocol, bytes_read=self.bytes_read, frames=self.frames,
+                     parse_errors=self.parse_errors, crc_errors=self.crc_errors,
+                     sequence_gaps=self.sequence_gaps)
+        return stats
@@ -40,6 +40,35 @@ float currentRoll = 0.0;
 unsigned long lastUpdateTime = 0;
 const unsigned long UPDATE_INTERVAL = 20; // 50Hz update rate
 
+// Serial output format
+// 0: "%.2f, %.2f, %.2f\n" text lines (yaw, pitch, roll)
+// 1: COBS framed binary records, each followed by a 0x00 delimiter
+#define SERIAL_BINARY_FRAMES 0
+const unsigned long SERIAL_BAUD = 115200;
+
+// Debug and status messages share the UART with the orientation data. Text
+// between binary records would corrupt them, so binary mode leaves it out
+#if SERIAL_BINARY_FRAMES
+#define DEBUG_PRINT(...)
+#define DEBUG_PRINTLN(...)
+#define DEBUG_PRINTF(...)
+#else
+#define DEBUG_PRINT(...) Serial.print(__VA_ARGS__)
+#define DEBUG_PRINTLN(...) Serial.println(__VA_ARGS__)
+#define DEBUG_PRINTF(...) Serial.printf(__VA_ARGS__)
+#endif
+
+// Binary record - little endian, must match RECORD_FORMAT in serial_io.py
+struct __attribute__((packed)) OrientationRecord {
+    uint16_t sequence;
+    uint32_t timestampMs;
+    float yaw;
+    float pitch;
+    float roll;
+    uint16_t crc;  // CRC-16/CCITT-FALSE over all fields above
+};
+uint16_t recordSequence = 0;
+
 // Function to map float values to DAC range (0-4095)
 uint16_t mapFloat(float x, float in_min, float in_max) {
     return (uint16_t)(((x - in_min) * 4095.0) / (in_max - in_min));
@@ -59,13 +88,72 @@ float smoothValue(float* buffer, float newValue) {
     return sum / BUFFER_SIZE;
 }
 
+// CRC-16/CCITT-FALSE (poly 0x1021, init 0xFFFF)
+uint16_t crc16Ccitt(const uint8_t* data, size_t length) {
+    uint16_t crc = 0xFFFF;
+    for (size_t i = 0; i < length; i++) {
+        crc ^= (uint16_t)data[i] << 8;
+        for (int bit = 0; bit < 8; bit++) {
+            crc = (crc & 0x8000) ? (crc << 1) ^ 0x1021 : crc << 1;
+        }
+    }
+    return crc;
+}
+
+// Consistent Overhead Byte Stuffing - output never contains 0x00
+size_t cobsEncode(const uint8_t* input, size_t length, uint8_t* output) {
+    size_t readIndex = 0;
+    size_t writeIndex = 1;
+    size_t codeIndex = 0;
+    uint8_t code = 1;
+
+    while (readIndex < length) {
+        if (input[readIndex] == 0) {
+            output[codeIndex] = code;
+            code = 1;
+            codeIndex = writeIndex++;
+        } else {
+            output[writeIndex++] = input[readIndex];
+            code++;
+            if (code == 0xFF) {
+                output[codeIndex] = code;
+                code = 1;
+                codeIndex = writeIndex++;
+            }
+        }
+        readIndex++;
+    }
+    output[codeIndex] = code;
+    return writeIndex;
+}
+
+// Send the current orientation in the configured serial format
+void sendOrientation(float yaw, float pitch, float roll) {
+#if SERIAL_BINARY_FRAMES
+    OrientationRecord record;
+    record.sequence = recordSequence++;
+    record.timestampMs = millis();
+    record.yaw = yaw;
+    record.pitch = pitch;
+    record.roll = roll;
+    record.crc = crc16Ccitt((const uint8_t*)&record, sizeof(record) - sizeof(record.crc));
+
+    uint8_t frame[sizeof(record) + 2];
+    size_t frameLength = cobsEncode((const uint8_t*)&record, sizeof(record), frame);
+    frame[frameLength++] = 0x00;
+    Serial.write(frame, frameLength);
+#else
+    Serial.printf("%.2f, %.2f, %.2f\n", yaw, pitch, roll);
+#endif
+}
+
 void webSocketEvent(WStype_t type, uint8_t * payload, size_t length) {
     switch(type) {
         case WStype_DISCONNECTED:
-            Serial.println("Disconnected!");
+            DEBUG_PRINTLN("Disconnected!");
             break;
         case WStype_CONNECTED:
-            Serial.println("Connected!");
+            DEBUG_PRINTLN("Connected!");
             // Clear buffer on new connection
             for (int i = 0; i < BUFFER_SIZE; i++) {
                 yawBuffer[i] = 0;
@@ -86,8 +174,8 @@ void webSocketEvent(WStype_t type, uint8_t * payload, size_t length) {
             DeserializationError error = deserializeJson(doc, payload);
             
             if (error) {
-                Serial.print("deserializeJson() failed: ");
-                Serial.println(error.c_str());
+                DEBUG_PRINT("deserializeJson() failed: ");
+                DEBUG_PRINTLN(error.c_str());
                 return;
             }
             
@@ -114,7 +202,7 @@ void webSocketEvent(WStype_t type, uint8_t * payload, size_t length) {
             mcp.setChannelValue(pitchChannel, pitchValue);  // Pitch
             mcp.setChannelValue(rollChannel, rollValue);    // Roll
             
-            Serial.printf("%.2f, %.2f, %.2f\n", currentYaw, currentPitch, currentRoll);
+            sendOrientation(currentYaw, currentPitch, currentRoll);
             break;
     }
 }
@@ -654,7 +742,7 @@ int channelToNum(MCP4728_channel_t channel) {
 }
 
 void setup() {
-    Serial.begin(115200);
+    Serial.begin(SERIAL_BAUD);
     Wire.begin();
 
     // Initialize LED pin
@@ -662,22 +750,22 @@ void setup() {
 
     // Initialize MCP4728
     if (!mcp.begin(0x64)) {
-        Serial.println("Failed to find MCP4728 chip");
+        DEBUG_PRINTLN("Failed to find MCP4728 chip");
         while (1) {
             delay(10);
         }
     }
-    Serial.println("MCP4728 Found!");
+    DEBUG_PRINTLN("MCP4728 Found!");
 
     // Connect to WiFi
     WiFi.begin(ssid, password);
     while (WiFi.status() != WL_CONNECTED) {
         delay(500);
-        Serial.print(".");
+        DEBUG_PRINT(".");
     }
-    Serial.println("\nConnected to AP");
-    Serial.print("IP Address: ");
-    Serial.println(WiFi.localIP());
+    DEBUG_PRINTLN("\nConnected to AP");
+    DEBUG_PRINT("IP Address: ");
+    DEBUG_PRINTLN(WiFi.localIP());
 
     // Setup web server routes
     server.on("/", HTTP_GET, [](AsyncWebServerRequest *request){
@@ -723,7 +811,7 @@ void setup() {
             mcp.setChannelValue(pitchChannel, pitchVal);
             mcp.setChannelValue(rollChannel, rollVal);
             
-            Serial.printf("Tested channel %d\n", channel);
+            DEBUG_PRINTF("Tested channel %d\n", channel);
             
             request->send(200, "application/json", "{\"success\":true}");
         } else {
@@ -753,7 +841,7 @@ void setup() {
             rollChannel = numToChannel(rollVal);
             
             // For debug
-            Serial.printf("Updated channel mapping: Yaw=%d, Pitch=%d, Roll=%d\n", 
+            DEBUG_PRINTF("Updated channel mapping: Yaw=%d, Pitch=%d, Roll=%d\n", 
                         yawVal, pitchVal, rollVal);
             
             request->send(200, "application/json", "{\"success\":true}");
@@ -0,0 +1,216 @@
+"""WebSocket input straight from the ESP32 master
+
+master.cpp broadcasts {"yaw": .., "pitch": .., "roll": ..} text frames on
+port 81 of its access point. WebSocketSource receives them on an asyncio
+loop in a background thread and pushes samples into a FrameRingBuffer like
+SerialFrameReader does, so the same pipeline consumes them.
+
+Needs the websockets package (pip install websockets). For testing without
+the hardware, a recorded session can be served the same way:
+
+    python websocket_source.py session.rec --port 8181
+    python serial_reader.py --websocket ws://localhost:8181
+"""
+import argparse
+import asyncio
+import json
+import math
+import threading
+import time
+
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+from serial_io import FrameRingBuffer
+
+# The master's access point address and WebSocket port
+DEFAULT_URL = "ws://192.168.4.1:81"
+
+# Reconnect backoff (seconds)
+RECONNECT_DELAY = 0.5
+MAX_RECONNECT_DELAY = 5.0
+
+# Keepalive ping interval; an unanswered ping drops the connection (seconds)
+PING_INTERVAL = 2.0
+
+
+def require_websockets():
+    if websockets is None:
+        raise ImportError("WebSocket input needs the websockets package (pip install websockets)")
+
+
+class WebSocketSource:
+    """Background asyncio client feeding master JSON frames into a FrameRingBuffer
+
+    Has the ring / error / start() / stop() / stats() interface of
+    SerialFrameReader. Lost connections are retried with exponential backoff
+    until stop() is called; error stays None meanwhile and connected tells
+    whether frames are currently arriving.
+    """
+
+    def __init__(self, url=DEFAULT_URL, ring=None, latency=None, reconnect_delay=RECONNECT_DELAY,
+                 max_reconnect_delay=MAX_RECONNECT_DELAY):
+        require_websockets()
+        self.url = url
+        self.ring = ring if ring is not None else FrameRingBuffer()
+        self.latency = latency  # optional latency.LatencyTracker
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.protocol = "websocket"
+        self.running = False
+        self.connected = False
+        self.error = None
+        self.thread = None
+        self._loop = None
+        self._task = None
+
+        # Counters, matching SerialFrameReader.stats()
+        self.bytes_read = 0
+        self.frames = 0
+        self.parse_errors = 0
+        self.crc_errors = 0
+        self.sequence_gaps = 0
+        self.connects = 0
+
+    def start(self):
+        self.running = True
+        self.error = None
+        self.thread = threading.Thread(target=self._thread_main, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        loop, task = self._loop, self._task
+        if loop is not None and task is not None:
+            try:
+                loop.call_soon_threadsafe(task.cancel)
+            except RuntimeError:
+                pass  # loop already closed
+        if self.thread:
+            self.thread.join(timeout=1.0)
+            self.thread = None
+
+    def _thread_main(self):
+        loop = asyncio.new_event_loop()
+        self._loop = loop
+        try:
+            self._task = loop.create_task(self.serve())
+            loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            self.error = e
+            self.ring.notify()
+        finally:
+            self.running = False
+            self.connected = False
+            self._task = None
+            self._loop = None
+            loop.close()
+
+    async def serve(self):
+        """Receive until running is cleared - runs on any asyncio loop"""
+        delay = self.reconnect_delay
+        while self.running:
+            try:
+                async with websockets.connect(self.url, ping_interval=PING_INTERVAL,
+                                              ping_timeout=PING_INTERVAL) as connection:
+                    self.connected = True
+                    self.connects += 1
+                    delay = self.reconnect_delay
+                    async for message in connection:
+                        self.decode_message(message, time.perf_counter())
+            except (OSError, asyncio.TimeoutError, websockets.WebSocketException) as e:
+                if self.connected:
+                    print(f"WebSocket connection to {self.url} lost: {e}")
+            self.connected = False
+            if self.running:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+
+    def decode_message(self, message, read_time=None):
+        """Push the sample in one JSON frame, unparseable frames as raw bytes"""
+        if read_time is None:
+            read_time = time.perf_counter()
+        self.bytes_read += len(message)
+        try:
+            data = json.loads(message)
+            sample = (float(data["yaw"]), float(data["pitch"]), float(data["roll"]), read_time)
+            if not all(map(math.isfinite, sample[:3])):
+                raise ValueError("non-finite angle")
+        except (ValueError, KeyError, TypeError):
+            self.parse_errors += 1
+            sample = message.encode() if isinstance(message, str) else bytes(message)
+        else:
+            self.frames += 1
+        self.ring.push(sample)
+        if self.latency is not None and not isinstance(sample, bytes):
+            self.latency.record("parse", read_time)
+        self.ring.notify()
+
+    def stats(self):
+        stats = self.ring.stats()
+        stats.update(protocol=self.protocol, bytes_read=self.bytes_read, frames=self.frames,
+                     parse_errors=self.parse_errors, crc_errors=self.crc_errors,
+                     sequence_gaps=self.sequence_gaps, connects=self.connects)
+        return stats
+
+
+async def serve_session(path, host="localhost", port=8181, speed=1.0, loop=True):
+    """Stand-in for the master: serve a recorded session as its JSON frames
+
+    Every client gets its own replay from the start of the recording.
+    """
+    require_websockets()
+    from session_recorder import SessionFile
+
+    session = SessionFile(path)
+
+    async def replay(connection, *args):
+        start = time.perf_counter()
+        try:
+            while True:
+                for t, yaw, pitch, roll in session:
+                    if speed > 0:
+                        delay = start + t / speed - time.perf_counter()
+                        if delay > 0:
+                            await asyncio.sleep(delay)
+                    else:
+                        await asyncio.sleep(0)
+                    await connection.send(json.dumps({"yaw": yaw, "pitch": pitch, "roll": roll}))
+                if not loop:
+                    break
+                start = time.perf_counter()
+        except websockets.ConnectionClosed:
+            pass
+
+    try:
+        async with websockets.serve(replay, host, port):
+            print(f"Serving {path} ({len(session)} frames) on ws://{host}:{port}")
+            await asyncio.Future()
+    finally:
+        session.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve a recorded session like the ESP32 master does')
+    parser.add_argument('session', help='Session file written with serial_reader.py --record')
+    parser.add_argument('--host', default='localhost', help='Address to listen on (default: %(default)s)')
+    parser.add_argument('--port', type=int, default=8181, help='Port to listen on (default: %(default)s)')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='Replay speed multiplier (0 = as fast as possible)')
+    parser.add_argument('--once', action='store_true', help='Stop after one pass instead of looping')
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve_session(args.session, args.host, args.port, args.speed, not args.once))
+    except KeyboardInterrupt:
+        pass
+    except (ImportError, IOError, ValueError) as e:
+        parser.error(str(e))
+
+
+if __name__ == "__main__":
+    main()
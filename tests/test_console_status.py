@@ -0,0 +1,18 @@
+import io
+import json
+
+from console_status import ConsoleStatus
+
+
+def test_stop_leaves_log_complete_and_closed(tmp_path):
+    log_path = tmp_path / "session.jsonl"
+    status = ConsoleStatus(stream=io.StringIO(), log_path=str(log_path), log_queue_size=1000)
+    status.start()
+    log_file = status.log_file
+    for i in range(500):
+        status.update(1.0, 2.0, 3.0, 10, 20, 30, float(i))
+    status.stop()
+    assert log_file.closed
+    lines = log_path.read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 500
+    assert json.loads(lines[-1])["midi"] == [10, 20, 30]
@@ -0,0 +1,28 @@
+import pytest
+
+from filters import FilterBank, OneEuroFilter, make_filter
+
+
+@pytest.mark.parametrize("spec", ["oneeuro:0", "oneeuro:-1", "oneeuro:1,-0.1", "oneeuro:1,0.007,0",
+                                  "oneeuro:1,0.007,-1"])
+def test_oneeuro_rejects_invalid_parameters(spec):
+    with pytest.raises(ValueError):
+        make_filter(spec)
+
+
+def test_oneeuro_invalid_spec_fails_filter_bank():
+    with pytest.raises(ValueError):
+        FilterBank({"yaw": "oneeuro:0"})
+
+
+def test_oneeuro_constant_input():
+    one_euro = OneEuroFilter()
+    for i in range(10):
+        assert one_euro.update(5.0, i * 0.01) == pytest.approx(5.0)
+
+
+def test_oneeuro_tracks_rising_input():
+    one_euro = OneEuroFilter(min_cutoff=1.0)
+    outputs = [one_euro.update(value, i * 0.01) for i, value in enumerate((1.0, 2.0, 3.0, 4.0, 5.0))]
+    assert outputs == sorted(outputs)
+    assert 1.0 <= outputs[-1] <= 5.0
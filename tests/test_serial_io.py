@@ -0,0 +1,61 @@
+import binascii
+
+from serial_io import PROTOCOL_BINARY, PROTOCOL_TEXT, RECORD_CRC_OFFSET, RECORD_FORMAT, SerialFrameReader
+
+
+def cobs_encode(data):
+    out = bytearray()
+    for block in data.split(b"\0"):
+        while len(block) >= 254:
+            out += b"\xff" + block[:254]
+            block = block[254:]
+        out += bytes((len(block) + 1,)) + block
+    return bytes(out)
+
+
+def binary_record(sequence, yaw, pitch, roll):
+    record = bytearray(RECORD_FORMAT.pack(sequence, sequence * 10, yaw, pitch, roll, 0))
+    crc = binascii.crc_hqx(record[:RECORD_CRC_OFFSET], 0xFFFF)
+    RECORD_FORMAT.pack_into(record, 0, sequence, sequence * 10, yaw, pitch, roll, crc)
+    return cobs_encode(bytes(record)) + b"\0"
+
+
+def pop_all(ring):
+    samples = []
+    while (sample := ring.pop()) is not None:
+        samples.append(sample[:3])
+    return samples
+
+
+def test_auto_switches_binary_to_text_mid_line():
+    reader = SerialFrameReader(None)
+    reader.feed(binary_record(1, 1.0, 2.0, 3.0) + binary_record(2, 4.0, 5.0, 6.0))
+    assert reader.protocol == PROTOCOL_BINARY
+    assert pop_all(reader.ring) == [(1.0, 2.0, 3.0), (4.0, 5.0, 6.0)]
+
+    # Text firmware starting in the middle of a line, after half a record
+    partial = binary_record(3, 7.0, 8.0, 9.0)[:10]
+    reader.feed(partial + b".5, 20.25, 30.75\n10.0, 20.0, 30.0\n11.0, 21.0, 31.0\n12.0, 22.0, 32.0\n")
+    assert reader.protocol == PROTOCOL_TEXT
+    assert pop_all(reader.ring) == [(10.0, 20.0, 30.0), (11.0, 21.0, 31.0), (12.0, 22.0, 32.0)]
+    assert reader.parse_errors == 0
+    assert len(reader._buffer) == 0
+
+
+def test_auto_switches_binary_to_text_on_line_boundary():
+    reader = SerialFrameReader(None)
+    reader.feed(binary_record(1, 1.0, 2.0, 3.0))
+    reader.feed(b"10.0, 20.0, 30.0\n11.0, 21.0, 31.0\n12.0, 22.0, 32.0\n")
+    assert reader.protocol == PROTOCOL_TEXT
+    assert pop_all(reader.ring) == [(1.0, 2.0, 3.0), (10.0, 20.0, 30.0), (11.0, 21.0, 31.0),
+                                    (12.0, 22.0, 32.0)]
+
+
+def test_auto_stays_binary_until_enough_text_lines():
+    reader = SerialFrameReader(None)
+    reader.feed(binary_record(1, 1.0, 2.0, 3.0))
+    reader.feed(b"garbage\n10.0, 20.0, 30.0\n")
+    assert reader.protocol == PROTOCOL_BINARY
+    reader.feed(b"11.0, 21.0, 31.0\n12.0, 22.0, 32.0\n")
+    assert reader.protocol == PROTOCOL_TEXT
+    assert pop_all(reader.ring)[-3:] == [(10.0, 20.0, 30.0), (11.0, 21.0, 31.0), (12.0, 22.0, 32.0)]